@@ -0,0 +1,50 @@
+"""
+Scaling of the parallel compile driver with the number of workers.
+
+Writes `--files` generated programs to a temporary directory and checks
+them all through minic.driver.compile_files with every `--jobs` count,
+reporting wall time and speedup over one worker, as JSON.
+
+    python -m benchmarks.driver --files 200 --jobs 1 2 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.generator import generate
+from minic.driver import compile_files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--functions', type=int, default=10, help="size of each generated program")
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunksize', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            paths.append(os.path.join(tmp, f"prog{i}.c"))
+            with open(paths[-1], 'w') as f:
+                f.write(generate(i, functions=args.functions))
+
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            compile_files(paths, jobs=jobs, chunksize=args.chunksize)
+            results.append({'jobs': jobs, 'wall': time.perf_counter() - start})
+
+    for res in results:
+        res['speedup'] = results[0]['wall'] / res['wall']
+
+    report = {'config': vars(args), 'cpus': os.cpu_count(), 'results': results}
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
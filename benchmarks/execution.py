@@ -0,0 +1,115 @@
+"""
+Execution speed of Mini-C programs.
+
+Runs recursive functions (power, fib) and a generated program through each
+execution backend, next to the same code written in Python as a reference.
+
+    python -m benchmarks.execution
+"""
+import argparse
+import json
+import time
+
+from benchmarks.generator import generate
+from minic.bytecode import compile_program
+from minic.interpreter import Interpreter
+from minic.parser import Parser
+from minic.pycompile import compile_program as compile_python
+from minic.scanner import TextScanner
+from minic.vm import VM
+
+SOURCE = """
+int power(int n){
+  if(n==0){
+    return 1;
+  }else{
+    return n * power(n-1);
+  }
+}
+
+int fib(int n){
+  if(n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+"""
+
+
+def py_power(n):
+    return 1 if n == 0 else n * py_power(n - 1)
+
+def py_fib(n):
+    return n if n < 2 else py_fib(n - 1) + py_fib(n - 2)
+
+
+def parse(text):
+    return Parser(TextScanner(text)).start()
+
+def interpreter(ast):
+    """Backend factory: ast -> function(name, *args)"""
+    return Interpreter(ast).run
+
+def vm(ast):
+    return VM(compile_program(ast)).run
+
+def pycompile(ast):
+    module = compile_python(ast)
+    return lambda name, *args: getattr(module, name)(*args)
+
+BACKENDS = {
+    'interpreter': interpreter,
+    'vm': vm,
+    'pycompile': pycompile,
+}
+
+
+def best(func, *args, repeat=3):
+    res = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        res = elapsed if res is None else min(res, elapsed)
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--power', type=int, default=100, help="power(n) argument")
+    parser.add_argument('--power-calls', type=int, default=200)
+    parser.add_argument('--fib', type=int, default=20, help="fib(n) argument")
+    parser.add_argument('--functions', type=int, default=20, help="size of the generated program")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS))
+    args = parser.parse_args(argv)
+
+    recursive = parse(SOURCE)
+    program = parse(generate(0, functions=args.functions, depth=2))
+
+    def repeat_power(run):
+        for _ in range(args.power_calls):
+            run('power', args.power)
+
+    results = {'python': {
+        'power': best(lambda: [py_power(args.power) for _ in range(args.power_calls)], repeat=args.repeat),
+        'fib': best(py_fib, args.fib, repeat=args.repeat),
+    }}
+
+    for name in args.backends:
+        start = time.perf_counter()
+        run = BACKENDS[name](recursive)
+        run_program = BACKENDS[name](program)
+        setup = time.perf_counter() - start
+
+        results[name] = {
+            'setup': setup,
+            'power': best(repeat_power, run, repeat=args.repeat),
+            'fib': best(run, 'fib', args.fib, repeat=args.repeat),
+            'program': best(run_program, 'main', repeat=args.repeat),
+        }
+
+    print(json.dumps({'config': vars(args), 'results': results}, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Seeded generator of Mini-C programs following docs/ebnf.org.
+
+Generated programs parse and pass NodeVisitor: every name is declared before
+use, calls only target functions defined earlier (so there is no recursion)
+with the right argument count, loops are counted and division is only by
+non zero constants, which also makes every program terminate when run.
+
+    python -m benchmarks.generator --functions 5 --seed 1
+"""
+import argparse
+import random
+from typing import List
+
+
+def letters(i: int) -> str:
+    """
+    0 -> a, 25 -> z, 26 -> ba ... identifiers cannot contain digits, callers
+    prefix an upper case letter so names never clash with keywords
+    """
+    res = ''
+    while True:
+        res = chr(ord('a') + i % 26) + res
+        i //= 26
+        if i == 0:
+            return res
+
+
+class ProgramGenerator:
+    def __init__(self, seed=0, functions=10, depth=2, exp_length=4,
+                 statements=4, globals_count=4, loop_count=3):
+        self.random = random.Random(seed)
+        self.functions = functions
+        self.depth = depth
+        self.exp_length = exp_length
+        self.statements = statements
+        self.globals = [f"G{letters(i)}" for i in range(globals_count)]
+        self.loop_count = loop_count
+        self.defined = []  # (name, param count) of functions already emitted
+
+    def generate(self) -> str:
+        lines = [f"int {name};" for name in self.globals]
+        for i in range(self.functions):
+            lines += self.function(f"F{letters(i)}")
+        lines += self.main()
+        return "\n".join(lines) + "\n"
+
+    def function(self, name: str) -> List[str]:
+        nparams = self.random.randint(0, 3)
+        params = [f"P{letters(i)}" for i in range(nparams)]
+        header = ", ".join(f"int {p}" for p in params) if params else "void"
+        self.scope = params + ['x', 'y', 'z'] + self.globals
+
+        lines = [f"int {name}({header}){{"]
+        lines += [f"  int {v};" for v in ['x', 'y', 'z']]
+        lines += [f"  int {v};" for v in self.counters()]
+        lines += [f"  x = {self.exp()};", "  y = 1;", "  z = 0;"]
+        lines += self.block(self.depth, 1)
+        lines += [f"  return {self.exp()};", "}"]
+
+        self.defined.append((name, nparams))
+        return lines
+
+    def main(self) -> List[str]:
+        self.scope = ['x', 'y', 'z'] + self.globals
+        lines = ["void main(void){"]
+        lines += [f"  int {v};" for v in ['x', 'y', 'z']]
+        lines += [f"  int {v};" for v in self.counters()]
+        lines += ["  x = 1;", "  y = 2;", "  z = 3;"]
+        lines += self.block(self.depth, 1)
+        lines += [f"  {name} = {self.exp()};" for name in self.globals]
+        lines += ["}"]
+        return lines
+
+    def counters(self) -> List[str]:
+        return [f"I{letters(d)}" for d in range(self.depth + 1)]
+
+    def block(self, depth: int, indent: int) -> List[str]:
+        lines = []
+        for _ in range(self.statements):
+            lines += self.statement(depth, indent)
+        return lines
+
+    def statement(self, depth: int, indent: int) -> List[str]:
+        pad = "  " * indent
+        choice = self.random.random() if depth > 0 else 0
+        target = self.random.choice(['x', 'y', 'z'] + self.globals)
+
+        if choice < 0.55:
+            return [f"{pad}{target} = {self.exp()};"]
+
+        counter = f"I{letters(depth)}"
+        if choice < 0.7:
+            lines = [f"{pad}if({self.condition()}){{"]
+            lines += self.block(depth - 1, indent + 1)
+            lines += [f"{pad}}}else{{"]
+            lines += self.block(depth - 1, indent + 1)
+            return lines + [f"{pad}}}"]
+        if choice < 0.85:
+            lines = [f"{pad}for({counter} = 0; {counter} < {self.loop_count}; {counter} = {counter} + 1){{"]
+            lines += self.block(depth - 1, indent + 1)
+            return lines + [f"{pad}}}"]
+
+        lines = [f"{pad}{counter} = 0;", f"{pad}while({counter} < {self.loop_count}){{"]
+        lines += self.block(depth - 1, indent + 1)
+        lines += [f"{pad}  {counter} = {counter} + 1;"]
+        return lines + [f"{pad}}}"]
+
+    def condition(self) -> str:
+        op = self.random.choice(['<', '>', '<=', '>=', '==', '!='])
+        return f"{self.exp()} {op} {self.exp()}"
+
+    def exp(self, length=None, nested=True) -> str:
+        length = self.exp_length if length is None else length
+        res = self.operand(nested)
+        for _ in range(self.random.randint(1, length) - 1):
+            op = self.random.choice(['+', '-', '*', '/'])
+            right = str(self.random.randint(1, 9)) if op == '/' else self.operand(nested)
+            res += f" {op} {right}"
+        return res
+
+    def operand(self, nested: bool) -> str:
+        choice = self.random.random()
+        if nested and choice < 0.1 and self.defined:
+            name, nparams = self.random.choice(self.defined)
+            args = ", ".join(self.exp(2, False) for _ in range(nparams))
+            return f"{name}({args})"
+        if nested and choice < 0.2:
+            return f"({self.exp(3, False)})"
+        if choice < 0.5:
+            return str(self.random.randint(0, 99))
+        return self.random.choice(self.scope)
+
+
+def generate(seed=0, **kwargs) -> str:
+    return ProgramGenerator(seed, **kwargs).generate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--functions', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--exp-length', type=int, default=4)
+    parser.add_argument('--statements', type=int, default=4)
+    args = parser.parse_args()
+
+    print(generate(args.seed, functions=args.functions, depth=args.depth,
+                   exp_length=args.exp_length, statements=args.statements), end='')
@@ -0,0 +1,80 @@
+"""
+Latency of incremental reparsing against a full reparse.
+
+For every size, a generated program is edited in the middle function,
+once within a line and once adding a line (which moves the declarations
+after it). Every run edits a fresh parser and reads the declarations
+parsed again, as an editor would; `program_newline` also reads every
+declaration after the line is added. The best of `--repeat` runs of each
+is reported next to a full reparse of the same text, as JSON.
+
+    python -m benchmarks.incremental --sizes 10 100 400
+"""
+import argparse
+import json
+import time
+
+from benchmarks.generator import generate
+from minic.incremental import IncrementalParser
+from minic.parser import Parser
+from minic.scanner import SourceScanner
+
+
+def full(text):
+    with SourceScanner(text, engine='regex') as scan:
+        return Parser(scan).start()
+
+
+def best(func, repeat, setup=lambda: None):
+    elapsed = None
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        t = time.perf_counter() - start
+        elapsed = t if elapsed is None else min(elapsed, t)
+    return elapsed
+
+
+def run(functions, depth=2, repeat=3):
+    text = generate(0, functions=functions, depth=depth)
+    offset = text.index('{', len(text) // 2) + 1
+
+    def fresh():
+        # nothing cached from an earlier run
+        return IncrementalParser(text)
+
+    def edit(inc, inserted):
+        return [inc.declaration(i) for i in inc.edit(offset, 0, inserted)]
+
+    def program(inc):
+        edit(inc, '\n')
+        return inc.program
+
+    inc = fresh()
+    edit(inc, '\n')
+    return {
+        'functions': functions,
+        'chars': len(text),
+        'full': best(lambda _: full(text), repeat),
+        'edit': best(lambda inc: edit(inc, ' '), repeat, fresh),
+        'edit_newline': best(lambda inc: edit(inc, '\n'), repeat, fresh),
+        'program_newline': best(program, repeat, fresh),
+        'reparsed': inc.reparsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 400])
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report = {'config': vars(args), 'results': [run(x, args.depth, args.repeat) for x in args.sizes]}
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Effect of each IR optimization pass on generated Mini-C programs.
+
+Every configuration (no pass, each pass alone, the passes not using SSA
+form as 'local', all passes) reports the static IR instruction count, the
+x86 assembly line count, the instructions executed running main through
+ir.IRInterpreter and that run time, as JSON. 'local' against 'all' shows
+what SCCP and GVN add.
+
+    python -m benchmarks.optimizer --functions 5 --seeds 0 1 2
+"""
+import argparse
+import json
+import time
+
+from benchmarks.generator import generate
+from minic import ir
+from minic.optimize import PASSES, Optimizer, size
+from minic.ssa import gvn, sccp
+from minic.parser import Parser
+from minic.scanner import TextScanner
+from minic.x86 import X86Generator
+
+
+def measure(ast, passes):
+    program = ir.build(ast)
+    optimizer = Optimizer(passes)
+    start = time.perf_counter()
+    optimizer.optimize(program)
+    optimize_time = time.perf_counter() - start
+
+    machine = ir.IRInterpreter(program)
+    start = time.perf_counter()
+    machine.run('main')
+    run_time = time.perf_counter() - start
+
+    return {
+        'instructions': size(program),
+        'asm_lines': X86Generator(program).assembly().count("\n"),
+        'executed': machine.executed,
+        'optimize_time': optimize_time,
+        'run_time': run_time,
+        'changes': optimizer.stats,
+        'rounds': optimizer.rounds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--functions', type=int, default=5, help="size of each generated program")
+    parser.add_argument('--depth', type=int, default=1, help="statement nesting depth")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    args = parser.parse_args(argv)
+
+    local = [name for name, run in PASSES.items() if run not in (sccp, gvn)]
+    configs = {'none': [], **{name: [name] for name in PASSES}, 'local': local, 'all': list(PASSES)}
+    results = {name: [] for name in configs}
+    for seed in args.seeds:
+        ast = Parser(TextScanner(generate(seed, functions=args.functions, depth=args.depth))).start()
+        for name, passes in configs.items():
+            results[name].append(measure(ast, passes))
+
+    base = results['none']
+    summary = {}
+    for name, runs in results.items():
+        summary[name] = {
+            key: sum(x[key] for x in runs) for key in ['instructions', 'asm_lines', 'executed']
+        }
+        summary[name]['run_time'] = sum(x['run_time'] for x in runs)
+        summary[name]['rounds'] = max(x['rounds'] for x in runs)
+        summary[name]['shrink'] = 1 - summary[name]['instructions'] / sum(x['instructions'] for x in base)
+        summary[name]['speedup'] = sum(x['executed'] for x in base) / summary[name]['executed']
+
+    print(json.dumps({'config': vars(args), 'summary': summary, 'results': results}, indent=2))
+    return summary
+
+
+if __name__ == '__main__':
+    main()
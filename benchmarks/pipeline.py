@@ -0,0 +1,133 @@
+"""
+Throughput of the compile pipeline on generated Mini-C programs.
+
+For every size it reports lex, parse and semantic check time separately,
+tokens/sec, lines/sec and the tracemalloc peak of each phase, as JSON.
+
+    python -m benchmarks.pipeline --sizes 10 100 500 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generator import generate
+from minic.nodevisitor import NodeVisitor
+from minic.parser import Parser
+from minic.scanner import FileScanner, MmapFileScanner, ReplayScanner, Scanner
+
+SCANNERS = {'file': FileScanner, 'mmap': MmapFileScanner}
+
+
+def lex(path, scanner, engine):
+    with scanner(path, engine) as scan:
+        return list(scan.tokens())
+
+def parse(tokens):
+    # replayed tokens, to time parsing alone
+    return Parser(ReplayScanner(tokens)).start()
+
+def check(ast):
+    NodeVisitor(ast).start()
+
+
+def timed(func, *args, repeat=1):
+    best, res = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+def peak(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(path, scanner='file', engine='state', repeat=3):
+    with open(path) as f:
+        lines = sum(1 for _ in f)
+
+    lex_time, tokens = timed(lex, path, SCANNERS[scanner], engine, repeat=repeat)
+    parse_time, ast = timed(parse, tokens, repeat=repeat)
+    check_time, _ = timed(check, ast, repeat=repeat)
+    total = lex_time + parse_time + check_time
+
+    return {
+        'lines': lines,
+        'tokens': len(tokens),
+        'bytes': os.path.getsize(path),
+        'time': {
+            'lex': lex_time,
+            'parse': parse_time,
+            'check': check_time,
+            'total': total,
+        },
+        'tokens_per_sec': len(tokens) / total,
+        'lines_per_sec': lines / total,
+        'peak_memory': {
+            'lex': peak(lex, path, SCANNERS[scanner], engine),
+            'parse': peak(parse, tokens),
+            'check': peak(check, ast),
+        },
+    }
+
+
+def commit():
+    try:
+        res = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True)
+        return res.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200],
+                        help="function count of each generated program")
+    parser.add_argument('--depth', type=int, default=2, help="statement nesting depth")
+    parser.add_argument('--exp-length', type=int, default=4, help="operands per expression")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="best of N runs")
+    parser.add_argument('--scanner', choices=list(SCANNERS), default='file')
+    parser.add_argument('--engine', choices=Scanner.engines, default='state')
+    parser.add_argument('--output', help="JSON file, stdout by default")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': commit(),
+        'python': platform.python_version(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"bench{size}.c")
+            with open(path, 'w') as f:
+                f.write(generate(args.seed, functions=size, depth=args.depth,
+                                 exp_length=args.exp_length))
+
+            res = run(path, args.scanner, args.engine, args.repeat)
+            report['results'].append({'functions': size, **res})
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Microbenchmark for the scanner lookup tables.
+
+Compares the module level frozenset/CHAR_CLASS tables against the per
+instance lists the Scanner used to build in init_keywords: scanner
+construction plus a scan, keyword lookups and character classification.
+
+    python -m benchmarks.scanner_tables
+"""
+import timeit
+
+from minic.scanner import CHAR_CLASS, CC_ALPHA, CC_DIGIT, CC_REL, KEYWORDS, TextScanner
+
+SNIPPET = """
+int power(int n){
+  if(n==0){
+    return 1;
+  }else{
+    return n * power(n-1);
+  }
+}
+"""
+WORDS = ['power', 'n', 'return', 'if', 'else', 'result', 'while', 'x']
+
+
+def legacy_tables():
+    """The lists Scanner.init_keywords built for every instance"""
+    keys = 'else if switch case default int void struct return break goto while for'
+    keyword = [x for x in keys.split(" ")]
+    arithmetic_operator = '+-*/'
+    rel_operator = [x for x in '< <= > >= == !='.split(" ")]
+    rel_start = [x for x in '< > = !'.split(" ")]
+    separator = '(){};:,[].'
+    return keyword, arithmetic_operator, rel_operator, rel_start, separator
+
+
+KEYWORD_LIST, ARITH, _, REL_START_LIST, SEP = legacy_tables()
+
+
+class LegacyTextScanner(TextScanner):
+    """TextScanner building the init_keywords tables for every instance again"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        (self.keyword, self.arithmetic_operator, self.rel_operator,
+         self.rel_start, self.separator) = legacy_tables()
+
+
+def legacy_classify(text):
+    res = 0
+    for c in text:
+        if c.isalpha():
+            res += 1
+        elif c.isnumeric():
+            res += 2
+        elif c in REL_START_LIST:
+            res += 3
+        elif c in ARITH or c in SEP:
+            res += 4
+    return res
+
+
+def table_classify(text):
+    res = 0
+    for c in text:
+        cc = CHAR_CLASS[ord(c)]
+        if cc == CC_ALPHA:
+            res += 1
+        elif cc == CC_DIGIT:
+            res += 2
+        elif cc == CC_REL:
+            res += 3
+        elif cc:
+            res += 4
+    return res
+
+
+def scan(text, cls=TextScanner):
+    with cls(text) as scan:
+        while scan.next_token():
+            pass
+
+
+def bench(name, legacy, current, number):
+    old = min(timeit.repeat(legacy, number=number, repeat=5))
+    new = min(timeit.repeat(current, number=number, repeat=5))
+    print(f"{name:<20} legacy {old * 1e6 / number:8.3f}us  "
+          f"current {new * 1e6 / number:8.3f}us  speedup {old / new:5.2f}x")
+
+
+if __name__ == '__main__':
+    bench("construct + scan",
+          lambda: scan(SNIPPET, LegacyTextScanner),
+          lambda: scan(SNIPPET),
+          2000)
+    bench("keyword lookup",
+          lambda: [w in KEYWORD_LIST for w in WORDS],
+          lambda: [w in KEYWORDS for w in WORDS],
+          100000)
+    bench("char classify",
+          lambda: legacy_classify(SNIPPET),
+          lambda: table_classify(SNIPPET),
+          2000)
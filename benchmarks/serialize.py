@@ -0,0 +1,68 @@
+"""
+Size and speed of the binary AST encoding against pickle.
+
+For every size, a generated program is encoded and decoded both ways,
+the best of `--repeat` runs is reported, with the time minic.binary.Reader
+takes to index the program and decode its last function alone, as JSON.
+
+    python -m benchmarks.serialize --sizes 10 100 500
+"""
+import argparse
+import json
+import pickle
+import time
+
+from benchmarks.generator import generate
+from minic import binary
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+FORMATS = {
+    'pickle': (pickle.dumps, pickle.loads),
+    'binary': (binary.dumps, binary.loads),
+}
+
+
+def best(func, *args, repeat=3):
+    res, elapsed = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args)
+        t = time.perf_counter() - start
+        elapsed = t if elapsed is None else min(elapsed, t)
+    return elapsed, res
+
+
+def lazy(data):
+    reader = binary.Reader(data)
+    return reader.function(reader.names()[-1])
+
+
+def run(functions, depth=2, repeat=3):
+    ast = Parser(TextScanner(generate(0, functions=functions, depth=depth))).start()
+    res = {'functions': functions}
+    for name, (dumps, loads) in FORMATS.items():
+        dump_time, data = best(dumps, ast, repeat=repeat)
+        load_time, back = best(loads, data, repeat=repeat)
+        assert back == ast
+        res[name] = {'bytes': len(data), 'dump_time': dump_time, 'load_time': load_time}
+
+    res['binary']['lazy_function_time'], _ = best(lazy, binary.dumps(ast), repeat=repeat)
+    res['shrink'] = res['pickle']['bytes'] / res['binary']['bytes']
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report = {'config': vars(args), 'results': [run(x, args.depth, args.repeat) for x in args.sizes]}
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
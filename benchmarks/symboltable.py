@@ -0,0 +1,97 @@
+"""
+Name resolution of ScopedSymbolTable, which walks the parent scopes, against
+the LeBlanc-Cook SymbolTable, whose lookups are a single dict probe.
+
+For every nesting depth, `--globals` names are declared in the global
+scope, one local per nested scope, and every global plus every local is
+looked up from the innermost scope. The best of `--repeat` runs is
+reported as JSON.
+
+    python -m benchmarks.symboltable --depths 1 10 100 --globals 1000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.generator import letters
+from minic import symboltable as symb
+
+
+def scoped(names, locals_):
+    scope = symb.ScopedSymbolTable('<global>', 1, verbose=False)
+    scope.init_builtin()
+    int_type = scope.lookup('int')
+    for name in names:
+        scope.insert(symb.VarSymbol(name, int_type))
+    for name in locals_:
+        scope = symb.ScopedSymbolTable(name, scope.level + 1, scope, verbose=False)
+        scope.insert(symb.VarSymbol(name, int_type))
+
+    lookup = scope.lookup
+    for name in names:
+        lookup(name)
+    for name in locals_:
+        lookup(name)
+
+    while scope.parent_scope:
+        scope = scope.parent_scope
+
+
+def leblanc_cook(names, locals_):
+    table = symb.SymbolTable()
+    table.enter('<global>').init_builtin()
+    int_type = table.lookup('int')
+    for name in names:
+        table.insert(symb.VarSymbol(name, int_type))
+    for name in locals_:
+        table.enter(name)
+        table.insert(symb.VarSymbol(name, int_type))
+
+    lookup = table.lookup
+    for name in names:
+        lookup(name)
+    for name in locals_:
+        lookup(name)
+
+    while table.scope:
+        table.leave()
+
+
+TABLES = {'scoped': scoped, 'leblanc_cook': leblanc_cook}
+
+
+def best(func, *args, repeat=3):
+    elapsed = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        t = time.perf_counter() - start
+        elapsed = t if elapsed is None else min(elapsed, t)
+    return elapsed
+
+
+def run(depth, globals_=1000, repeat=3):
+    names = [letters(i) for i in range(globals_)]
+    # locals get a prefix of their own, they must not shadow the globals
+    locals_ = ['l' + letters(i) for i in range(depth)]
+    res = {'depth': depth, 'globals': globals_}
+    for name, func in TABLES.items():
+        res[name] = best(func, names, locals_, repeat=repeat)
+    res['speedup'] = res['scoped'] / res['leblanc_cook']
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--globals', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report = {'config': vars(args), 'results': [run(x, args.globals, args.repeat) for x in args.depths]}
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
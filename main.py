@@ -1,6 +1,10 @@
+import argparse
+
+from minic.cache import ParseCache
 from minic.parser import Parser
 from minic.scanner import FileScanner
 from minic.symboltable import ScopedSymbolTable, TypeSymbol, VarSymbol
+from minic.trace import JsonLinesTracer, PrintTracer
 from minic.nodevisitor import NodeVisitor
 
 if __name__ == '__main__':
@@ -10,9 +14,25 @@ if __name__ == '__main__':
     # symtab.insert(VarSymbol('y', double))
     # print(symtab)
 
-    filepath = './examples/example10-1.c'
-    with FileScanner(filepath) as scan:
-        print(scan.spit())
-        ast = Parser(scan).start()
-        nv = NodeVisitor(ast)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filepath', nargs='?', default='./examples/example10-1.c')
+    parser.add_argument('--cache', metavar='DIR', help="reuse the ASTs parsed before from DIR")
+    parser.add_argument('--verbose', action='store_true', help="print the scopes and every symbol insert and lookup")
+    parser.add_argument('--trace', metavar='FILE', help="write the semantic pass events to FILE as JSON lines")
+    args = parser.parse_args()
+
+    if args.cache:
+        cache = ParseCache(args.cache)
+        ast = cache.parse(args.filepath)
+        print(cache.stats())
+    else:
+        with FileScanner(args.filepath) as scan:
+            print(scan.spit())
+            ast = Parser(scan).start()
+
+    if args.trace:
+        with open(args.trace, 'w') as f:
+            NodeVisitor(ast, JsonLinesTracer(f)).start()
+    else:
+        nv = NodeVisitor(ast, PrintTracer() if args.verbose else None)
         nv.start()
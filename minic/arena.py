@@ -0,0 +1,285 @@
+from __future__ import annotations
+from array import array
+from enum import IntEnum
+from types import GeneratorType
+from typing import Dict, List
+
+import minic.node as nd
+
+NONE = -1        # child index of a missing node
+PROP_INDEX = -2  # op of a Var whose prop is an array index (kept in value)
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1  # range of the values column
+
+
+class Kind(IntEnum):
+    Program = 0
+    VarDecl = 1
+    ParamDecl = 2
+    FuncDecl = 3
+    Num = 4
+    Var = 5
+    BinOp = 6
+    RelOp = 7
+    AssignmentOp = 8
+    CallFuncOp = 9
+    IfOp = 10
+    ForHeader = 11
+    ForLoop = 12
+    WhileLoop = 13
+    JumpStmt = 14
+    LabeledStmt = 15
+    Block = 16  # a python list of statements
+    Str = 17    # a bare string left in the tree (goto label, 'default', ...)
+    Error = 18
+
+
+class AstArena:
+    """
+    Flat struct-of-arrays storage for an AST. A node is an index into the
+    parallel columns below, identifiers/operators/keywords live once in the
+    `strings` table and are referenced by code (-1 is None).
+
+    * kinds     Kind of the node
+    * linums    line number (0 for Block/Str/ForHeader)
+    * ops       operator, keyword or type code
+    * names     identifier code
+    * values    Num value or Var index, 0 when it does not fit 64 bits
+                and is kept in the `bigs` side table instead
+    * firsts    start of the node children in `children`
+    * counts    number of children
+    * children  flat child indexes, NONE for missing ones
+    """
+    def __init__(self):
+        self.kinds = array('B')
+        self.linums = array('I')
+        self.ops = array('i')
+        self.names = array('i')
+        self.values = array('q')
+        self.firsts = array('I')
+        self.counts = array('I')
+        self.children = array('i')
+        self.strings: List[str] = []
+        self.bigs: Dict[int, int] = {}  # node -> value outside int64
+        self._codes: Dict[str, int] = {}
+        self.root = NONE
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def intern(self, value: str) -> int:
+        if value is None:
+            return -1
+
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def string(self, code: int) -> str:
+        return self.strings[code] if code >= 0 else None
+
+    def new(self, kind: Kind, linum=0, op=-1, name=-1, value=0, count=0) -> int:
+        """Append a node with `count` empty child slots, return its index"""
+        i = len(self.kinds)
+        self.kinds.append(kind)
+        self.linums.append(linum)
+        self.ops.append(op)
+        self.names.append(name)
+        if INT64_MIN <= value <= INT64_MAX:
+            self.values.append(value)
+        else:
+            self.bigs[i] = value
+            self.values.append(0)
+        self.firsts.append(len(self.children))
+        self.counts.append(count)
+        self.children.extend([NONE] * count)
+        return i
+
+    def kind(self, i: int) -> Kind:
+        return Kind(self.kinds[i])
+
+    def value(self, i: int) -> int:
+        return self.bigs.get(i, self.values[i]) if self.bigs else self.values[i]
+
+    def op(self, i: int) -> str:
+        return self.string(self.ops[i])
+
+    def name(self, i: int) -> str:
+        return self.string(self.names[i])
+
+    def child(self, i: int, k: int) -> int:
+        return self.children[self.firsts[i] + k]
+
+    def child_range(self, i: int) -> range:
+        """Positions of the node children inside `children`"""
+        start = self.firsts[i]
+        return range(start, start + self.counts[i])
+
+    def add(self, obj) -> int:
+        """Append obj (node, list, str or None) and everything below it"""
+        if obj is None:
+            return NONE
+
+        # (child slot, object) pairs from an explicit stack, deep trees
+        # (long expression chains) would hit the recursion limit otherwise.
+        # Children are popped in order, nodes end up in preorder.
+        children = self.children
+        root, stack = NONE, [(NONE, obj)]
+        while stack:
+            slot, obj = stack.pop()
+            kind, linum, op, name, value, kids = _flatten(self, obj)
+            i = self.new(kind, linum, op, name, value, len(kids))
+            if slot == NONE:
+                root = i
+            else:
+                children[slot] = i
+
+            start = self.firsts[i]
+            for k in range(len(kids) - 1, -1, -1):
+                if kids[k] is not None:
+                    stack.append((start + k, kids[k]))
+        return root
+
+    @classmethod
+    def from_tree(cls, program: nd.Node) -> AstArena:
+        arena = cls()
+        arena.root = arena.add(program)
+        return arena
+
+    def to_tree(self, i: int = None):
+        """Rebuild the nd.Node tree (or list/str) stored at i, root by default"""
+        i = self.root if i is None else i
+        if i == NONE:
+            return None
+
+        # children are rebuilt before their parent, in reverse preorder
+        children, kinds = self.children, self.kinds
+        order, stack = [], [i]
+        while stack:
+            x = stack.pop()
+            order.append(x)
+            stack += [children[k] for k in self.child_range(x) if children[k] != NONE]
+
+        built = {NONE: None}
+        for x in reversed(order):
+            kids = [built[children[k]] for k in self.child_range(x)]
+            built[x] = _BUILD[kinds[x]](self, x, kids)
+        return built[i]
+
+
+def _flatten(arena: AstArena, obj):
+    """(kind, linum, op, name, value, children) of obj"""
+    intern = arena.intern
+
+    if isinstance(obj, list):
+        return Kind.Block, 0, -1, -1, 0, obj
+    if isinstance(obj, str):
+        return Kind.Str, 0, -1, intern(obj), 0, []
+    if isinstance(obj, nd.ForHeader):
+        return Kind.ForHeader, 0, -1, -1, 0, [obj.first, obj.second, obj.third]
+
+    kind = Kind[obj.__class__.__name__]
+    linum = obj.linum
+    if kind == Kind.Program:
+        return kind, linum, -1, -1, 0, [obj.declarations]
+    if kind in [Kind.VarDecl, Kind.ParamDecl]:
+        return kind, linum, intern(obj.type), intern(obj.name), 0, []
+    if kind == Kind.FuncDecl:
+        return kind, linum, intern(obj.ret_type), intern(obj.name), 0, [obj.params, obj.body]
+    if kind == Kind.Num:
+        return kind, linum, -1, -1, obj.value, []
+    if kind == Kind.Var:
+        if isinstance(obj.prop, int):
+            return kind, linum, PROP_INDEX, intern(obj.value), obj.prop, []
+        return kind, linum, intern(obj.prop), intern(obj.value), 0, []
+    if kind in [Kind.BinOp, Kind.RelOp]:
+        return kind, linum, intern(obj.operator), -1, 0, [obj.left, obj.right]
+    if kind == Kind.AssignmentOp:
+        return kind, linum, -1, -1, 0, [obj.target, obj.value]
+    if kind == Kind.CallFuncOp:
+        return kind, linum, -1, intern(obj.name), 0, [obj.args]
+    if kind == Kind.IfOp:
+        return kind, linum, -1, -1, 0, [obj.condition, obj.body, obj.else_body]
+    if kind == Kind.ForLoop:
+        return kind, linum, -1, -1, 0, [obj.header, obj.body]
+    if kind == Kind.WhileLoop:
+        return kind, linum, -1, -1, 0, [obj.condition, obj.body]
+    if kind == Kind.JumpStmt:
+        return kind, linum, intern(obj.keyword), -1, 0, [obj.value]
+    if kind == Kind.LabeledStmt:
+        return kind, linum, -1, intern(obj.label), 0, [obj.value]
+    if kind == Kind.Error:
+        return kind, linum, -1, intern(obj.message), 0, []
+
+    raise TypeError(f"Cannot store {obj!r} in an AstArena")
+
+
+def _build_var(arena: AstArena, i: int, kids):
+    op = arena.ops[i]
+    prop = arena.value(i) if op == PROP_INDEX else arena.string(op)
+    return nd.Var(arena.linums[i], arena.name(i), prop)
+
+
+_BUILD = {
+    Kind.Program: lambda a, i, k: nd.Program(a.linums[i], k[0]),
+    Kind.VarDecl: lambda a, i, k: nd.VarDecl(a.linums[i], a.op(i), a.name(i)),
+    Kind.ParamDecl: lambda a, i, k: nd.ParamDecl(a.linums[i], a.op(i), a.name(i)),
+    Kind.FuncDecl: lambda a, i, k: nd.FuncDecl(a.linums[i], a.op(i), a.name(i), *k),
+    Kind.Num: lambda a, i, k: nd.Num(a.linums[i], a.value(i)),
+    Kind.Var: _build_var,
+    Kind.BinOp: lambda a, i, k: nd.BinOp(a.linums[i], a.op(i), *k),
+    Kind.RelOp: lambda a, i, k: nd.RelOp(a.linums[i], a.op(i), *k),
+    Kind.AssignmentOp: lambda a, i, k: nd.AssignmentOp(a.linums[i], *k),
+    Kind.CallFuncOp: lambda a, i, k: nd.CallFuncOp(a.linums[i], a.name(i), *k),
+    Kind.IfOp: lambda a, i, k: nd.IfOp(a.linums[i], *k),
+    Kind.ForHeader: lambda a, i, k: nd.ForHeader(*k),
+    Kind.ForLoop: lambda a, i, k: nd.ForLoop(a.linums[i], *k),
+    Kind.WhileLoop: lambda a, i, k: nd.WhileLoop(a.linums[i], *k),
+    Kind.JumpStmt: lambda a, i, k: nd.JumpStmt(a.linums[i], a.op(i), *k),
+    Kind.LabeledStmt: lambda a, i, k: nd.LabeledStmt(a.linums[i], a.name(i), *k),
+    Kind.Block: lambda a, i, k: k,
+    Kind.Str: lambda a, i, k: a.name(i),
+    Kind.Error: lambda a, i, k: nd.Error(a.linums[i], a.name(i)),
+}
+
+
+class ArenaVisitor:
+    """
+    Walks an AstArena by index, dispatching on the kind code to
+    visit_<Kind name>(i). Kinds without a handler visit their children.
+    Like NodeVisitor, a handler may be a generator yielding child indexes,
+    which are then visited from an explicit stack.
+    """
+    def __init__(self, arena: AstArena):
+        self.arena = arena
+        self._handlers = [
+            getattr(self, f"visit_{kind.name}", self.generic_visit) for kind in Kind
+        ]
+
+    def start(self):
+        self.visit(self.arena.root)
+
+    def visit(self, i: int):
+        if i == NONE:
+            return
+
+        kinds, handlers = self.arena.kinds, self._handlers
+        res = handlers[kinds[i]](i)
+        if not isinstance(res, GeneratorType):
+            return
+
+        stack = [res]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+            elif child != NONE:
+                res = handlers[kinds[child]](child)
+                if isinstance(res, GeneratorType):
+                    stack.append(res)
+
+    def generic_visit(self, i: int):
+        children = self.arena.children
+        for x in self.arena.child_range(i):
+            yield children[x]
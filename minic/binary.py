@@ -0,0 +1,460 @@
+"""
+Compact binary encoding of the AST.
+
+    MAGIC, version
+    string table    count, then (length, utf-8 bytes) per string
+    program         linum, number of declarations
+    declarations    (length, encoded declaration) each
+
+Numbers are LEB128 varints, signed ones zigzag encoded first. A node is
+its tag (arena.Kind + 1, 0 for None), the zigzag delta of its line
+number from the node before it and then its fields, strings being string
+table indexes + 1 (0 for None). Every declaration restarts the deltas from 0, a FuncDecl
+body is stored with its length and restarts them from the FuncDecl line,
+so a Reader can skip bodies or decode one function alone.
+
+    with open('prog.mca', 'wb') as f:
+        dump(program, f)
+    with open('prog.mca', 'rb') as f:
+        assert load(f) == program
+
+    reader = Reader(data)
+    reader.names()
+    reader.function('main')
+"""
+from __future__ import annotations
+import io
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+import minic.node as nd
+from minic.arena import Kind
+
+MAGIC = b'MCAST'
+VERSION = 1
+
+NONE_TAG = 0
+# kinds without a line number
+NO_LINE = {Kind.ForHeader, Kind.Block, Kind.Str}
+# Var prop marker
+PROP_NONE, PROP_INDEX, PROP_NAME = 0, 1, 2
+
+
+def varint(n: int, out: bytearray):
+    while n > 0x7f:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def _kind(obj) -> Kind:
+    if isinstance(obj, list):
+        return Kind.Block
+    if isinstance(obj, str):
+        return Kind.Str
+    return Kind[obj.__class__.__name__]
+
+
+# (string fields, node fields) of the kinds stored field by field, strings
+# are written first. Block, Str, Num and Var are encoded by hand.
+FIELDS = {
+    Kind.VarDecl: (['type', 'name'], []),
+    Kind.ParamDecl: (['type', 'name'], []),
+    Kind.FuncDecl: (['ret_type', 'name'], ['params', 'body']),
+    Kind.BinOp: (['operator'], ['left', 'right']),
+    Kind.RelOp: (['operator'], ['left', 'right']),
+    Kind.AssignmentOp: ([], ['target', 'value']),
+    Kind.CallFuncOp: (['name'], ['args']),
+    Kind.IfOp: ([], ['condition', 'body', 'else_body']),
+    Kind.ForHeader: ([], ['first', 'second', 'third']),
+    Kind.ForLoop: ([], ['header', 'body']),
+    Kind.WhileLoop: ([], ['condition', 'body']),
+    Kind.JumpStmt: (['keyword'], ['value']),
+    Kind.LabeledStmt: (['label'], ['value']),
+    Kind.Error: (['message'], []),
+}
+
+# stack markers around a FuncDecl body, nodes are never tuples
+_BODY, _BODY_END = 0, 1
+
+
+class _Encoder:
+    def __init__(self, strings: Dict[str, int]):
+        self.strings = strings
+        self.prev = 0
+
+    def string(self, value: str, out: bytearray):
+        varint(0 if value is None else self.strings[value] + 1, out)
+
+    def declaration(self, node: nd.Node) -> bytearray:
+        self.prev = 0
+        out = bytearray()
+        self.node(node, out)
+        return out
+
+    def node(self, obj, out: bytearray):
+        """Encode obj and everything below it in preorder, from an explicit
+        stack, deep trees (long expression chains) would hit the recursion
+        limit otherwise"""
+        string = self.string
+        outs, stack = [out], [obj]
+        while stack:
+            obj = stack.pop()
+            out = outs[-1]
+            if isinstance(obj, tuple):
+                if obj[0] == _BODY:
+                    # a body is stored with its length, its deltas start
+                    # from the FuncDecl line
+                    _, body, linum = obj
+                    stack += [(_BODY_END, self.prev), body]
+                    outs.append(bytearray())
+                    self.prev = linum
+                else:
+                    body = outs.pop()
+                    varint(len(body), outs[-1])
+                    outs[-1] += body
+                    self.prev = obj[1]
+                continue
+
+            if obj is None:
+                out.append(NONE_TAG)
+                continue
+
+            kind = _kind(obj)
+            varint(kind + 1, out)
+            if kind not in NO_LINE:
+                varint(zigzag(obj.linum - self.prev), out)
+                self.prev = obj.linum
+
+            if kind == Kind.Block:
+                varint(len(obj), out)
+                stack.extend(reversed(obj))
+            elif kind == Kind.Str:
+                string(obj, out)
+            elif kind == Kind.Num:
+                varint(zigzag(obj.value), out)
+            elif kind == Kind.Var:
+                string(obj.value, out)
+                if obj.prop is None:
+                    out.append(PROP_NONE)
+                elif isinstance(obj.prop, int):
+                    out.append(PROP_INDEX)
+                    varint(zigzag(obj.prop), out)
+                else:
+                    out.append(PROP_NAME)
+                    string(obj.prop, out)
+            elif kind == Kind.FuncDecl:
+                string(obj.ret_type, out)
+                string(obj.name, out)
+                stack += [(_BODY, obj.body, obj.linum), obj.params]
+            elif kind in FIELDS:
+                strings, nodes = FIELDS[kind]
+                for x in strings:
+                    string(getattr(obj, x), out)
+                stack.extend(getattr(obj, x) for x in reversed(nodes))
+            else:
+                raise TypeError(f"Cannot encode {obj!r}")
+
+
+def _collect_strings(program: nd.Program) -> Dict[str, int]:
+    """String table of every identifier, type and operator in program"""
+    codes: Dict[str, int] = {}
+
+    def add(value):
+        if value is not None and value not in codes:
+            codes[value] = len(codes)
+
+    stack = [program.declarations]
+    while stack:
+        obj = stack.pop()
+        if obj is None or isinstance(obj, int):
+            continue
+        if isinstance(obj, list):
+            stack.extend(reversed(obj))
+        elif isinstance(obj, str):
+            add(obj)
+        elif isinstance(obj, (nd.VarDecl, nd.ParamDecl)):
+            add(obj.type)
+            add(obj.name)
+        elif isinstance(obj, nd.FuncDecl):
+            add(obj.ret_type)
+            add(obj.name)
+            stack += [obj.body, obj.params]
+        elif isinstance(obj, nd.Var):
+            stack += [obj.prop, obj.value]
+        elif isinstance(obj, (nd.BinOp, nd.RelOp)):
+            add(obj.operator)
+            stack += [obj.right, obj.left]
+        elif isinstance(obj, nd.CallFuncOp):
+            add(obj.name)
+            stack.append(obj.args)
+        elif isinstance(obj, nd.JumpStmt):
+            add(obj.keyword)
+            stack.append(obj.value)
+        elif isinstance(obj, nd.LabeledStmt):
+            add(obj.label)
+            stack.append(obj.value)
+        elif isinstance(obj, nd.ForHeader):
+            stack += [obj.third, obj.second, obj.first]
+        elif isinstance(obj, nd.Num):
+            continue
+        else:
+            # AssignmentOp, IfOp and the loops only hold other nodes
+            stack += [getattr(obj, f) for f in reversed(obj.__dataclass_fields__) if f != 'linum']
+    return codes
+
+
+def dump(program: nd.Program, fp: BinaryIO):
+    """Write program to the binary file fp, one declaration at a time"""
+    strings = _collect_strings(program)
+    head = bytearray(MAGIC)
+    varint(VERSION, head)
+    varint(len(strings), head)
+    for value in strings:
+        raw = value.encode()
+        varint(len(raw), head)
+        head += raw
+    varint(program.linum, head)
+    varint(len(program.declarations), head)
+    fp.write(head)
+
+    encoder = _Encoder(strings)
+    for decl in program.declarations:
+        out = bytearray()
+        body = encoder.declaration(decl)
+        varint(len(body), out)
+        fp.write(out)
+        fp.write(body)
+
+
+def dumps(program: nd.Program) -> bytes:
+    buf = io.BytesIO()
+    dump(program, buf)
+    return buf.getvalue()
+
+
+class _Decoder:
+    """Decodes nodes from data, starting at pos"""
+    def __init__(self, data: bytes, strings: List[str], pos: int = 0):
+        self.data = data
+        self.strings = strings
+        self.pos = pos
+        self.prev = 0
+
+    def varint(self) -> int:
+        data, pos = self.data, self.pos
+        b = data[pos]
+        pos += 1
+        n, shift = b & 0x7f, 7
+        while b & 0x80:
+            b = data[pos]
+            pos += 1
+            n |= (b & 0x7f) << shift
+            shift += 7
+        self.pos = pos
+        return n
+
+    def string(self) -> str:
+        code = self.varint()
+        return self.strings[code - 1] if code else None
+
+    def node(self, body=True):
+        """Decode a node and everything below it, from an explicit stack"""
+        string = self.string
+        # nodes waiting for their children: [kind, linum, fields, children left]
+        stack = []
+        while True:
+            tag = self.varint()
+            if tag == NONE_TAG:
+                value = None
+            else:
+                kind = tag - 1
+                linum = 0
+                if kind not in NO_LINE:
+                    self.prev = linum = self.prev + unzigzag(self.varint())
+
+                if kind == Kind.Block:
+                    fields, count = [], self.varint()
+                elif kind == Kind.Num:
+                    fields, count = [unzigzag(self.varint())], 0
+                elif kind == Kind.Var:
+                    name = string()
+                    marker = self.varint()
+                    if marker == PROP_INDEX:
+                        fields = [name, unzigzag(self.varint())]
+                    else:
+                        fields = [name, string() if marker == PROP_NAME else None]
+                    count = 0
+                elif kind == Kind.Str:
+                    fields, count = [string()], 0
+                elif kind in FIELDS:
+                    strings, nodes = FIELDS[kind]
+                    fields, count = [string() for _ in strings], len(nodes)
+                else:
+                    raise ValueError(f"Unknown node tag {tag} at {self.pos}")
+
+                if count:
+                    stack.append([kind, linum, fields, count])
+                    continue
+                value = _BUILD[kind](linum, *fields)
+
+            # hand value to its parent, building the parents now complete
+            while stack:
+                frame = stack[-1]
+                frame[2].append(value)
+                frame[3] -= 1
+                if frame[0] == Kind.FuncDecl and frame[3] == 1:
+                    # params read, the body follows with its length
+                    size = self.varint()
+                    if body:
+                        frame.append(self.prev)
+                        self.prev = frame[1]
+                    else:
+                        self.pos += size
+                        frame[2].append(None)
+                        frame[3] = 0
+                if frame[3]:
+                    break
+
+                stack.pop()
+                if len(frame) > 4:
+                    self.prev = frame[4]
+                value = _BUILD[frame[0]](frame[1], *frame[2])
+            else:
+                return value
+
+
+_BUILD = {
+    Kind.VarDecl: nd.VarDecl,
+    Kind.ParamDecl: nd.ParamDecl,
+    Kind.FuncDecl: nd.FuncDecl,
+    Kind.Num: nd.Num,
+    Kind.Var: nd.Var,
+    Kind.BinOp: nd.BinOp,
+    Kind.RelOp: nd.RelOp,
+    Kind.AssignmentOp: nd.AssignmentOp,
+    Kind.CallFuncOp: nd.CallFuncOp,
+    Kind.IfOp: nd.IfOp,
+    Kind.ForHeader: lambda linum, *k: nd.ForHeader(*k),
+    Kind.ForLoop: nd.ForLoop,
+    Kind.WhileLoop: nd.WhileLoop,
+    Kind.JumpStmt: nd.JumpStmt,
+    Kind.LabeledStmt: nd.LabeledStmt,
+    Kind.Block: lambda linum, *k: list(k),
+    Kind.Str: lambda linum, value: value,
+    Kind.Error: nd.Error,
+}
+
+
+def _check_header(decoder: _Decoder):
+    if bytes(decoder.data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a binary Mini-C AST")
+    decoder.pos = len(MAGIC)
+    version = decoder.varint()
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary AST version {version}, expected {VERSION}")
+
+
+def _read_varint(fp: BinaryIO) -> int:
+    n, shift = 0, 0
+    while True:
+        b = fp.read(1)
+        if not b:
+            raise EOFError("Truncated binary AST")
+        n |= (b[0] & 0x7f) << shift
+        shift += 7
+        if not b[0] & 0x80:
+            return n
+
+
+def _read_header(fp: BinaryIO) -> Tuple[List[str], int, int]:
+    """String table, program linum and number of declarations"""
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary Mini-C AST")
+    version = _read_varint(fp)
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary AST version {version}, expected {VERSION}")
+
+    strings = [fp.read(_read_varint(fp)).decode() for _ in range(_read_varint(fp))]
+    return strings, _read_varint(fp), _read_varint(fp)
+
+
+def _declarations(fp: BinaryIO, strings: List[str], count: int) -> Iterator[nd.Node]:
+    for _ in range(count):
+        size = _read_varint(fp)
+        yield _Decoder(fp.read(size), strings).node()
+
+
+def iterload(fp: BinaryIO) -> Iterator[nd.Node]:
+    """Top level declarations of the binary file fp, read one at a time"""
+    strings, _, count = _read_header(fp)
+    yield from _declarations(fp, strings, count)
+
+
+def load(fp: BinaryIO) -> nd.Program:
+    strings, linum, count = _read_header(fp)
+    return nd.Program(linum, list(_declarations(fp, strings, count)))
+
+
+def loads(data: bytes) -> nd.Program:
+    return load(io.BytesIO(data))
+
+
+class Reader:
+    """
+    Random access to the declarations of an encoded program. Only the
+    header and the declaration lengths are read up front, function bodies
+    are decoded when asked for.
+    """
+    def __init__(self, data: bytes):
+        self.data = data
+        decoder = _Decoder(data, [])
+        _check_header(decoder)
+
+        strings = []
+        for _ in range(decoder.varint()):
+            size = decoder.varint()
+            strings.append(bytes(data[decoder.pos:decoder.pos + size]).decode())
+            decoder.pos += size
+        self.strings = strings
+        self.linum = decoder.varint()
+
+        # start of every declaration
+        self.offsets: List[int] = []
+        for _ in range(decoder.varint()):
+            size = decoder.varint()
+            self.offsets.append(decoder.pos)
+            decoder.pos += size
+        self._index: Dict[str, int] = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def declaration(self, i: int, body=True) -> nd.Node:
+        """Declaration i, a FuncDecl without body (None) unless body is set"""
+        return _Decoder(self.data, self.strings, self.offsets[i]).node(body)
+
+    def names(self) -> List[str]:
+        return list(self._functions())
+
+    def function(self, name: str) -> nd.FuncDecl:
+        return self.declaration(self._functions()[name])
+
+    def program(self) -> nd.Program:
+        return nd.Program(self.linum, [self.declaration(i) for i in range(len(self))])
+
+    def _functions(self) -> Dict[str, int]:
+        if self._index is None:
+            self._index = {}
+            for i in range(len(self)):
+                decl = self.declaration(i, body=False)
+                if isinstance(decl, nd.FuncDecl):
+                    self._index[decl.name] = i
+        return self._index
@@ -0,0 +1,276 @@
+from __future__ import annotations
+from array import array
+from enum import IntEnum
+from typing import Dict, List
+
+import minic.node as nd
+from minic.resolver import SlotResolver
+
+
+class Op(IntEnum):
+    """
+    Every instruction is two ints: the opcode and its argument (0 when
+    unused). Jump arguments are absolute positions in the code array.
+    """
+    CONST = 0          # push consts[arg]
+    LOAD = 1           # push locals[arg]
+    STORE = 2          # locals[arg] = top, value stays on the stack
+    LOAD_GLOBAL = 3
+    STORE_GLOBAL = 4
+    ADD = 5
+    SUB = 6
+    MUL = 7
+    DIV = 8            # truncating, like C
+    LT = 9
+    GT = 10
+    LE = 11
+    GE = 12
+    EQ = 13
+    NE = 14
+    JUMP = 15
+    JUMP_IF_FALSE = 16  # pops the condition
+    CALL = 17          # arg is the function index, arguments are on the stack
+    RETURN = 18        # return the popped value
+    RETURN_NONE = 19
+    POP = 20
+
+
+BINARY_OPS = {
+    '+': Op.ADD, '-': Op.SUB, '*': Op.MUL, '/': Op.DIV,
+    '<': Op.LT, '>': Op.GT, '<=': Op.LE, '>=': Op.GE, '==': Op.EQ, '!=': Op.NE,
+}
+
+JUMPS = (Op.JUMP, Op.JUMP_IF_FALSE)
+HAS_ARG = (Op.CONST, Op.LOAD, Op.STORE, Op.LOAD_GLOBAL, Op.STORE_GLOBAL, Op.CALL) + JUMPS
+
+
+class Code:
+    """Compiled body of one function"""
+    def __init__(self, name: str, arity=0):
+        self.name = name
+        self.arity = arity
+        self.nlocals = 0
+        self.code = array('i')
+        self.consts: List[int] = []
+        self.varnames: List[str] = []
+        self._const_index: Dict[int, int] = {}
+
+    def __repr__(self):
+        return f"<Code {self.name}/{self.arity}>"
+
+    def emit(self, op: Op, arg=0) -> int:
+        """Append an instruction, return its position"""
+        pos = len(self.code)
+        self.code.append(op)
+        self.code.append(arg)
+        return pos
+
+    def patch(self, pos: int, target: int):
+        """Point the jump at pos to target"""
+        self.code[pos + 1] = target
+
+    def const(self, value: int) -> int:
+        index = self._const_index.get(value)
+        if index is None:
+            index = self._const_index[value] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+
+class Module:
+    """Compiled program: functions by index, and the global variable names"""
+    def __init__(self):
+        self.functions: List[Code] = []
+        self.index: Dict[str, int] = {}
+        self.global_names: List[str] = []
+
+    def function(self, name: str) -> Code:
+        return self.functions[self.index[name]]
+
+
+class Compiler(SlotResolver):
+    """
+    Compiles an nd.Program to a Module of stack bytecode. Names are resolved
+    to local, global or function slots at compile time, through the same
+    SlotResolver as the Interpreter, so the VM never looks up a name.
+
+        module = Compiler(ast).compile()
+        print(disassemble(module.function('main'), module))
+    """
+    def __init__(self, root: nd.Program):
+        super().__init__()
+        self.root = root
+        self.module = Module()
+        self.code: Code = None
+        self._breaks: List[List[int]] = []
+
+    def compile(self) -> Module:
+        for decl in self.root.declarations:
+            if isinstance(decl, nd.VarDecl):
+                self.declare(decl)
+            else:
+                self._function(decl)
+
+        self.module.global_names = list(self.global_slots)
+        return self.module
+
+    def _function(self, node: nd.FuncDecl):
+        code = self.code = Code(node.name)
+        # indexed before the body, recursive calls can resolve it
+        self.module.index[node.name] = len(self.module.functions)
+        self.module.functions.append(code)
+
+        code.arity = len(self.enter_function(node).params)
+        self._block(node.body or [])
+        code.emit(Op.RETURN_NONE)
+        code.varnames = list(self.local_slots)
+        code.nlocals = self.leave_function()
+
+    # statements
+    def _block(self, stmts: List):
+        for stmt in stmts:
+            self._stmt(stmt)
+
+    def _stmt(self, node):
+        if isinstance(node, list):
+            return self._block(node)
+
+        if isinstance(node, nd.VarDecl):
+            self.declare(node)
+        elif isinstance(node, nd.IfOp):
+            self._if(node)
+        elif isinstance(node, nd.WhileLoop):
+            self._while(node)
+        elif isinstance(node, nd.ForLoop):
+            self._for(node)
+        elif isinstance(node, nd.JumpStmt):
+            self._jump(node)
+        elif isinstance(node, nd.Node):
+            self._exp(node)
+            self.code.emit(Op.POP)
+        else:
+            raise self.error(node, f"Unsupported statement {node!r}")
+
+    def _if(self, node: nd.IfOp):
+        code = self.code
+        self._exp(node.condition)
+        to_else = code.emit(Op.JUMP_IF_FALSE)
+        self._block(node.body)
+
+        if node.else_body:
+            to_end = code.emit(Op.JUMP)
+            code.patch(to_else, len(code.code))
+            self._block(node.else_body)
+            code.patch(to_end, len(code.code))
+        else:
+            code.patch(to_else, len(code.code))
+
+    def _loop(self, top: int, cond, body, step=None):
+        """Emit `while(cond){ body; step; }`, cond and step may be None"""
+        code = self.code
+        to_end = None
+        if cond is not None:
+            self._exp(cond)
+            to_end = code.emit(Op.JUMP_IF_FALSE)
+
+        self.loops += 1
+        self._breaks.append([])
+        self._block(body)
+        self.loops -= 1
+
+        if step is not None:
+            self._exp(step)
+            code.emit(Op.POP)
+        code.emit(Op.JUMP, top)
+
+        end = len(code.code)
+        for pos in self._breaks.pop() + ([to_end] if to_end is not None else []):
+            code.patch(pos, end)
+
+    def _while(self, node: nd.WhileLoop):
+        self._loop(len(self.code.code), node.condition, node.body)
+
+    def _for(self, node: nd.ForLoop):
+        header = node.header
+        if header.first is not None:
+            self._exp(header.first)
+            self.code.emit(Op.POP)
+        self._loop(len(self.code.code), header.second, node.body, header.third)
+
+    def _jump(self, node: nd.JumpStmt):
+        self.jump(node)
+        if node.keyword == 'break':
+            self._breaks[-1].append(self.code.emit(Op.JUMP))
+        elif node.value is None:
+            self.code.emit(Op.RETURN_NONE)
+        else:
+            self._exp(node.value)
+            self.code.emit(Op.RETURN)
+
+    # expressions
+    def _exp(self, node):
+        code = self.code
+        if isinstance(node, nd.Num):
+            code.emit(Op.CONST, code.const(node.value))
+        elif isinstance(node, nd.Var):
+            symbol = self.variable(node)
+            code.emit(Op.LOAD_GLOBAL if symbol.is_global else Op.LOAD, symbol.slot)
+        elif isinstance(node, (nd.BinOp, nd.RelOp)):
+            # the left spine of a chain is walked from an explicit stack
+            spine = []
+            while isinstance(node, (nd.BinOp, nd.RelOp)):
+                spine.append(node)
+                node = node.left
+
+            self._exp(node)
+            for x in reversed(spine):
+                op = BINARY_OPS.get(x.operator)
+                if op is None:
+                    raise self.error(x, f"Unknown operator '{x.operator}'")
+                self._exp(x.right)
+                code.emit(op)
+        elif isinstance(node, nd.AssignmentOp):
+            symbol = self.variable(node.target)
+            self._exp(node.value)
+            code.emit(Op.STORE_GLOBAL if symbol.is_global else Op.STORE, symbol.slot)
+        elif isinstance(node, nd.CallFuncOp):
+            self.function(node)
+            for arg in node.args or []:
+                self._exp(arg)
+            code.emit(Op.CALL, self.module.index[node.name])
+        else:
+            raise self.error(node, f"Unsupported expression {node!r}")
+
+
+def compile_program(root: nd.Program) -> Module:
+    return Compiler(root).compile()
+
+
+def disassemble(code: Code, module: Module = None) -> str:
+    """
+    One instruction per line: position, opcode, argument and what the
+    argument refers to. Jump targets are marked with '>>'.
+    """
+    targets = {code.code[i + 1] for i in range(0, len(code.code), 2) if code.code[i] in JUMPS}
+    lines = [f"{code.name}/{code.arity} nlocals={code.nlocals}"]
+
+    for pos in range(0, len(code.code), 2):
+        op, arg = Op(code.code[pos]), code.code[pos + 1]
+        note = ''
+        if op == Op.CONST:
+            note = f"({code.consts[arg]})"
+        elif op in (Op.LOAD, Op.STORE):
+            note = f"({code.varnames[arg]})"
+        elif op in (Op.LOAD_GLOBAL, Op.STORE_GLOBAL) and module is not None:
+            note = f"({module.global_names[arg]})"
+        elif op == Op.CALL and module is not None:
+            note = f"({module.functions[arg].name})"
+        elif op in JUMPS:
+            note = f"(to {arg})"
+
+        mark = '>>' if pos in targets else '  '
+        if op in HAS_ARG:
+            lines.append(f"{mark} {pos:>4} {op.name:<14} {arg:<4} {note}".rstrip())
+        else:
+            lines.append(f"{mark} {pos:>4} {op.name}")
+    return "\n".join(lines)
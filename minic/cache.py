@@ -0,0 +1,199 @@
+"""
+Persistent parse cache. An entry is keyed by the sha256 of the source
+bytes and a stamp of the parser version, and holds the AstArena columns of
+the parsed Program, so a warm run neither scans nor parses the file.
+
+    cache = ParseCache('.minic-cache')
+    ast = cache.parse('examples/example10-1.c')
+    cache.stats()
+
+Entries are written to a temporary file and renamed into place, so
+processes sharing the directory only ever read complete entries. The
+directory is kept under `max_bytes` by dropping the least recently used
+entries, a hit touches the entry mtime. The same sweep removes temporary
+files left behind by a writer that died before renaming them.
+"""
+from __future__ import annotations
+import hashlib
+import marshal
+import os
+import tempfile
+import time
+import zlib
+from array import array
+from functools import lru_cache
+from typing import Dict, Optional
+
+import minic.node as nd
+from minic.arena import AstArena
+from minic.parser import Parser
+from minic.scanner import FileScanner
+
+# bump when the entry layout changes
+FORMAT = 2
+SUFFIX = '.ast'
+TMP_SUFFIX = '.tmp'
+# a temporary file this old was left by a writer that died before renaming it
+STALE_SECONDS = 60
+
+# arena columns stored in an entry, in order
+COLUMNS = ['kinds', 'linums', 'ops', 'names', 'values', 'firsts', 'counts', 'children']
+
+
+@lru_cache(maxsize=None)
+def parser_stamp() -> bytes:
+    """Digest of the modules shaping the AST, any edit invalidates the cache"""
+    digest = hashlib.sha256(str(FORMAT).encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ['scanner.py', 'parser.py', 'node.py', 'arena.py']:
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def dumps(arena: AstArena) -> bytes:
+    # the columns are mostly small numbers, the fastest zlib level already
+    # shrinks them about six times
+    columns = [getattr(arena, x).tobytes() for x in COLUMNS]
+    entry = (FORMAT, arena.root, arena.strings, arena.bigs, columns)
+    return zlib.compress(marshal.dumps(entry), 1)
+
+
+def loads(data: bytes) -> AstArena:
+    fmt, root, strings, bigs, columns = marshal.loads(zlib.decompress(data))
+    if fmt != FORMAT:
+        raise ValueError(f"Unknown cache entry format {fmt}")
+
+    arena = AstArena()
+    for name, raw in zip(COLUMNS, columns):
+        column = array(getattr(arena, name).typecode)
+        column.frombytes(raw)
+        setattr(arena, name, column)
+    arena.strings = strings
+    arena.bigs = bigs
+    arena._codes = {x: i for i, x in enumerate(strings)}
+    arena.root = root
+    return arena
+
+
+class ParseCache:
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source: bytes) -> str:
+        return hashlib.sha256(parser_stamp() + source).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def parse(self, filename: str) -> nd.Program:
+        """Program of filename, from the cache when its content was seen before"""
+        with open(filename, 'rb') as f:
+            source = f.read()
+
+        key = self.key(source)
+        ast = self.get(key)
+        if ast is not None:
+            return ast
+
+        with FileScanner(filename) as scan:
+            ast = Parser(scan).start()
+        self.put(key, ast)
+        return ast
+
+    def get(self, key: str) -> Optional[nd.Program]:
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                arena = loads(f.read())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (zlib.error, ValueError, EOFError, TypeError):
+            # unreadable or from another format, parse again
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted meanwhile, the entry read is still fine
+        self.hits += 1
+        return arena.to_tree()
+
+    def put(self, key: str, ast: nd.Program):
+        try:
+            data = dumps(AstArena.from_tree(ast))
+        except (OverflowError, TypeError, ValueError):
+            return  # not storable, the caller still has the parsed ast
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+            tmp = None
+        finally:
+            if tmp is not None:
+                self._remove(tmp)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Drop the least recently used entries until the cache fits max_bytes,
+        and stale temporary files. Returns the number of entries dropped.
+        """
+        entries = []
+        stale = time.time() - STALE_SECONDS
+        for entry in os.scandir(self.directory):
+            is_tmp = entry.name.endswith(TMP_SUFFIX)
+            if not (is_tmp or entry.name.endswith(SUFFIX)):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process
+            if is_tmp:
+                # younger ones may still be written by another process
+                if stat.st_mtime < stale:
+                    self._remove(entry.path)
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(x[1] for x in entries)
+        count = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            count += 1
+
+        self.evictions += count
+        return count
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                self._remove(entry.path)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,144 @@
+from __future__ import annotations
+from typing import Dict, List, Set, Tuple
+
+from minic import ir
+
+TERMINATORS = ('jump', 'jump_if_false', 'return')
+
+
+class BasicBlock:
+    """
+    Straight line run of instructions. A block starts at a label (or after
+    a terminator) and ends with at most one jump/return; `succs` and
+    `preds` hold block labels.
+    """
+    def __init__(self, label: str, instrs: List[ir.Instr] = None):
+        self.label = label
+        self.instrs: List[ir.Instr] = instrs or []
+        self.succs: List[str] = []
+        self.preds: List[str] = []
+
+    def __repr__(self):
+        return f"<BasicBlock {self.label} -> {self.succs}>"
+
+    @property
+    def terminator(self) -> ir.Instr:
+        last = self.instrs[-1] if self.instrs else None
+        return last if last is not None and last.op in TERMINATORS else None
+
+
+class CFG:
+    """
+    Control flow graph of an ir.Function. Blocks keep the order of the
+    instruction list, so a block without a terminator falls through to the
+    next one. Blocks not starting at a label are named B1, B2 ... which can
+    never clash with the L1, L2 ... labels of the lowering.
+
+        cfg = CFG(func)
+        func.instrs = cfg.instrs()
+    """
+    def __init__(self, func: ir.Function):
+        self.func = func
+        self.blocks: List[BasicBlock] = []
+        self.by_label: Dict[str, BasicBlock] = {}
+        self._split(func.instrs)
+        self._link()
+
+    @property
+    def entry(self) -> BasicBlock:
+        return self.blocks[0]
+
+    def _split(self, instrs: List[ir.Instr]):
+        block = None
+        for x in instrs:
+            if x.op == 'label':
+                block = self._new(x.args[0])
+                continue
+            if block is None:
+                block = self._new(f"B{len(self.blocks) + 1}")
+            block.instrs.append(x)
+            if x.op in TERMINATORS:
+                block = None
+
+        if not self.blocks:
+            self._new('B1')
+
+    def _new(self, label: str) -> BasicBlock:
+        block = BasicBlock(label)
+        self.blocks.append(block)
+        self.by_label[label] = block
+        return block
+
+    def _link(self):
+        for i, block in enumerate(self.blocks):
+            term = block.terminator
+            nxt = self.blocks[i + 1].label if i + 1 < len(self.blocks) else None
+
+            if term is None:
+                block.succs = [nxt] if nxt else []
+            elif term.op == 'jump':
+                block.succs = [term.args[0]]
+            elif term.op == 'jump_if_false':
+                block.succs = [x for x in [nxt, term.args[1]] if x]
+            else:
+                block.succs = []
+
+            for s in block.succs:
+                self.by_label[s].preds.append(block.label)
+
+    def reachable(self) -> Set[str]:
+        seen, todo = set(), [self.entry.label]
+        while todo:
+            label = todo.pop()
+            if label not in seen:
+                seen.add(label)
+                todo += self.by_label[label].succs
+        return seen
+
+    def instrs(self) -> List[ir.Instr]:
+        return linearize(self.blocks)
+
+
+def linearize(blocks: List[BasicBlock]) -> List[ir.Instr]:
+    """Linear instruction list of blocks, labels only for the original labels"""
+    res = []
+    for block in blocks:
+        if not (block.label[0] == 'B' and block.label[1:].isdigit()):
+            res.append(ir.Instr('label', None, (block.label,)))
+        res += block.instrs
+    return res
+
+
+def liveness(instrs: List[ir.Instr]) -> Tuple[List[Set[str]], List[Set[str]]]:
+    """live_in and live_out virtual registers of every instruction"""
+    labels = {x.args[0]: i for i, x in enumerate(instrs) if x.op == 'label'}
+    n = len(instrs)
+
+    succs = []
+    for i, x in enumerate(instrs):
+        if x.op == 'jump':
+            succs.append([labels[x.args[0]]])
+        elif x.op == 'jump_if_false':
+            succs.append([i + 1, labels[x.args[1]]])
+        elif x.op == 'return' or i + 1 == n:
+            succs.append([])
+        else:
+            succs.append([i + 1])
+
+    uses = [set(x.uses()) for x in instrs]
+    live_in = [set() for _ in instrs]
+    live_out = [set() for _ in instrs]
+
+    changed = True
+    while changed:
+        changed = False
+        for i in range(n - 1, -1, -1):
+            out = set()
+            for s in succs[i]:
+                out |= live_in[s]
+            dst = instrs[i].dst
+            new_in = uses[i] | (out - {dst} if dst else out)
+            if out != live_out[i] or new_in != live_in[i]:
+                live_out[i], live_in[i] = out, new_in
+                changed = True
+    return live_in, live_out
@@ -0,0 +1,238 @@
+"""
+Multi-file compile driver: scans, parses and checks (NodeVisitor) every
+Mini-C file given, directories being searched for *.c files, across a
+process pool.
+
+    python -m minic.driver src/ tests/data/*.c --jobs 8
+    python -m minic.driver examples --json
+
+Files are sent to the workers in chunks, results come back in input order
+so the diagnostics are the same from one run to the other whatever the
+scheduling. A worker only returns diagnostics and timings, the AST is
+sent back (in the minic.binary encoding) with compile_files(keep_ast=True)
+only. The exit status is 1 when any file has a diagnostic.
+
+    python -m minic.driver src/ --profile --collapsed parse.folded
+
+--profile checks the files in this process and reports where the time
+and memory go, see minic.profiling. With --max-errors N the parser
+recovers from syntax and lexical errors and reports up to N of them per
+file (the semantic check is skipped for those files).
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import minic.node as nd
+from minic import binary
+from minic.exceptions import SemanticError, SyntaxError
+from minic.nodevisitor import NodeVisitor
+from minic.profiling import PHASES, Meter, Profile
+from minic.scanner import FileScanner, LexicalError, ReplayScanner, Token, TokenStream
+
+
+@dataclass(slots=True)
+class Diagnostic:
+    path: str
+    linum: Optional[int]
+    kind: str  # syntax, semantic or error
+    message: str
+    code: Optional[str] = None  # SyntaxError/SemanticError code
+
+    def __str__(self):
+        where = self.path if self.linum is None else f"{self.path}:{self.linum}"
+        return f"{where}: {self.kind}: {self.message}"
+
+
+@dataclass(slots=True)
+class FileResult:
+    path: str
+    tokens: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    ast: Optional[bytes] = None  # binary encoded, with keep_ast only
+
+    @property
+    def ok(self) -> bool:
+        return not self.diagnostics
+
+    def program(self) -> nd.Program:
+        return binary.loads(self.ast)
+
+
+def diagnostic(path: str, ex: Exception) -> Diagnostic:
+    if isinstance(ex, SyntaxError):
+        return Diagnostic(path, ex.token.linum, 'syntax', ex.summary, ex.code)
+    if isinstance(ex, SemanticError):
+        return Diagnostic(path, ex.node.linum, 'semantic', ex.message, ex.code)
+    if isinstance(ex, LexicalError):
+        return Diagnostic(path, ex.linum, 'syntax', str(ex), 'lexical')
+    return Diagnostic(path, None, 'error', str(ex))
+
+
+_METER = Meter()
+
+
+def _scan(scan: FileScanner, errors: bool) -> Tuple[List[Token], Optional[LexicalError]]:
+    """Tokens of scan, up to its first LexicalError (without errors) and that error"""
+    tokens = []
+    try:
+        tokens.extend(TokenStream(scan, errors=errors))
+    except LexicalError as ex:
+        return tokens, ex
+    return tokens, None
+
+
+def compile_file(path: str, keep_ast=False, profile: Profile = None, max_errors=0) -> FileResult:
+    """
+    Scan, parse and check one file, errors end up in the diagnostics.
+    With max_errors, the parse goes on after a syntax or lexical error (the
+    bad lexeme is scanned as a TokenType.ERROR token), up to that many.
+    Without, the file is scanned up to its first lexical error, which is
+    only reported when the parse gets that far: the first error is the one
+    of a parse scanning as it goes.
+    """
+    res = FileResult(path)
+    meter = profile or _METER
+    try:
+        with meter.phase('scan', res.timings):
+            with FileScanner(path) as scan:
+                tokens, lexical = _scan(scan, max_errors > 0)
+        res.tokens = len(tokens)
+        meter.scanned(tokens)
+
+        with meter.phase('parse', res.timings):
+            parser = meter.parser(ReplayScanner(tokens, scan), recover=max_errors > 0, max_errors=max_errors)
+            try:
+                ast = parser.start()
+            except Exception:
+                if lexical is None or parser.ct is not None:
+                    raise  # failed before the bad lexeme
+            if lexical is not None:
+                raise lexical
+        meter.parsed(ast)
+        if parser.errors:
+            res.diagnostics += [diagnostic(path, x) for x in parser.errors]
+            return res
+
+        with meter.phase('check', res.timings):
+            NodeVisitor(ast).start()
+    except Exception as ex:
+        res.diagnostics.append(diagnostic(path, ex))
+        return res
+
+    if keep_ast:
+        res.ast = binary.dumps(ast)
+    return res
+
+
+def _compile(args):
+    return compile_file(*args)
+
+
+def find_files(paths: Iterable[str], suffix='.c') -> List[str]:
+    """Files in paths, directories are searched for suffix files in sorted order"""
+    res = []
+    for path in paths:
+        if not os.path.isdir(path):
+            res.append(path)
+            continue
+        found = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            found += [os.path.join(root, x) for x in files if x.endswith(suffix)]
+        res += sorted(found)
+    return res
+
+
+def compile_files(paths: List[str], jobs: int = None, chunksize: int = None,
+                  keep_ast=False, max_errors=0) -> List[FileResult]:
+    """FileResult of every path, in the order of paths"""
+    jobs = jobs or os.cpu_count() or 1
+    args = [(x, keep_ast, None, max_errors) for x in paths]
+    if jobs == 1 or len(paths) < 2:
+        return [_compile(x) for x in args]
+
+    # a few chunks per worker, so a slow chunk does not hold the others back
+    chunksize = chunksize or max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(jobs) as pool:
+        return list(pool.map(_compile, args, chunksize=chunksize))
+
+
+def profile_files(paths: List[str], memory=True, max_errors=0) -> Tuple[List[FileResult], Profile]:
+    """compile_file every path in this process, under one Profile"""
+    profile = Profile(memory)
+    with profile:
+        results = [compile_file(x, profile=profile, max_errors=max_errors) for x in paths]
+    return results, profile
+
+
+def report(results: List[FileResult], wall: float) -> Dict:
+    totals = {x: sum(r.timings.get(x, 0.0) for r in results) for x in PHASES}
+    return {
+        'files': len(results),
+        'failed': sum(not x.ok for x in results),
+        'tokens': sum(x.tokens for x in results),
+        'wall': wall,
+        'phases': totals,
+        'results': [
+            {'path': x.path, 'tokens': x.tokens, 'timings': x.timings,
+             'diagnostics': [asdict(d) for d in x.diagnostics]}
+            for x in results
+        ],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check many Mini-C files in parallel")
+    parser.add_argument('paths', nargs='+', help="files, or directories searched for *.c files")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes, all cores by default")
+    parser.add_argument('--chunksize', type=int, default=None, help="files sent to a worker at once")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--max-errors', type=int, default=0, metavar='N',
+                        help="recover from syntax errors, report up to N per file")
+    parser.add_argument('--profile', action='store_true', help="profile the phases and parser in this process")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="profile without tracemalloc")
+    parser.add_argument('--collapsed', metavar='FILE', help="write the profile call stacks to FILE, implies --profile")
+    args = parser.parse_args(argv)
+
+    paths = find_files(args.paths)
+    profile = None
+    start = time.perf_counter()
+    if args.profile or args.collapsed:
+        results, profile = profile_files(paths, args.memory, args.max_errors)
+    else:
+        results = compile_files(paths, args.jobs, args.chunksize, max_errors=args.max_errors)
+    wall = time.perf_counter() - start
+
+    if args.collapsed:
+        profile.write_collapsed(args.collapsed)
+
+    if args.json:
+        res = report(results, wall)
+        if profile:
+            res['profile'] = profile.to_dict()
+        print(json.dumps(res, indent=2))
+    else:
+        for res in results:
+            times = ', '.join(f"{x} {res.timings[x] * 1000:.1f}ms" for x in PHASES if x in res.timings)
+            print(f"{res.path}: {'ok' if res.ok else 'FAILED'} ({times})")
+            for d in res.diagnostics:
+                print(f"  {d}")
+        failed = sum(not x.ok for x in results)
+        print(f"{len(results)} files, {failed} failed in {wall:.3f}s", file=sys.stderr)
+        if profile:
+            print()
+            print(profile.table())
+
+    return 1 if any(not x.ok for x in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,3 @@
 from minic.exceptions.syntax_error import SyntaxError
 from minic.exceptions.semantic_error import SemanticError
+from minic.exceptions.render import render
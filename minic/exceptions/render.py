@@ -0,0 +1,51 @@
+"""
+Display text of errors. A SyntaxError shows the lines around its token:
+
+    message, [linum:filename]
+    linum - 1: ...
+    linum    : ...
+    linum + 1: ...
+
+render() displays many errors at once, every source line is read from its
+scanner once however many excerpts show it.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+from minic.exceptions.syntax_error import SyntaxError
+
+SURROUND = 1  # lines shown before and after the error line
+
+
+def _excerpt(scanner, linum: int, cache: Dict[Tuple[int, int], str]) -> str:
+    count = scanner.line_count()
+    x, y = max(linum - SURROUND - 1, 0), min(linum + SURROUND, count)
+
+    width = len(str(y))
+    text = []
+    for i in range(x + 1, y + 1):
+        key = (id(scanner), i)
+        line = cache.get(key)
+        if line is None:
+            line = cache[key] = scanner.line(i)
+        text.append(f"{i: >{width}}: {line}")
+    return ''.join(text)
+
+
+def render(errors: Iterable[Exception]) -> List[str]:
+    """str() of every error"""
+    cache: Dict[Tuple[int, int], str] = {}
+    res = []
+    for error in errors:
+        if not isinstance(error, SyntaxError):
+            res.append(str(error))
+            continue
+
+        linum = error.token.linum
+        scanner = error.scanner
+        res.append("{}, [{}:{}]\n{}".format(
+            error.summary,
+            linum,
+            scanner.filename,
+            _excerpt(scanner, linum, cache),
+        ))
+    return res
@@ -1,14 +1,21 @@
-from minic.scanner import Scanner, Token
-
 class SemanticError(Exception):
-    """Semantically error exception."""
-    def __init__(self, node, scope, message, errors=None):
-        self.message = message
+    """Semantically error exception, its message is formatted when displayed."""
+    def __init__(self, node, scope, message, errors=None, code='semantic', **fields):
+        super(SemanticError, self).__init__(message)
+        self.template = message
+        self.fields = fields
+        self.code = code
         self.node = node
         self.scope = scope
         self.errors = errors
-        super(SemanticError, self).__init__(self.getMessage())
 
+    @property
+    def message(self) -> str:
+        return self.template.format(**self.fields) if self.fields else self.template
+
+    @message.setter
+    def message(self, message):
+        self.template, self.fields = message, {}
 
     def getMessage(self):
         return "{}, [{}:{}]".format(
@@ -16,3 +23,6 @@ class SemanticError(Exception):
             self.node.linum,
             self.scope.name
         )
+
+    def __str__(self):
+        return self.getMessage()
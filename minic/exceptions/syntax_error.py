@@ -1,14 +1,46 @@
+from typing import Tuple
+
 from minic.scanner import Scanner, Token
 
+class _Summary:
+    """args[0] of a SyntaxError, its summary formatted when shown"""
+    __slots__ = ['error']
+
+    def __init__(self, error):
+        self.error = error
+
+    def __str__(self):
+        return self.error.summary
+
+    def __repr__(self):
+        return repr(self.error.summary)
+
 class SyntaxError(Exception):
-    """Syntactically error exception."""
-    def __init__(self, scanner: Scanner, token: Token, message, errors=None):
-        self._message = message
+    """
+    Syntactically error exception. Raising one only records the code, the
+    token and the message template with its fields: the message and the
+    source excerpt are rendered when it is displayed (str(), message),
+    see minic.exceptions.render for many errors at once. `summary` is the
+    message alone, it is also what args and repr() show.
+    """
+    def __init__(self, scanner: Scanner, token: Token, message, errors=None, code='syntax', **fields):
+        super(SyntaxError, self).__init__(_Summary(self))
         self.scanner = scanner
         self.token = token
+        self.template = message
+        self.fields = fields
+        self.code = code
         self.errors = errors
 
-        super(SyntaxError, self).__init__(self.message)
+    @property
+    def span(self) -> Tuple[int, int]:
+        """First and last line of the error, tokens only know their line"""
+        return self.token.linum, self.token.linum
+
+    @property
+    def summary(self) -> str:
+        """The message alone, without location nor excerpt"""
+        return self.template.format(**self.fields) if self.fields else self.template
 
     @property
     def message(self):
@@ -16,14 +48,11 @@ class SyntaxError(Exception):
 
     @message.setter
     def message(self, message):
-        """Generate new message with code block for the exception"""
-        self._message = message
-        super(SyntaxError, self).__init__(self.message)
+        self.template, self.fields = message, {}
 
     def getMessage(self):
-        return "{}, [{}:{}]\n{}".format(
-            self._message,
-            self.token.linum,
-            self.scanner.filename,
-            self.scanner.spit(self.token.linum, 1),
-        )
+        from minic.exceptions.render import render
+        return render([self])[0]
+
+    def __str__(self):
+        return self.getMessage()
@@ -0,0 +1,178 @@
+"""
+Incremental reparsing of an edited source, for editor integrations.
+
+IncrementalParser keeps the text, the top level declarations and the
+character span of each. An edit (offset, removed length, inserted text)
+relexes only the declarations it touches and parses them again; the
+declarations around them are reused as they are.
+
+    inc = IncrementalParser(text)
+    changed = inc.edit(120, 1, "+")
+    nodes = [inc.declaration(i) for i in changed]
+
+A declaration ends at its ';' or at the '}' closing its body and the
+parser never looks past that, so a region parsing into whole declarations
+gives what a full parse would. When it does not (a '}' was deleted, ...)
+the region grows one declaration to the right until it does, or becomes
+the whole rest of the file.
+
+`program` equals a full parse of the new text. When the edit changes the
+number of lines, the declarations after it are not touched: each keeps
+the lines it has moved by since it was parsed, and the move is only
+applied when the declaration is read, by `declaration` or `program`, to
+a copy (kept until the next move). An edit therefore costs the
+declarations it parses, wherever it is. The nodes of the Programs
+returned before never change.
+"""
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+import minic.node as nd
+from minic.arena import AstArena, Kind
+from minic.parser import Parser
+from minic.scanner import ReplayScanner, SourceScanner, Token
+
+# kinds without a line, or that the parser always gives line 1: never moved
+FIXED_LINE = frozenset([
+    Kind.Program, Kind.VarDecl, Kind.IfOp, Kind.AssignmentOp,
+    Kind.Block, Kind.Str, Kind.ForHeader,
+])
+
+
+def _lex(text: str, linum=1) -> Tuple[List[Token], List[int], List[int]]:
+    """Tokens of text starting at line linum, with their start and end offsets"""
+    with SourceScanner(text, engine='regex') as scan:
+        buf = scan.token_buffer()
+
+    tokens = [buf[i] for i in range(len(buf))]
+    if linum != 1:
+        for token in tokens:
+            token.linum += linum - 1
+    return tokens, buf.starts.tolist(), buf.ends.tolist()
+
+
+def _parse(tokens: List[Token]) -> Tuple[List[nd.Node], List[int]]:
+    """Declarations in tokens and the index of the first token of each"""
+    index = {id(x): i for i, x in enumerate(tokens)}
+    parser = Parser(ReplayScanner(tokens))
+    parser.ct = parser.tokens.next()
+
+    decls, firsts = [], []
+    while parser.ct is not None:
+        firsts.append(index[id(parser.ct)])
+        decls.append(parser.declaration())
+    return decls, firsts
+
+
+def _spans(firsts: List[int], starts: List[int], ends: List[int], offset=0):
+    """Start and end offsets of the declarations beginning at the firsts tokens"""
+    lasts = [x - 1 for x in firsts[1:]] + [len(starts) - 1]
+    return [starts[i] + offset for i in firsts], [ends[i] + offset for i in lasts]
+
+
+def shifted(node: nd.Node, lines: int) -> nd.Node:
+    """Copy of node with every line number below it moved by `lines`"""
+    arena = AstArena.from_tree(node)
+    kinds, linums = arena.kinds, arena.linums
+    for i in range(len(arena)):
+        if kinds[i] not in FIXED_LINE:
+            linums[i] += lines
+    return arena.to_tree()
+
+
+class IncrementalParser:
+    def __init__(self, text: str, filename='<string>'):
+        self.filename = filename
+        self.text = text
+        self.decls: List[nd.Node] = None  # as parsed, never changed
+        self.lines: List[int] = []  # lines each declaration moved by since
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self._moved: List[Optional[Tuple[int, nd.Node]]] = []  # (lines, copy)
+        self.reparsed = 0  # declarations parsed by the last edit
+        self._reset(text)
+
+    @property
+    def program(self) -> nd.Program:
+        return nd.Program(1, [self.declaration(i) for i in range(len(self.decls))])
+
+    def declaration(self, i: int) -> nd.Node:
+        """Top level declaration i, with the lines it moved by applied"""
+        node, lines = self.decls[i], self.lines[i]
+        if not lines:
+            return node
+
+        moved = self._moved[i]
+        if moved is None or moved[0] != lines:
+            moved = self._moved[i] = (lines, shifted(node, lines))
+        return moved[1]
+
+    def edit(self, offset: int, removed: int, inserted: str) -> range:
+        """Replace `removed` characters at offset by inserted, return the declarations parsed again"""
+        old = self.text
+        if not 0 <= offset <= offset + removed <= len(old):
+            raise ValueError(f"Edit {offset}:{offset + removed} outside of the text (0:{len(old)})")
+
+        text = old[:offset] + inserted + old[offset + removed:]
+        if not self.decls:
+            return self._reset(text)
+
+        starts, ends = self.starts, self.ends
+        delta = len(inserted) - removed
+
+        def moved(pos):
+            """Offset in the new text of pos, an offset in the old one"""
+            if pos <= offset:
+                return pos
+            return max(pos + delta, offset + len(inserted))
+
+        # declarations the edit touches, or the two around it
+        lo = bisect_left(ends, offset)
+        hi = bisect_right(starts, offset + removed) - 1
+        if lo > hi:
+            lo, hi = hi, lo
+        lo, hi = max(lo, 0), min(hi, len(starts) - 1)
+
+        start = min(offset, starts[lo])
+        linum = text.count('\n', 0, start) + 1
+        while True:
+            end = max(offset + len(inserted), moved(ends[hi]))
+            try:
+                tokens, tstarts, tends = _lex(text[start:end], linum)
+                decls, firsts = _parse(tokens)
+                break
+            except Exception:
+                if hi + 1 == len(starts):
+                    return self._reset(text)
+                hi += 1
+
+        lines = inserted.count('\n') - old.count('\n', offset, offset + removed)
+        new_starts, new_ends = _spans(firsts, tstarts, tends, start)
+        self.decls = self.decls[:lo] + decls + self.decls[hi + 1:]
+        self.lines = self.lines[:lo] + [0] * len(decls) + [x + lines for x in self.lines[hi + 1:]]
+        self._moved = self._moved[:lo] + [None] * len(decls) + self._moved[hi + 1:]
+        self.starts = starts[:lo] + new_starts + [x + delta for x in starts[hi + 1:]]
+        self.ends = ends[:lo] + new_ends + [x + delta for x in ends[hi + 1:]]
+        self.text = text
+        self.reparsed = len(decls)
+        return range(lo, lo + len(decls))
+
+    def _reset(self, text: str) -> range:
+        """Parse the whole text"""
+        self.text = text
+        try:
+            tokens, starts, ends = _lex(text)
+            self.decls, firsts = _parse(tokens)
+        except Exception:
+            # the next edit starts over, the error is the one of a full parse
+            self.decls = None
+            with SourceScanner(text, self.filename, engine='regex') as scan:
+                Parser(scan).start()
+            raise
+
+        self.starts, self.ends = _spans(firsts, starts, ends)
+        self.lines = [0] * len(self.decls)
+        self._moved = [None] * len(self.decls)
+        self.reparsed = len(self.decls)
+        return range(len(self.decls))
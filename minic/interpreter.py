@@ -0,0 +1,314 @@
+from __future__ import annotations
+import operator
+from typing import Callable, Dict, List
+
+import minic.node as nd
+from minic.resolver import SlotResolver
+
+# Statement executors return None to fall through, BREAK, or a 1-tuple
+# holding the value of a return statement.
+BREAK = object()
+NO_VALUE = (None,)
+
+
+def c_div(a: int, b: int) -> int:
+    """C integer division, truncating toward zero"""
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': c_div,
+    '<': lambda a, b: 1 if a < b else 0,
+    '>': lambda a, b: 1 if a > b else 0,
+    '<=': lambda a, b: 1 if a <= b else 0,
+    '>=': lambda a, b: 1 if a >= b else 0,
+    '==': lambda a, b: 1 if a == b else 0,
+    '!=': lambda a, b: 1 if a != b else 0,
+}
+# longer operator chains run from a loop instead of nested closures, every
+# closure level costs a python frame
+CHAIN = 16
+
+
+class Function:
+    def __init__(self, node: nd.FuncDecl):
+        self.node = node
+        self.name = node.name
+        self.arity = 0
+        self.nlocals = 0
+        self.body: Callable = None
+
+    def __repr__(self):
+        return f"<Function {self.name}/{self.arity}>"
+
+
+class Interpreter(SlotResolver):
+    """
+    Runs an nd.Program. A resolution pass walks the tree once, binds every
+    nd.Var to a frame slot through the SymbolTable, and turns each node
+    into a closure. Running a program only calls those closures, so no
+    name is looked up while executing.
+
+        interp = Interpreter(ast)
+        interp.run('main', 0)
+        interp.get_global('result')
+    """
+    def __init__(self, root: nd.Program):
+        super().__init__()
+        self.root = root
+        self.globals: List[int] = []
+        self.functions: Dict[str, Function] = {}
+        self._resolve()
+
+    def run(self, name='main', *args):
+        func = self.functions.get(name)
+        if func is None:
+            raise NameError(f"Function '{name}' is not defined")
+
+        if len(args) != func.arity:
+            raise TypeError(f"'{name}' expects {func.arity} arguments, got {len(args)}")
+
+        frame = [0] * func.nlocals
+        frame[:len(args)] = args
+        res = func.body(frame)
+        return res[0] if type(res) is tuple else None
+
+    def get_global(self, name: str) -> int:
+        return self.globals[self.global_slots[name]]
+
+    def set_global(self, name: str, value: int):
+        self.globals[self.global_slots[name]] = value
+
+    # resolution
+    def _resolve(self):
+        for decl in self.root.declarations:
+            if isinstance(decl, nd.VarDecl):
+                self.declare(decl)
+            else:
+                self._function(decl)
+
+        # in place, closures already hold this list
+        self.globals.extend([0] * len(self.global_slots))
+
+    def _function(self, node: nd.FuncDecl):
+        func = Function(node)
+        self.functions[node.name] = func
+
+        func.arity = len(self.enter_function(node).params)
+        func.body = self._block(node.body or [])
+        func.nlocals = self.leave_function()
+
+    # statements
+    def _block(self, stmts: List) -> Callable:
+        run = [self._stmt(x) for x in stmts]
+        run = [x for x in run if x is not None]
+
+        if len(run) == 0:
+            return lambda f: None
+        if len(run) == 1:
+            return run[0]
+
+        def block(f):
+            for stmt in run:
+                res = stmt(f)
+                if res is not None:
+                    return res
+        return block
+
+    def _stmt(self, node) -> Callable:
+        if isinstance(node, list):
+            return self._block(node)
+
+        if isinstance(node, nd.VarDecl):
+            self.declare(node)
+            return None
+
+        if isinstance(node, nd.IfOp):
+            return self._if(node)
+        if isinstance(node, nd.WhileLoop):
+            return self._while(node)
+        if isinstance(node, nd.ForLoop):
+            return self._for(node)
+        if isinstance(node, nd.JumpStmt):
+            return self._jump(node)
+
+        if isinstance(node, nd.Node):
+            exp = self._exp(node)
+            def exp_stmt(f):
+                exp(f)
+            return exp_stmt
+
+        raise self.error(node, f"Unsupported statement {node!r}")
+
+    def _if(self, node: nd.IfOp) -> Callable:
+        cond = self._exp(node.condition)
+        body = self._block(node.body)
+        else_body = self._block(node.else_body)
+
+        def if_stmt(f):
+            if cond(f):
+                return body(f)
+            return else_body(f)
+        return if_stmt
+
+    def _loop_body(self, stmts) -> Callable:
+        self.loops += 1
+        body = self._block(stmts)
+        self.loops -= 1
+        return body
+
+    def _while(self, node: nd.WhileLoop) -> Callable:
+        cond = self._exp(node.condition)
+        body = self._loop_body(node.body)
+
+        def while_stmt(f):
+            while cond(f):
+                res = body(f)
+                if res is not None:
+                    return None if res is BREAK else res
+        return while_stmt
+
+    def _for(self, node: nd.ForLoop) -> Callable:
+        header = node.header
+        nothing = lambda f: 1
+        first = self._exp(header.first) if header.first is not None else nothing
+        cond = self._exp(header.second) if header.second is not None else nothing
+        step = self._exp(header.third) if header.third is not None else nothing
+        body = self._loop_body(node.body)
+
+        def for_stmt(f):
+            first(f)
+            while cond(f):
+                res = body(f)
+                if res is not None:
+                    return None if res is BREAK else res
+                step(f)
+        return for_stmt
+
+    def _jump(self, node: nd.JumpStmt) -> Callable:
+        self.jump(node)
+        if node.keyword == 'break':
+            return lambda f: BREAK
+
+        if node.value is None:
+            return lambda f: NO_VALUE
+
+        value = self._exp(node.value)
+        return lambda f: (value(f),)
+
+    # expressions
+    def _exp(self, node) -> Callable:
+        if isinstance(node, nd.Num):
+            value = node.value
+            return lambda f: value
+        if isinstance(node, nd.Var):
+            return self._var(node)
+        if isinstance(node, (nd.BinOp, nd.RelOp)):
+            return self._binop(node)
+        if isinstance(node, nd.AssignmentOp):
+            return self._assign(node)
+        if isinstance(node, nd.CallFuncOp):
+            return self._call(node)
+
+        raise self.error(node, f"Unsupported expression {node!r}")
+
+    def _var(self, node: nd.Var) -> Callable:
+        symbol = self.variable(node)
+        slot = symbol.slot
+        if symbol.is_global:
+            g = self.globals
+            return lambda f: g[slot]
+        return lambda f: f[slot]
+
+    def _assign(self, node: nd.AssignmentOp) -> Callable:
+        symbol = self.variable(node.target)
+        slot = symbol.slot
+        value = self._exp(node.value)
+
+        if symbol.is_global:
+            g = self.globals
+            def assign_global(f):
+                g[slot] = res = value(f)
+                return res
+            return assign_global
+
+        def assign(f):
+            f[slot] = res = value(f)
+            return res
+        return assign
+
+    def _binop(self, node) -> Callable:
+        # the left spine of a chain is walked from an explicit stack
+        spine = []
+        while isinstance(node, (nd.BinOp, nd.RelOp)):
+            spine.append(node)
+            node = node.left
+        spine.reverse()
+
+        first = self._exp(node)
+        if len(spine) <= CHAIN:
+            res = first
+            for x in spine:
+                res = self._binary(x, res, self._exp(x.right))
+            return res
+
+        steps = []
+        for x in spine:
+            op = OPERATORS.get(x.operator)
+            if op is None:
+                raise self.error(x, f"Unknown operator '{x.operator}'")
+            steps.append((op, self._exp(x.right)))
+
+        def chain(f):
+            res = first(f)
+            for op, r in steps:
+                res = op(res, r(f))
+            return res
+        return chain
+
+    def _binary(self, node, l: Callable, r: Callable) -> Callable:
+        op = node.operator
+
+        if op == '+':
+            return lambda f: l(f) + r(f)
+        if op == '-':
+            return lambda f: l(f) - r(f)
+        if op == '*':
+            return lambda f: l(f) * r(f)
+        if op == '/':
+            return lambda f: c_div(l(f), r(f))
+        if op == '<':
+            return lambda f: 1 if l(f) < r(f) else 0
+        if op == '>':
+            return lambda f: 1 if l(f) > r(f) else 0
+        if op == '<=':
+            return lambda f: 1 if l(f) <= r(f) else 0
+        if op == '>=':
+            return lambda f: 1 if l(f) >= r(f) else 0
+        if op == '==':
+            return lambda f: 1 if l(f) == r(f) else 0
+        if op == '!=':
+            return lambda f: 1 if l(f) != r(f) else 0
+
+        raise self.error(node, f"Unknown operator '{op}'")
+
+    def _call(self, node: nd.CallFuncOp) -> Callable:
+        self.function(node)
+        args = [self._exp(x) for x in node.args or []]
+
+        # looked up once, body is filled even for a recursive call
+        func = self.functions[node.name]
+        nargs = len(args)
+
+        def call(f):
+            frame = [0] * func.nlocals
+            for i in range(nargs):
+                frame[i] = args[i](f)
+            res = func.body(frame)
+            return res[0] if type(res) is tuple else None
+        return call
+
@@ -0,0 +1,367 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+import minic.node as nd
+from minic.interpreter import c_div
+from minic.resolver import SlotResolver
+
+# An operand is an int constant or a virtual register name. Mini-C locals
+# keep their (letters only) name, temporaries are t1, t2 ... so they
+# never clash.
+Operand = Union[int, str]
+
+ARITHMETIC = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div'}
+RELATIONAL = {'<': 'lt', '>': 'gt', '<=': 'le', '>=': 'ge', '==': 'eq', '!=': 'ne'}
+BINARY = {**ARITHMETIC, **RELATIONAL}
+
+
+
+def int32(value: int) -> int:
+    """value as a 32-bit C int, wrapping like the x86 backend"""
+    return ((value + 2147483648) & 4294967295) - 2147483648
+
+
+def _c_int(op):
+    """op on 32-bit C ints: operands and result wrap"""
+    return lambda a, b: int32(op(int32(a), int32(b)))
+
+
+# int semantics of the binary instructions, shared by folding and execution
+EVAL = {
+    'add': _c_int(lambda a, b: a + b),
+    'sub': _c_int(lambda a, b: a - b),
+    'mul': _c_int(lambda a, b: a * b),
+    'div': _c_int(c_div),
+    'lt': _c_int(lambda a, b: 1 if a < b else 0),
+    'gt': _c_int(lambda a, b: 1 if a > b else 0),
+    'le': _c_int(lambda a, b: 1 if a <= b else 0),
+    'ge': _c_int(lambda a, b: 1 if a >= b else 0),
+    'eq': _c_int(lambda a, b: 1 if a == b else 0),
+    'ne': _c_int(lambda a, b: 1 if a != b else 0),
+}
+
+
+def is_register(x: Operand) -> bool:
+    return isinstance(x, str)
+
+
+def is_temp(x: Operand) -> bool:
+    return isinstance(x, str) and x[-1].isdigit()
+
+
+@dataclass(slots=True)
+class Instr:
+    """
+    Three-address instruction, `dst = op args`:
+
+    * copy    dst = a
+    * add ... dst = a op b, one of ARITHMETIC/RELATIONAL values
+    * load    dst = global name a
+    * store   global name a = b
+    * call    dst = a(args[1:])
+    * label   a:
+    * jump    goto a
+    * jump_if_false  if not a goto b
+    * return  return a, args is empty for a void return
+    """
+    op: str
+    dst: Optional[str] = None
+    args: tuple = ()
+
+    def operands(self) -> range:
+        """Positions in args holding operands, the rest are names/labels"""
+        if self.op in ('load', 'label', 'jump'):
+            return range(0)
+        if self.op in ('store', 'call'):
+            return range(1, len(self.args))
+        if self.op == 'jump_if_false':
+            return range(1)
+        return range(len(self.args))
+
+    def uses(self) -> List[str]:
+        """Virtual registers read by the instruction"""
+        return [self.args[i] for i in self.operands() if is_register(self.args[i])]
+
+    def replace_uses(self, values: Dict[str, Operand]) -> int:
+        """Replace the registers read through values, return the count"""
+        args, count = list(self.args), 0
+        for i in self.operands():
+            if is_register(args[i]) and args[i] in values:
+                args[i] = values[args[i]]
+                count += 1
+        if count:
+            self.args = tuple(args)
+        return count
+
+    def __str__(self):
+        op, dst, args = self.op, self.dst, self.args
+        if op == 'label':
+            return f"{args[0]}:"
+        if op == 'copy':
+            return f"    {dst} = {args[0]}"
+        if op == 'call':
+            call = f"call {args[0]}({', '.join(str(x) for x in args[1:])})"
+            return f"    {dst} = {call}" if dst else f"    {call}"
+        if op == 'store':
+            return f"    store {args[0]}, {args[1]}"
+        body = f"{op} {', '.join(str(x) for x in args)}".rstrip()
+        return f"    {dst} = {body}" if dst else f"    {body}"
+
+
+@dataclass
+class Function:
+    name: str
+    params: List[str]
+    instrs: List[Instr] = field(default_factory=list)
+
+    def __str__(self):
+        lines = [f"function {self.name}({', '.join(self.params)})"]
+        return "\n".join(lines + [str(x) for x in self.instrs])
+
+
+@dataclass
+class Program:
+    globals: List[str] = field(default_factory=list)
+    functions: List[Function] = field(default_factory=list)
+
+    def function(self, name: str) -> Function:
+        return next(x for x in self.functions if x.name == name)
+
+    def __str__(self):
+        lines = [f"global {x}" for x in self.globals]
+        return "\n\n".join(["\n".join(lines)] + [str(x) for x in self.functions]).strip()
+
+
+class IRBuilder(SlotResolver):
+    """
+    Lowers an nd.Program to three-address code, checking names through the
+    same SlotResolver as the other backends. Locals are zeroed at the
+    function entry, like the frames of the interpreter.
+
+        program = IRBuilder(ast).build()
+    """
+    def __init__(self, root: nd.Program):
+        super().__init__()
+        self.root = root
+        self.program = Program()
+        self.instrs: List[Instr] = None
+        self._temps = 0
+        self._labels = 0
+        self._breaks: List[str] = []
+
+    def build(self) -> Program:
+        for decl in self.root.declarations:
+            if isinstance(decl, nd.VarDecl):
+                self.declare(decl)
+                self.program.globals.append(decl.name)
+            else:
+                self._function(decl)
+        return self.program
+
+    def temp(self) -> str:
+        self._temps += 1
+        return f"t{self._temps}"
+
+    def label(self) -> str:
+        self._labels += 1
+        return f"L{self._labels}"
+
+    def emit(self, op: str, dst=None, *args) -> Instr:
+        instr = Instr(op, dst, args)
+        self.instrs.append(instr)
+        return instr
+
+    def _function(self, node: nd.FuncDecl):
+        self.instrs, self._temps, self._labels = [], 0, 0
+        params = [x.name for x in self.enter_function(node).params]
+        self._block(node.body or [])
+        self.emit('return')
+
+        zeroed = [Instr('copy', x, (0,)) for x in list(self.local_slots)[len(params):]]
+        self.program.functions.append(Function(node.name, params, zeroed + self.instrs))
+        self.leave_function()
+
+    # statements
+    def _block(self, stmts: List):
+        for stmt in stmts:
+            self._stmt(stmt)
+
+    def _stmt(self, node):
+        if isinstance(node, list):
+            self._block(node)
+        elif isinstance(node, nd.VarDecl):
+            self.declare(node)
+        elif isinstance(node, nd.IfOp):
+            self._if(node)
+        elif isinstance(node, nd.WhileLoop):
+            self._loop(node.condition, node.body)
+        elif isinstance(node, nd.ForLoop):
+            header = node.header
+            if header.first is not None:
+                self._exp(header.first)
+            self._loop(header.second, node.body, header.third)
+        elif isinstance(node, nd.JumpStmt):
+            self._jump(node)
+        elif isinstance(node, nd.Node):
+            self._exp(node)
+        else:
+            raise self.error(node, f"Unsupported statement {node!r}")
+
+    def _if(self, node: nd.IfOp):
+        else_label, end = self.label(), self.label()
+        self.emit('jump_if_false', None, self._exp(node.condition), else_label)
+        self._block(node.body)
+        if node.else_body:
+            self.emit('jump', None, end)
+            self.emit('label', None, else_label)
+            self._block(node.else_body)
+            self.emit('label', None, end)
+        else:
+            self.emit('label', None, else_label)
+
+    def _loop(self, cond, body, step=None):
+        top, end = self.label(), self.label()
+        self.emit('label', None, top)
+        if cond is not None:
+            self.emit('jump_if_false', None, self._exp(cond), end)
+
+        self.loops += 1
+        self._breaks.append(end)
+        self._block(body)
+        self._breaks.pop()
+        self.loops -= 1
+
+        if step is not None:
+            self._exp(step)
+        self.emit('jump', None, top)
+        self.emit('label', None, end)
+
+    def _jump(self, node: nd.JumpStmt):
+        self.jump(node)
+        if node.keyword == 'break':
+            self.emit('jump', None, self._breaks[-1])
+        elif node.value is None:
+            self.emit('return')
+        else:
+            self.emit('return', None, self._exp(node.value))
+
+    # expressions
+    def _exp(self, node) -> Operand:
+        if isinstance(node, nd.Num):
+            return node.value
+
+        if isinstance(node, nd.Var):
+            symbol = self.variable(node)
+            if not symbol.is_global:
+                return symbol.name
+            dst = self.temp()
+            self.emit('load', dst, symbol.name)
+            return dst
+
+        if isinstance(node, (nd.BinOp, nd.RelOp)):
+            # the left spine of a chain is walked from an explicit stack
+            spine = []
+            while isinstance(node, (nd.BinOp, nd.RelOp)):
+                spine.append(node)
+                node = node.left
+
+            dst = self._exp(node)
+            for x in reversed(spine):
+                op = BINARY.get(x.operator)
+                if op is None:
+                    raise self.error(x, f"Unknown operator '{x.operator}'")
+                l, r = dst, self._exp(x.right)
+                dst = self.temp()
+                self.emit(op, dst, l, r)
+            return dst
+
+        if isinstance(node, nd.AssignmentOp):
+            symbol = self.variable(node.target)
+            value = self._exp(node.value)
+            if symbol.is_global:
+                self.emit('store', None, symbol.name, value)
+                return value
+
+            last = self.instrs[-1] if self.instrs else None
+            if is_temp(value) and last is not None and last.dst == value:
+                # write the result straight to the variable
+                last.dst = symbol.name
+            else:
+                self.emit('copy', symbol.name, value)
+            return symbol.name
+
+        if isinstance(node, nd.CallFuncOp):
+            self.function(node)
+            args = [self._exp(x) for x in node.args or []]
+            dst = self.temp()
+            self.emit('call', dst, node.name, *args)
+            return dst
+
+        raise self.error(node, f"Unsupported expression {node!r}")
+
+
+def build(root: nd.Program) -> Program:
+    return IRBuilder(root).build()
+
+
+class IRInterpreter:
+    """
+    Executes ir.Program directly. Slow, it exists to check the optimizer
+    keeps the meaning of a program and to count `executed` instructions.
+
+        machine = IRInterpreter(program)
+        machine.run('power', 5), machine.executed
+    """
+    def __init__(self, program: Program):
+        self.program = program
+        self.globals: Dict[str, int] = {x: 0 for x in program.globals}
+        self.functions = {x.name: x for x in program.functions}
+        self.executed = 0
+        self._labels = {
+            x.name: {y.args[0]: i for i, y in enumerate(x.instrs) if y.op == 'label'}
+            for x in program.functions
+        }
+
+    def run(self, name='main', *args):
+        func = self.functions.get(name)
+        if func is None:
+            raise NameError(f"Function '{name}' is not defined")
+        if len(args) != len(func.params):
+            raise TypeError(f"'{name}' expects {len(func.params)} arguments, got {len(args)}")
+
+        regs = dict(zip(func.params, args))
+        value = lambda x: x if isinstance(x, int) else regs[x]
+        instrs, labels = func.instrs, self._labels[name]
+        pc = 0
+
+        while pc < len(instrs):
+            x = instrs[pc]
+            op, args = x.op, x.args
+            pc += 1
+            if op == 'label':
+                continue
+
+            self.executed += 1
+            if op == 'copy':
+                regs[x.dst] = value(args[0])
+            elif op in EVAL:
+                regs[x.dst] = EVAL[op](value(args[0]), value(args[1]))
+            elif op == 'jump':
+                pc = labels[args[0]]
+            elif op == 'jump_if_false':
+                if not value(args[0]):
+                    pc = labels[args[1]]
+            elif op == 'load':
+                regs[x.dst] = self.globals[args[0]]
+            elif op == 'store':
+                self.globals[args[0]] = value(args[1])
+            elif op == 'call':
+                res = self.run(args[0], *[value(a) for a in args[1:]])
+                if x.dst:
+                    regs[x.dst] = res
+            elif op == 'return':
+                return value(args[0]) if args else None
+            else:
+                raise ValueError(f"Unknown instruction {x}")
+        return None
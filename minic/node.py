@@ -1,15 +1,12 @@
-from typing import List, Union, Tuple
+from typing import List, Optional, Union, Tuple
 
-from dataclasses import dataclass, field
-# from pydantic.dataclasses import dataclass, field
-#
-from pydantic import StrictInt
+from dataclasses import dataclass, field, fields, is_dataclass
 from minic.symboltable import ScopedSymbolTable, VarSymbol, FunctionSymbol, TypeSymbol
 from minic.exceptions import SemanticError
 
-@dataclass
+@dataclass(slots=True)
 class Node:
-    linum: StrictInt
+    linum: int
     # op: List
 
     # def __init__(self, linum, op):
@@ -22,18 +19,18 @@ class Node:
 
         return stmt if type(stmt) == list else [stmt]
 
-@dataclass
+@dataclass(slots=True)
 class Num(Node):
-    value: StrictInt
+    value: int
 
     def __repr__(self):
         return f"Num({self.value})"
 
-@dataclass
+@dataclass(slots=True)
 class Var(Node):
     value: str
     # it can be an index or an object properties
-    prop: Union[StrictInt, str] = None
+    prop: Optional[Union[int, str]] = None
     type: str = 'variable'
 
     def __init__(self, linum, value, prop=None):
@@ -54,7 +51,7 @@ class Var(Node):
 
         return f"Var({inside})"
 
-@dataclass
+@dataclass(slots=True)
 class BinOp(Node):
     operator: str
     left: Union['BinOp', Num, Var]
@@ -68,7 +65,7 @@ class BinOp(Node):
             r=self.right
         )
 
-@dataclass
+@dataclass(slots=True)
 class RelOp(Node):
     operator: str
     left: Union['RelOp', BinOp, Num, Var]
@@ -82,7 +79,7 @@ class RelOp(Node):
             r=self.right
         )
 
-@dataclass
+@dataclass(slots=True)
 class IfOp(Node):
     condition: RelOp
     body: List
@@ -96,13 +93,13 @@ class IfOp(Node):
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ForHeader:
     first: Node = None
     second: Node = None
     third: Node = None
 
-@dataclass
+@dataclass(slots=True)
 class ForLoop(Node):
     header: ForHeader
     body: List
@@ -112,7 +109,7 @@ class ForLoop(Node):
         self.header = header
         self.body = self._stmt_to_list(body)
 
-@dataclass
+@dataclass(slots=True)
 class WhileLoop(Node):
     condition: Node
     body: List
@@ -123,32 +120,32 @@ class WhileLoop(Node):
         self.body = self._stmt_to_list(body)
 
 
-@dataclass
+@dataclass(slots=True)
 class CallFuncOp(Node):
     name: str
     args: List[Union[Num, Var, BinOp, RelOp, 'CallFuncOp']] = None
 
-@dataclass
+@dataclass(slots=True)
 class AssignmentOp(Node):
     target: str
     value: Union[RelOp, BinOp, CallFuncOp, Num]
 
-@dataclass
+@dataclass(slots=True)
 class LabeledStmt(Node):
     label: str
     value: Union[list, BinOp, RelOp, CallFuncOp, AssignmentOp, Var, Num, str] = None
 
-@dataclass
+@dataclass(slots=True)
 class JumpStmt(Node):
     keyword: str
     value: Union[BinOp, RelOp, CallFuncOp, AssignmentOp, Var, Num, str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ParamDecl(Node):
     type: str
     name: str
 
-@dataclass
+@dataclass(slots=True)
 class FuncDecl(Node):
     ret_type: str
     name: str
@@ -161,12 +158,17 @@ class FuncDecl(Node):
             ',\n\t\t'.join([str(v) for v in self.body])
         )
 
-@dataclass
+@dataclass(slots=True)
 class VarDecl(Node):
     type: str
     name: str
 
-@dataclass
+@dataclass(slots=True)
+class Error(Node):
+    """Declaration or statement skipped by an error recovering parse"""
+    message: str
+
+@dataclass(slots=True)
 class Program(Node):
     declarations: List[Union[ParamDecl, VarDecl]]
 
@@ -177,3 +179,34 @@ class Program(Node):
         )
 
 
+def validate(node):
+    """
+    Strict check of every int field in the tree (bool or str are rejected).
+    Debug only, pydantic is imported on the first call.
+    """
+    from pydantic import StrictInt, TypeAdapter
+
+    adapters = {
+        int: TypeAdapter(StrictInt),
+        Optional[Union[int, str]]: TypeAdapter(Optional[Union[StrictInt, str]]),
+    }
+
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+
+        if not is_dataclass(node):
+            continue
+
+        for f in fields(node):
+            value = getattr(node, f.name)
+            adapter = adapters.get(f.type)
+            if adapter:
+                adapter.validate_python(value, strict=True)
+            else:
+                stack.append(value)
+
+    return True
@@ -1,40 +1,103 @@
-from typing import List
+import time
+from types import GeneratorType
+from typing import Callable, Dict, List
 
 import minic.node as nd
 import minic.symboltable as symb
+from minic import trace
+from minic.arena import NONE, ArenaVisitor, Kind
 from minic.exceptions import SemanticError
 
+_DONE = object()
+
 
 # TODO: For, While, Switch
 class NodeVisitor:
-    current_scope: symb.ScopedSymbolTable
-    def __init__(self, root: nd.Node):
+    """
+    Visit methods are looked up once per node class and cached in the
+    visitor class `_dispatch` table. A visit method either does its work and
+    returns, or is a generator yielding the child nodes it wants visited;
+    visit() runs those on an explicit stack, so deep trees never recurse.
+
+    Scopes, symbols and the time spent under each node are reported to
+    `tracer` (see minic.trace), nothing is reported by default.
+    """
+    current_scope: symb.Scope
+    _dispatch: Dict[type, Callable] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+
+    def __init__(self, root: nd.Node, tracer: trace.Tracer = None):
         self.root = root
+        self.tracer = tracer or trace.NULL
+        if self.tracer.enabled:
+            self.symbols = symb.SymbolTable(self.tracer.symbol)
+            self.visit = self._visit_traced
+        else:
+            self.symbols = symb.SymbolTable()
 
     def start(self):
         self.visit(self.root)
 
+    def _handler(self, node: nd.Node) -> Callable:
+        cls = node.__class__
+        method = self._dispatch.get(cls)
+        if method is None:
+            method = getattr(type(self), "visit_" + cls.__name__)
+            self._dispatch[cls] = method
+        return method
+
     def visit(self, node: nd.Node):
-        method_name = "visit_" + node.__class__.__name__
-        method = getattr(self, method_name)
-        method(node)
+        res = self._handler(node)(self, node)
+        if not isinstance(res, GeneratorType):
+            return
+
+        stack = [res]
+        while stack:
+            child = next(stack[-1], _DONE)
+            if child is _DONE:
+                stack.pop()
+            elif child is not None:
+                res = self._handler(child)(self, child)
+                if isinstance(res, GeneratorType):
+                    stack.append(res)
+
+    def _visit_traced(self, node: nd.Node):
+        """visit() timing every node, the children of a node included"""
+        clock, report = time.perf_counter, self.tracer.node
+        start = clock()
+        res = self._handler(node)(self, node)
+        if not isinstance(res, GeneratorType):
+            report(node, clock() - start)
+            return
+
+        stack = [(res, node, start)]
+        while stack:
+            gen, parent, start = stack[-1]
+            child = next(gen, _DONE)
+            if child is _DONE:
+                stack.pop()
+                report(parent, clock() - start)
+            elif child is not None:
+                start = clock()
+                res = self._handler(child)(self, child)
+                if isinstance(res, GeneratorType):
+                    stack.append((res, child, start))
+                else:
+                    report(child, clock() - start)
 
     def visit_block(self, nodes: List[nd.Node]):
-        for x in nodes:
-            self.visit(x)
+        yield from nodes
 
     def visit_Program(self, node: nd.Program):
-        scope_name = '<global>'
-        print(f"ENTER scope: {scope_name}")
-
-        scope = symb.ScopedSymbolTable(scope_name, 1, verbose=True)
+        scope = self.symbols.enter('<global>')
         scope.init_builtin()
         self.current_scope = scope
 
-        self.visit_block(node.declarations)
-        print(scope)
-
-        print(f"LEAVING Scope: {scope_name}")
+        yield from self.visit_block(node.declarations)
+        self.current_scope = self.symbols.leave()
 
     def visit_VarDecl(self, node: nd.VarDecl):
         if self.current_scope.lookup(node.name, deep=False):
@@ -46,40 +109,42 @@ class NodeVisitor:
 
     def visit_BinOp(self, node: nd.BinOp):
         # print("Binary operation: ", node.operator);
-        self.visit(node.left)
-        self.visit(node.right)
+        yield node.left
+        yield node.right
 
     def visit_AssignmentOp(self, node: nd.AssignmentOp):
-        self.visit(node.target)
-        self.visit(node.value)
+        yield node.target
+        yield node.value
 
     def visit_RelOp(self, node: nd.RelOp):
-        self.visit(node.left)
-        self.visit(node.right)
+        yield node.left
+        yield node.right
 
     def visit_JumpStmt(self, node: nd.JumpStmt):
         # TODO do something with keyword?
-        self.visit(node.value)
+        # goto label is a plain string
+        if isinstance(node.value, nd.Node):
+            yield node.value
 
     def visit_IfOp(self, node: nd.IfOp):
         # TODO shoudl else block be directly accessed
-        self.visit(node.condition)
-        self.visit_block(node.body)
+        yield node.condition
+        yield from self.visit_block(node.body)
         # self.visit_block(node.else_body)
 
     def visit_ForHeader(self, node: nd.ForHeader):
-        self.visit(node.first)
-        self.visit(node.second)
-        self.visit(node.third)
+        yield node.first
+        yield node.second
+        yield node.third
 
     def visit_ForLoop(self, node: nd.ForLoop):
-        self.visit(node.header)
-        self.visit_block(node.body)
+        yield node.header
+        yield from self.visit_block(node.body)
         # self.visit_block(node.else_body)
 
     def visit_WhileLoop(self, node: nd.WhileLoop):
-        self.visit(node.condition)
-        self.visit_block(node.body)
+        yield node.condition
+        yield from self.visit_block(node.body)
 
 
     def visit_CallFuncOp(self, node: nd.CallFuncOp):
@@ -94,7 +159,8 @@ class NodeVisitor:
 
         # from here is guaranteed to be FuncDecl
         func: nd.FuncDecl
-        if len(func.params) != len(node.args):
+        args = node.args or []
+        if len(func.params) != len(args):
             raise SemanticError(
                 node,
                 self.current_scope,
@@ -106,8 +172,7 @@ class NodeVisitor:
             # if param.type == node.args:
             #     pass
            
-        for i, arg in enumerate(node.args):
-            self.visit(arg)
+        yield from self.visit_block(args)
 
 
     def visit_Var(self, node: nd.Var):
@@ -121,7 +186,7 @@ class NodeVisitor:
             )
 
     def visit_Num(self, node: nd.Num):
-        print("Constant: ", node.value)
+        pass
 
 
     def visit_FuncDecl(self, node: nd.FuncDecl):
@@ -129,16 +194,7 @@ class NodeVisitor:
         rettype = self.current_scope.lookup(node.ret_type)
         func = symb.FunctionSymbol(name, rettype)
         self.current_scope.insert(func)
-        print("ENTER scope:", name)
-
-        scope = symb.ScopedSymbolTable(
-            name,
-            self.current_scope.level + 1,
-            self.current_scope,
-            verbose=True
-        )
-
-        self.current_scope = scope
+        self.current_scope = self.symbols.enter(name)
 
         # registering parameter
         params = []
@@ -151,8 +207,87 @@ class NodeVisitor:
 
         func.params = params
 
-        self.visit_block(node.body)
+        yield from self.visit_block(node.body)
+        self.current_scope = self.symbols.leave()
+
+
+class ArenaNodeVisitor(ArenaVisitor):
+    """Same semantic checks as NodeVisitor, walking an AstArena by index"""
+    current_scope: symb.Scope
+
+    def _error(self, i: int, message: str):
+        # only materialize the node when there is something to report
+        return SemanticError(self.arena.to_tree(i), self.current_scope, message)
+
+    def visit_Program(self, i: int):
+        self.symbols = symb.SymbolTable()
+        scope = self.symbols.enter('<global>')
+        scope.init_builtin()
+        self.current_scope = scope
+        yield from self.generic_visit(i)
+        self.current_scope = self.symbols.leave()
+
+    def visit_VarDecl(self, i: int):
+        name = self.arena.name(i)
+        if self.current_scope.lookup(name, deep=False):
+            raise Exception(f"Symbol {name} is already declared")
+
+        int_type = self.current_scope.lookup(self.arena.op(i))
+        self.current_scope.insert(symb.VarSymbol(name, int_type))
+
+    def visit_IfOp(self, i: int):
+        # else block is skipped, same as NodeVisitor.visit_IfOp
+        arena = self.arena
+        yield arena.child(i, 0)
+        yield arena.child(i, 1)
+
+    def visit_JumpStmt(self, i: int):
+        value = self.arena.child(i, 0)
+        if value != NONE and self.arena.kinds[value] != Kind.Str:
+            yield value
+
+    def visit_CallFuncOp(self, i: int):
+        arena = self.arena
+        name = arena.name(i)
+        func = self.current_scope.lookup(name)
+        if type(func) != symb.FunctionSymbol:
+            raise self._error(i, f"'{name}' is not a function")
+
+        args = arena.child(i, 0)
+        count = arena.counts[args] if args != NONE else 0
+        if len(func.params) != count:
+            raise self._error(i, f"Parameter count at '{name}' method did not match")
+
+        yield args
+
+    def visit_Var(self, i: int):
+        name = self.arena.name(i)
+        if not self.current_scope.lookup(name):
+            raise self._error(i, f"Variable '{name}' has not been declared")
+
+    def visit_Num(self, i: int):
+        pass
+
+    def visit_FuncDecl(self, i: int):
+        arena = self.arena
+        name = arena.name(i)
+        rettype = self.current_scope.lookup(arena.op(i))
+        func = symb.FunctionSymbol(name, rettype)
+        self.current_scope.insert(func)
+
+        self.current_scope = self.symbols.enter(name)
+
+        # registering parameter
+        params = []
+        block = arena.child(i, 0)
+        first = arena.child(block, 0) if arena.counts[block] else NONE
+        if first != NONE and arena.op(first) != 'void':
+            for x in arena.child_range(block):
+                param = arena.children[x]
+                self.visit_VarDecl(param)
+                params += [self.current_scope.lookup(arena.name(param), deep=False)]
+
+        func.params = params
 
-        self.current_scope = self.current_scope.parent_scope
-        print(scope)
-        print("LEAVING scope:", name)
+        yield arena.child(i, 1)
+        self.current_scope = self.symbols.leave()
@@ -0,0 +1,214 @@
+"""
+Optimization passes over minic.ir. Each pass rewrites an ir.Function in
+place and returns how many instructions it changed or removed; Optimizer
+runs a selection of them to a fixed point and keeps the counts.
+
+    optimizer = Optimizer(['fold', 'copy_propagation', 'dead_stores'])
+    optimizer.optimize(program)
+    optimizer.report()
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List
+
+from minic import ir, ssa
+from minic.cfg import CFG, liveness
+
+# instructions without side effects, removable when the result is unused
+PURE = {'copy', 'load', *ir.EVAL}
+
+
+def _copy(x: ir.Instr, value: ir.Operand):
+    x.op, x.args = 'copy', (value,)
+
+
+def fold_constants(func: ir.Function) -> int:
+    """Evaluate instructions on constants, resolve constant branches"""
+    count = 0
+    instrs = []
+    for x in func.instrs:
+        if x.op in ir.EVAL and all(isinstance(a, int) for a in x.args):
+            a, b = x.args
+            if x.op == 'div' and ir.int32(b) == 0:
+                instrs.append(x)
+                continue
+            _copy(x, ir.EVAL[x.op](a, b))
+            count += 1
+        elif x.op == 'jump_if_false' and isinstance(x.args[0], int):
+            count += 1
+            if ir.int32(x.args[0]) != 0:
+                continue  # never taken
+            x.op, x.args = 'jump', (x.args[1],)
+        instrs.append(x)
+
+    func.instrs = instrs
+    return count
+
+
+def simplify(func: ir.Function) -> int:
+    """Algebraic identities: x + 0, x * 1, x * 0, x - x, x * 2 ..."""
+    count = 0
+    for x in func.instrs:
+        if x.op not in ir.EVAL:
+            continue
+
+        a, b = x.args
+        same = ir.is_register(a) and a == b
+        op = x.op
+        if op == 'add' and b == 0 or op == 'sub' and b == 0 or op in ('mul', 'div') and b == 1:
+            _copy(x, a)
+        elif op == 'add' and a == 0 or op == 'mul' and a == 1:
+            _copy(x, b)
+        elif op == 'mul' and (a == 0 or b == 0):
+            _copy(x, 0)
+        elif op == 'sub' and same:
+            _copy(x, 0)
+        elif op in ('eq', 'le', 'ge') and same:
+            _copy(x, 1)
+        elif op in ('ne', 'lt', 'gt') and same:
+            _copy(x, 0)
+        elif op == 'mul' and (a == 2 or b == 2):
+            reg = b if a == 2 else a
+            x.op, x.args = 'add', (reg, reg)
+        else:
+            continue
+        count += 1
+    return count
+
+
+def propagate_copies(func: ir.Function) -> int:
+    """
+    Inside each basic block, read the source of `a = b` (a register or a
+    constant) in place of a, until either of them is written again.
+    """
+    count = 0
+    cfg = CFG(func)
+    for block in cfg.blocks:
+        copies: Dict[str, ir.Operand] = {}
+        for x in block.instrs:
+            count += x.replace_uses(copies)
+            if x.dst is None:
+                continue
+
+            dst = x.dst
+            for key in [k for k, v in copies.items() if k == dst or v == dst]:
+                del copies[key]
+            if x.op == 'copy' and x.args[0] != dst:
+                copies[dst] = x.args[0]
+
+    func.instrs = cfg.instrs()
+    return count
+
+
+def remove_dead_code(func: ir.Function) -> int:
+    """
+    Drop instructions after a jump or return, up to the next label, and
+    jumps to the label right after them
+    """
+    instrs, dead = [], False
+    for x in func.instrs:
+        if x.op == 'label':
+            dead = False
+            if instrs and instrs[-1].op == 'jump' and instrs[-1].args[0] == x.args[0]:
+                instrs.pop()
+        if not dead:
+            instrs.append(x)
+        dead = dead or x.op in ('jump', 'return')
+
+    count = len(func.instrs) - len(instrs)
+    func.instrs = instrs
+    return count
+
+
+def remove_unreachable_blocks(func: ir.Function) -> int:
+    """Drop the blocks no path from the entry reaches"""
+    cfg = CFG(func)
+    reachable = cfg.reachable()
+    removed = [x for x in cfg.blocks if x.label not in reachable]
+    if not removed:
+        return 0
+
+    cfg.blocks = [x for x in cfg.blocks if x.label in reachable]
+    before = len(func.instrs)
+    func.instrs = cfg.instrs()
+    return before - len(func.instrs)
+
+
+def remove_dead_stores(func: ir.Function) -> int:
+    """Drop pure instructions whose result is never read"""
+    _, live_out = liveness(func.instrs)
+    instrs, count = [], 0
+    for i, x in enumerate(func.instrs):
+        if x.dst is not None and x.dst not in live_out[i]:
+            count += 1
+            if x.op in PURE:
+                continue
+            x.dst = None  # a call is kept for its side effects
+        instrs.append(x)
+
+    func.instrs = instrs
+    return count
+
+
+PASSES = {
+    'fold': fold_constants,
+    'simplify': simplify,
+    'copy_propagation': propagate_copies,
+    'sccp': ssa.sccp,
+    'gvn': ssa.gvn,
+    'dead_code': remove_dead_code,
+    'unreachable': remove_unreachable_blocks,
+    'dead_stores': remove_dead_stores,
+}
+
+
+def size(program: ir.Program) -> int:
+    """Instructions in program, labels excluded"""
+    return sum(1 for f in program.functions for x in f.instrs if x.op != 'label')
+
+
+class Optimizer:
+    """
+    Runs the selected passes, in PASSES order, until a round changes
+    nothing or `rounds` is reached. `stats` counts the changes of each pass.
+    """
+    def __init__(self, passes: Iterable[str] = PASSES, rounds=10):
+        passes = list(passes)
+        unknown = [x for x in passes if x not in PASSES]
+        if unknown:
+            raise ValueError(f"Unknown passes {unknown}, expected some of {list(PASSES)}")
+
+        self.passes: List[str] = [x for x in PASSES if x in passes]
+        self.max_rounds = rounds
+        self.stats: Dict[str, int] = {x: 0 for x in self.passes}
+        self.rounds = 0
+        self.before = self.after = 0
+
+    def optimize(self, program: ir.Program) -> ir.Program:
+        """Optimize program in place and return it"""
+        self.before = size(program)
+        for func in program.functions:
+            self.optimize_function(func)
+        self.after = size(program)
+        return program
+
+    def optimize_function(self, func: ir.Function):
+        for rounds in range(1, self.max_rounds + 1):
+            changed = 0
+            for name in self.passes:
+                count = PASSES[name](func)
+                self.stats[name] += count
+                changed += count
+            self.rounds = max(self.rounds, rounds)
+            if not changed:
+                break
+
+    def report(self) -> dict:
+        return {
+            'passes': dict(self.stats),
+            'rounds': self.rounds,
+            'instructions': {'before': self.before, 'after': self.after},
+        }
+
+
+def optimize(program: ir.Program, passes: Iterable[str] = PASSES) -> ir.Program:
+    return Optimizer(passes).optimize(program)
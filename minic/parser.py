@@ -1,15 +1,54 @@
 from typing import List, Tuple, Union
 
-from pydantic.dataclasses import dataclass
-
 import minic.node as nd
-from minic.scanner import FileScanner, Scanner, TokenType, Token
+from minic.scanner import FileScanner, LexicalError, Scanner, TokenStream, TokenType, Token
+from minic.scanner import SEPARATOR_TOKENS, KEYWORD_TOKENS, ID_TOKEN, CONSTANT_TOKEN, ASSIGNMENT_TOKEN
 from minic.exceptions import SyntaxError
 
+REL_POWER, ADD_POWER, MUL_POWER = 10, 20, 30
+
+# syntax errors a recovering parse collects before it gives up
+MAX_ERRORS = 100
+
+# message templates, only formatted when an error is displayed
+EXPECTING = "Expecting '{expected}', instead of '{found}'"
+EXPECTING_ID = 'Expecting an identifier instead got: {found}'
+EXPECTING_TYPE = 'Expecting a type instead got: {found}'
+
+# operator -> (binding power, node), higher power binds tighter
+BINARY_OPERATORS = {
+    '<': (REL_POWER, nd.RelOp),
+    '>': (REL_POWER, nd.RelOp),
+    '>=': (REL_POWER, nd.RelOp),
+    '<=': (REL_POWER, nd.RelOp),
+    '==': (REL_POWER, nd.RelOp),
+    '!=': (REL_POWER, nd.RelOp),
+    '+': (ADD_POWER, nd.BinOp),
+    '-': (ADD_POWER, nd.BinOp),
+    '*': (MUL_POWER, nd.BinOp),
+    '/': (MUL_POWER, nd.BinOp),
+}
+
 class Parser:
-    def __init__(self, scn: Scanner):
+    """
+    Recursive descent parser, start() returns the nd.Program.
+
+    The first error is raised unless `recover` is set: a declaration or
+    statement failing to parse is then kept as an nd.Error, its
+    SyntaxError is added to `errors` and the tokens are skipped up to a
+    ';', the '}' closing the block or a type keyword starting the next
+    declaration (panic mode). The parse stops at the `max_errors`th error.
+    Lexical errors are recovered from the same way, the scanner resuming
+    after the bad lexeme. Any other exception propagates.
+    """
+    def __init__(self, scn: Scanner, debug=False, recover=False, max_errors=MAX_ERRORS):
         self.scanner = scn
+        self.tokens = TokenStream(scn, errors=recover)
         self.types = ['int', 'void']
+        self.debug = debug
+        self.recover = recover
+        self.max_errors = max_errors
+        self.errors: List[SyntaxError] = []
     def __repr__(self):
         t = f"<Parser> :: {type(self.scanner)} {{ \n"
         t += f"\t current_token: {self.ct}\n"
@@ -21,52 +60,130 @@ class Parser:
         if not self.ct:
             raise Exception("Current token value is None")
 
-        err_msg = f"Expecting '{expected_token.value}', instead of '{self.ct.value}'"
-        if self.ct.ttype != expected_token.ttype:
-            raise SyntaxError(self.scanner, self.ct, err_msg)
-            # raise Exception(err_msg)
+        if self.ct.ttype == TokenType.ERROR:
+            raise self._lexical_error()
 
-        if expected_token.ttype == TokenType.SEPARATOR:
-            if self.ct.value != expected_token.value:
-                # raise Exception(err_msg)
-                raise SyntaxError(self.scanner, self.ct, err_msg)
+        if self.ct.ttype != expected_token.ttype or (
+            expected_token.ttype == TokenType.SEPARATOR and self.ct.value != expected_token.value
+        ):
+            raise SyntaxError(
+                self.scanner, self.ct, EXPECTING, code='expected-token',
+                expected=expected_token.value, found=self.ct.value,
+            )
 
-        temp, self.ct = self.ct, self.scanner.next_token()
+        temp, self.ct = self.ct, self.tokens.next()
         if temp.ttype == TokenType.CONSTANT:
             return int(temp.value.strip())
         return temp.value
 
+    def _lexical_error(self) -> SyntaxError:
+        """Error of the current TokenType.ERROR token, only seen when recovering"""
+        return SyntaxError(self.scanner, self.ct, self.ct.value, code='lexical')
+
+    def _recovering(self, production, top: bool):
+        """production(), or an nd.Error when it fails and the parser resynced"""
+        start = self.ct
+        try:
+            return production()
+        except SyntaxError as ex:
+            error = ex
+        except LexicalError as ex:
+            token = Token(TokenType.ERROR, str(ex), ex.linum)
+            error = SyntaxError(self.scanner, token, token.value, code='lexical')
+        except Exception:
+            if self.ct is not None:
+                raise  # not an error of the source
+            # the productions ran out of tokens
+            error = SyntaxError(self.scanner, start, "Unexpected end of file", code='end-of-file')
+
+        if self.ct is not None and self.ct.ttype == TokenType.ERROR:
+            error = self._lexical_error()  # the bad lexeme, not what failed on it
+
+        if len(self.errors) < self.max_errors:
+            self.errors.append(error)
+        node = nd.Error(error.token.linum, error.summary)
+
+        if len(self.errors) >= self.max_errors:
+            self.ct = None  # give up, every enclosing production fails in turn
+        else:
+            self._sync(start, top)
+        return node
+
+    def _sync(self, start: Token, top: bool):
+        """
+        Skip to the end of the failed declaration (top) or statement: past
+        its ';' or its nested '{...}' block, before a type keyword or the '}'
+        closing the enclosing block; a top level stray '}' is skipped.
+        """
+        if self.ct is start:
+            self.ct = self.tokens.next()  # always move on
+
+        depth = 0
+        while self.ct is not None:
+            value, ttype = self.ct.value, self.ct.ttype
+            if ttype == TokenType.SEPARATOR:
+                if value == '{':
+                    depth += 1
+                elif value == '}':
+                    if depth == 0 and not top:
+                        return
+                    depth = max(depth - 1, 0)
+                    if depth == 0:
+                        self.ct = self.tokens.next()
+                        return
+                elif value == ';' and depth == 0:
+                    self.ct = self.tokens.next()
+                    return
+            elif depth == 0 and ttype == TokenType.KEYWORD and value in self.types:
+                return
+            self.ct = self.tokens.next()
 
     def _sep(self, val: str):
-        return Token(TokenType.SEPARATOR, val, -1)
+        return SEPARATOR_TOKENS[val]
 
     def first(self, arr):
         return arr[0] if len(arr) == 1 else arr
 
     # program
     def start(self, startfrom=None):
-        self.ct: Token = self.scanner.next_token()
+        self.ct: Token = self.tokens.next()
         if startfrom == None:
-            return nd.Program(1, self.declaration_list()) 
+            res = nd.Program(1, self.declaration_list())
         else:
-            return getattr(self, startfrom)()
+            res = getattr(self, startfrom)()
+
+        if self.debug:
+            nd.validate(res)
+        return res
 
     def declaration_list(self):
         res = []
-        while self.scanner.is_next():
-            # spread
-            typedec = [*self.type_declaration()]
-            if self.ct.value == ';':
-                res += [self.var_declaration(typedec)]
+        while self.ct is not None:
+            if self.recover:
+                res += [self._recovering(self.declaration, top=True)]
             else:
-                res += [self.func_declaration(typedec)]
+                res += [self.declaration()]
 
         return res
 
+    def declaration(self):
+        # spread
+        typedec = [*self.type_declaration()]
+        if self.ct.value == ';':
+            return self.var_declaration(typedec)
+        return self.func_declaration(typedec)
+
     def type_declaration(self):
         res = [self.type_specifier()]
-        if self.ct.ttype == TokenType.ID:
-            res.append(self.match(self.ct))
+        if self.ct and self.ct.ttype != TokenType.ID:
+            raise SyntaxError(
+                self.scanner,
+                self.ct,
+                EXPECTING_ID,
+                code='expected-identifier',
+                found=self.ct,
+            )
+        res.append(self.match(ID_TOKEN))
         return res
 
 
@@ -105,7 +222,7 @@ class Parser:
         t, name = self.type_specifier(), None
 
         if self.ct and t != 'void' and self.ct.ttype == TokenType.ID:
-            name = self.match(Token(TokenType.ID, ''))
+            name = self.match(ID_TOKEN)
 
         # elif self.ct and t == 'void' and self.ct.ttype == TokenType.ID:
         #     raise Exception('void parameter cannot followed by ID')
@@ -113,15 +230,9 @@ class Parser:
 
         return nd.ParamDecl(linum, t, name)
     def type_specifier(self):
-        word = self.ct.value
-        if self.ct.ttype != TokenType.KEYWORD:
-            # breakpoint()
-            raise Exception(f'Err: \'{word}\' expected a keyword')
-
-        if self.ct.value in self.types:
+        if self.ct.ttype == TokenType.KEYWORD and self.ct.value in self.types:
             return self.match(self.ct)
-        else:
-            raise Exception(f'Err: \'{word}\' is not a type')
+        raise SyntaxError(self.scanner, self.ct, EXPECTING_TYPE, code='expected-type', found=self.ct.value)
 
     def statement(self):
         # TODO
@@ -147,14 +258,12 @@ class Parser:
         elif  self.ct.value in ['default', 'case']:
             res.append(self.labeled_stmt())
         else:
-            if self.ct.ttype == TokenType.ID:
-                var = self.variable()
-                if self.ct.value == ':':
-                    res += [self.labeled_stmt(var)]
-                else:
-                    res += [self.exp_stmt(var)]
+            if self.ct.ttype == TokenType.ID and self.tokens.peek() == self._sep(':'):
+                res += [self.labeled_stmt(self.variable())]
+            elif self.ct.ttype == TokenType.ID:
+                res += [self.exp_stmt()]
             else:
-                raise SyntaxError(self.scanner, self.ct, 'Unexpected {}'.format(self.ct))
+                raise SyntaxError(self.scanner, self.ct, 'Unexpected {found}', code='unexpected-token', found=self.ct)
 
         return self.first(res)
 
@@ -163,8 +272,12 @@ class Parser:
 
         # self.match((tokentype.separator, '{'))
         self.match(self._sep('{'))
-        while self.ct.value != '}':
-            res.append(self.statement())
+        if self.recover:
+            while self.ct is not None and self.ct.value != '}':
+                res.append(self._recovering(self.statement, top=False))
+        else:
+            while self.ct.value != '}':
+                res.append(self.statement())
 
         # self.match((tokentype.separator, '}'))
         self.match(self._sep('}'))
@@ -173,7 +286,7 @@ class Parser:
     def iteration_stmt(self):
         linum = self.ct.linum
         if self.ct.value == 'for':
-            self.match(Token(TokenType.KEYWORD, 'for'))
+            self.match(KEYWORD_TOKENS['for'])
             self.match(self._sep('('))
 
             header = [None] * 3
@@ -191,7 +304,7 @@ class Parser:
             return nd.ForLoop(linum, nd.ForHeader(*header), body)
 
         elif self.ct.value == 'while':
-            self.match(Token(TokenType.KEYWORD, 'while'))
+            self.match(KEYWORD_TOKENS['while'])
             self.match(self._sep('('))
             cond = self.exp()
             self.match(self._sep(')'))
@@ -206,7 +319,7 @@ class Parser:
         """
         res = []
         if self.ct.value == 'if':
-            key = self.match(Token(TokenType.KEYWORD, 'if'))
+            key = self.match(KEYWORD_TOKENS['if'])
             self.match(self._sep('('))
             condition = self.exp()
 
@@ -220,7 +333,7 @@ class Parser:
             #     res += [stmt]
 
             if self.ct and self.ct.value == 'else':
-                self.match(Token(TokenType.KEYWORD, 'else'))
+                self.match(KEYWORD_TOKENS['else'])
 
                 else_stmt = self.statement()
                 # if else_stmt[0] == 'body':
@@ -231,7 +344,7 @@ class Parser:
 
             return nd.IfOp(1, condition, stmt, else_stmt)
         elif self.ct.value == 'switch':
-            res += [self.match(Token(TokenType.KEYWORD, 'switch'))]
+            res += [self.match(KEYWORD_TOKENS['switch'])]
             self.match(self._sep('('))
             res += [self.exp()]
             self.match(self._sep(')'))
@@ -248,7 +361,7 @@ class Parser:
         key, stmt = [None] * 2
 
         if value == 'return':
-            key = self.match(Token(TokenType.KEYWORD, 'return'))
+            key = self.match(KEYWORD_TOKENS['return'])
 
             stmt = self.optional_exp()
             self.match(self._sep(';'))
@@ -260,7 +373,7 @@ class Parser:
             return nd.JumpStmt(linum, key, stmt)
         elif value == 'goto':
             key = self.match(self.ct)
-            stmt = self.match(Token(TokenType.ID, ''))
+            stmt = self.match(ID_TOKEN)
         elif value == 'break':
             key = self.match(self.ct)
 
@@ -274,13 +387,15 @@ class Parser:
         '''
         curtoken = self.ct
         res = self.optional_exp(var)
-        # breakpoint()
-        try:
-            self.match(self._sep(';'))
-        except SyntaxError as ex:
-            ex.token = curtoken
-            ex.message = "Expecting semicolon ';' after a statement"
-            raise
+        # reported at the statement start, the next token is often on the next line
+        if self.ct is not None and self.ct != self._sep(';'):
+            raise SyntaxError(
+                self.scanner,
+                curtoken,
+                "Expecting semicolon ';' after a statement",
+                code='missing-semicolon',
+            )
+        self.match(self._sep(';'))
 
         return res
 
@@ -335,7 +450,7 @@ class Parser:
     def assignment_exp(self, var=None):
         var = self.variable() if var == None else var
 
-        self.match(Token(TokenType.ASSIGNMENT, '='))
+        self.match(ASSIGNMENT_TOKEN)
         exp = self.exp()
         return nd.AssignmentOp(1, var, exp)
 
@@ -346,17 +461,19 @@ class Parser:
         if self.ct.ttype == TokenType.ID:
             if self.ct.value == 'while':
                 breakpoint()
-            name = self.match(Token(TokenType.ID, ''))
+            name = self.match(ID_TOKEN)
         else:
             raise SyntaxError(
                 self.scanner,
                 self.ct,
-                f'Expecting an identifier instead got: {self.ct}'
+                EXPECTING_ID,
+                code='expected-identifier',
+                found=self.ct,
             )
 
         if self.ct == self._sep('['):
             self.match(self._sep('['))
-            prop = self.match(Token(TokenType.CONSTANT, ''))
+            prop = self.match(CONSTANT_TOKEN)
             self.match(self._sep(']'))
 
         elif self.ct == self._sep('.'):
@@ -394,32 +511,32 @@ class Parser:
         return res
 
     def conditional_exp(self, var=None):
-        linum = self.ct.linum
-        left = self.add_exp(var)
-        while self.ct and self.ct.value in ['<', '>', '>=', '<=', '==', '!=']:
-            op = self.match(self.ct)
-            right = self.add_exp()
-            left = nd.RelOp(linum, op, left, right)
-
-        return left
+        return self.binary_exp(var, REL_POWER)
 
     def add_exp(self, var=None):
-        linum = self.ct.linum
-        left = self.multi_exp(var)
-        while self.ct and self.ct.value in ['+', '-']:
-            op = self.match(self.ct)
-            right = self.multi_exp()
-            left = nd.BinOp(linum, op, left, right)
-
-        return left
+        return self.binary_exp(var, ADD_POWER)
 
     def multi_exp(self, var=None):
+        return self.binary_exp(var, MUL_POWER)
+
+    def binary_exp(self, var=None, min_power=REL_POWER):
+        """
+        Precedence climbing over BINARY_OPERATORS, only operators binding at
+        least as tight as min_power are consumed. Operators of the same power
+        are folded in a loop so they stay left associative, recursion only
+        happens for a tighter operator on the right.
+        """
         linum = self.ct.linum
         left = self.pri_exp(var)
-        while self.ct and self.ct.value in ['*', '/']:
-            op = self.match(self.ct)
-            right = self.pri_exp()
-            left = nd.BinOp(linum, op, left, right)
+        while self.ct:
+            op = BINARY_OPERATORS.get(self.ct.value)
+            if op is None or op[0] < min_power:
+                break
+
+            power, node = op
+            operator = self.match(self.ct)
+            right = self.binary_exp(None, power + 1)
+            left = node(linum, operator, left, right)
 
         return left
 
@@ -447,9 +564,8 @@ class Parser:
             self.match(self._sep(')'))  # 
             return res
         elif token == TokenType.CONSTANT:
-            num = self.match(Token(TokenType.CONSTANT, ''))
+            num = self.match(CONSTANT_TOKEN)
             return nd.Num(linum, num)
-            # return self.match(Token(TokenType.CONSTANT, ''))
+            # return self.match(CONSTANT_TOKEN)
         else:
-            # print(self.ct, var)
-            raise Exception(f'Unexpected {self.ct}')
+            raise SyntaxError(self.scanner, self.ct, 'Unexpected {found}', code='unexpected-token', found=self.ct)
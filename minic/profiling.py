@@ -0,0 +1,201 @@
+"""
+Profiling of the compile pipeline, see minic.driver --profile.
+
+compile_file measures its phases through a Meter, which only records the
+wall time of each one. A Profile measures, over all the files it sees:
+
+  - wall and CPU time, and with tracemalloc the memory each phase keeps
+    (net) and the most it used above its start (peak)
+  - the tokens scanned and nodes parsed
+  - the calls to every Parser method, the time spent in them by call
+    stack, exported in the collapsed format of flamegraph.pl/speedscope:
+
+        profile = Profile()
+        with profile:
+            results = [compile_file(x, profile=profile) for x in paths]
+        print(profile.table())
+        profile.write_collapsed('parse.folded')
+
+The parser methods are wrapped in a Parser subclass, only the files
+parsed through `profile.parser` pay for it.
+"""
+from __future__ import annotations
+import contextlib
+import functools
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from typing import Dict, List, Tuple
+
+import minic.node as nd
+from minic.parser import Parser
+
+PHASES = ('scan', 'parse', 'check')
+
+
+class Meter:
+    """Wall time of the phases of compile_file, in its FileResult.timings"""
+    parser = Parser
+
+    @contextlib.contextmanager
+    def phase(self, name: str, timings: Dict[str, float]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = time.perf_counter() - start
+
+    def scanned(self, tokens: List):
+        pass
+
+    def parsed(self, ast: nd.Program):
+        pass
+
+
+def count_nodes(root) -> int:
+    count, stack = 0, [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            stack.extend(obj)
+        elif is_dataclass(obj):
+            count += isinstance(obj, nd.Node)
+            stack.extend(getattr(obj, f.name) for f in fields(obj))
+    return count
+
+
+@dataclass(slots=True)
+class PhaseStats:
+    wall: float = 0.0
+    cpu: float = 0.0
+    net: int = 0  # bytes still allocated at the end of the phase
+    peak: int = 0  # most bytes allocated above the start of the phase, in any file
+
+
+class Profile(Meter):
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.files = 0
+        self.tokens = 0
+        self.nodes = 0
+        self.phases: Dict[str, PhaseStats] = {x: PhaseStats() for x in PHASES}
+        self.calls: Counter = Counter()  # parser method name -> calls
+        self.stacks: Counter = Counter()  # call stack -> self time, in ns
+        self._started = False
+        self.parser = self._parser_class()
+
+    def __enter__(self) -> Profile:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str, timings: Dict[str, float]):
+        stats = self.phases.setdefault(name, PhaseStats())
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+
+        cpu, start = time.process_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            stats.cpu += time.process_time() - cpu
+            stats.wall += wall
+            timings[name] = wall
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stats.net += current - before
+                stats.peak = max(stats.peak, peak - before)
+            if name != 'parse':
+                self.stacks[(name,)] += int(wall * 1e9)
+
+    def scanned(self, tokens: List):
+        self.files += 1
+        self.tokens += len(tokens)
+
+    def parsed(self, ast: nd.Program):
+        self.nodes += count_nodes(ast)
+
+    def _parser_class(self) -> type:
+        calls, stacks = self.calls, self.stacks
+        clock = time.perf_counter_ns
+        # (path, time spent in the callees) of the methods running
+        running: List[list] = [[('parse',), 0]]
+
+        def wrap(name, method):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                calls[name] += 1
+                frame = [running[-1][0] + (name,), 0]
+                running.append(frame)
+                start = clock()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    elapsed = clock() - start
+                    running.pop()
+                    running[-1][1] += elapsed
+                    stacks[frame[0]] += elapsed - frame[1]
+            return wrapper
+
+        methods = {
+            name: wrap(name, value) for name, value in vars(Parser).items()
+            if callable(value) and not name.startswith('__')
+        }
+        return type('ProfiledParser', (Parser,), methods)
+
+    def productions(self) -> List[Tuple[str, int, float]]:
+        """(name, calls, self time in seconds) of the parser methods, most called first"""
+        own = Counter()
+        for path, ns in self.stacks.items():
+            if path[0] == 'parse' and len(path) > 1:
+                own[path[-1]] += ns
+        return [(name, count, own[name] / 1e9) for name, count in self.calls.most_common()]
+
+    def collapsed(self) -> str:
+        """One 'frame;frame;... microseconds' line per call stack"""
+        lines = []
+        for path, ns in sorted(self.stacks.items()):
+            if ns >= 1000:
+                lines.append(f"{';'.join(path)} {ns // 1000}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write_collapsed(self, filename: str):
+        with open(filename, 'w') as f:
+            f.write(self.collapsed())
+
+    def to_dict(self) -> Dict:
+        return {
+            'files': self.files,
+            'tokens': self.tokens,
+            'nodes': self.nodes,
+            'memory': self.memory,
+            'phases': {k: asdict(v) for k, v in self.phases.items()},
+            'productions': [
+                {'name': name, 'calls': count, 'self': own}
+                for name, count, own in self.productions()
+            ],
+        }
+
+    def table(self, top=10) -> str:
+        lines = [f"{'phase':<8} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10} {'net KiB':>10}"]
+        for name, x in self.phases.items():
+            memory = f"{x.peak / 1024:>10.1f} {x.net / 1024:>10.1f}" if self.memory else f"{'-':>10} {'-':>10}"
+            lines.append(f"{name:<8} {x.wall * 1000:>10.2f} {x.cpu * 1000:>10.2f} {memory}")
+        lines.append(f"{self.files} files, {self.tokens} tokens, {self.nodes} nodes")
+
+        lines.append("")
+        lines.append(f"{'production':<20} {'calls':>10} {'self ms':>10}")
+        for name, count, own in self.productions()[:top]:
+            lines.append(f"{name:<20} {count:>10} {own * 1000:>10.2f}")
+        return '\n'.join(lines)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+import types
+from functools import lru_cache
+from typing import List
+
+import minic.node as nd
+from minic.interpreter import c_div
+from minic.resolver import SlotResolver
+
+# Mini-C identifiers are letters only, a prefix with an underscore keeps
+# generated names away from python keywords and builtins.
+LOCAL, GLOBAL, FUNCTION = 'v_', 'g_', 'f_'
+
+ARITHMETIC = ['+', '-', '*', '/']
+RELATIONAL = ['<', '>', '<=', '>=', '==', '!=']
+# levels of an operator chain rendered as nested python expressions before
+# the value is kept in a temporary, CPython allows 200 nested parentheses
+CHAIN = 8
+
+
+@lru_cache(maxsize=128)
+def _code(source: str) -> types.CodeType:
+    """compile() once per generated source"""
+    return compile(source, '<minic>', 'exec')
+
+
+class PyCompiler(SlotResolver):
+    """
+    Translates an nd.Program to python source, one `def` per FuncDecl.
+    Mini-C locals become python locals and globals module globals, so
+    running it costs plain CPython bytecode, without any per node dispatch.
+    Calls are python calls, the recursion depth is bounded by
+    sys.getrecursionlimit().
+
+    With wrap32 every +, -, *, / result is wrapped to a signed 32-bit int.
+    """
+    def __init__(self, root: nd.Program, wrap32=False):
+        super().__init__()
+        self.root = root
+        self.wrap32 = wrap32
+        self.temps = 0
+
+    def source(self) -> str:
+        lines = []
+        for decl in self.root.declarations:
+            if isinstance(decl, nd.VarDecl):
+                self.declare(decl)
+                lines.append(f"{GLOBAL}{decl.name} = 0")
+            else:
+                lines += self._function(decl)
+        return "\n".join(lines) + "\n"
+
+    def _function(self, node: nd.FuncDecl) -> List[str]:
+        params = [f"{LOCAL}{x.name}" for x in self.enter_function(node).params]
+        self.temps = 0
+        body = self._block(node.body or [], 1)
+
+        lines = [f"def {FUNCTION}{node.name}({', '.join(params)}):"]
+        if self.global_slots:
+            lines.append(f"    global {', '.join(GLOBAL + x for x in self.global_slots)}")
+        # declarations anywhere in the body are zeroed once, like a frame
+        lines += [f"    {LOCAL}{x} = 0" for x in list(self.local_slots)[len(params):]]
+        lines += body or ["    pass"]
+
+        self.leave_function()
+        return lines
+
+    # statements
+    def _block(self, stmts: List, depth: int) -> List[str]:
+        lines = []
+        for stmt in stmts:
+            lines += self._stmt(stmt, depth)
+        return lines
+
+    def _body(self, stmts: List, depth: int) -> List[str]:
+        return self._block(stmts, depth) or ["    " * depth + "pass"]
+
+    def _stmt(self, node, depth: int) -> List[str]:
+        pad = "    " * depth
+        if isinstance(node, list):
+            return self._block(node, depth)
+
+        if isinstance(node, nd.VarDecl):
+            self.declare(node)
+            return []
+
+        if isinstance(node, nd.IfOp):
+            lines = [f"{pad}if {self._cond(node.condition)}:"]
+            lines += self._body(node.body, depth + 1)
+            if node.else_body:
+                lines += [f"{pad}else:"] + self._body(node.else_body, depth + 1)
+            return lines
+
+        if isinstance(node, nd.WhileLoop):
+            return [f"{pad}while {self._cond(node.condition)}:"] + self._loop_body(node.body, depth + 1)
+
+        if isinstance(node, nd.ForLoop):
+            header, lines = node.header, []
+            if header.first is not None:
+                lines += self._stmt(header.first, depth)
+            cond = self._cond(header.second) if header.second is not None else "True"
+            lines.append(f"{pad}while {cond}:")
+            # there is no continue, the step can simply close the body
+            step = self._stmt(header.third, depth + 1) if header.third is not None else []
+            return lines + self._loop_body(node.body, depth + 1, step)
+
+        if isinstance(node, nd.JumpStmt):
+            self.jump(node)
+            if node.keyword == 'break':
+                return [f"{pad}break"]
+            if node.value is None:
+                return [f"{pad}return None"]
+            return [f"{pad}return {self._exp(node.value)}"]
+
+        if isinstance(node, nd.AssignmentOp):
+            symbol = self.variable(node.target)
+            return [f"{pad}{self._name(symbol)} = {self._exp(node.value)}"]
+
+        if isinstance(node, nd.Node):
+            return [f"{pad}{self._exp(node)}"]
+
+        raise self.error(node, f"Unsupported statement {node!r}")
+
+    def _loop_body(self, stmts: List, depth: int, step=None) -> List[str]:
+        self.loops += 1
+        lines = self._block(stmts, depth) + (step or [])
+        self.loops -= 1
+        return lines or ["    " * depth + "pass"]
+
+    # expressions
+    def _name(self, symbol) -> str:
+        return (GLOBAL if symbol.is_global else LOCAL) + symbol.name
+
+    def _wrap(self, exp: str) -> str:
+        if not self.wrap32:
+            return f"({exp})"
+        return f"(((({exp}) + 2147483648) & 4294967295) - 2147483648)"
+
+    def _cond(self, node) -> str:
+        """Expression used as a condition, comparisons can stay booleans"""
+        if isinstance(node, nd.RelOp) and node.operator in RELATIONAL:
+            return f"{self._exp(node.left)} {node.operator} {self._exp(node.right)}"
+        return self._exp(node)
+
+    def _exp(self, node) -> str:
+        if isinstance(node, nd.Num):
+            value = node.value
+            return str(self._wrap_value(value) if self.wrap32 else value)
+
+        if isinstance(node, nd.Var):
+            return self._name(self.variable(node))
+
+        if isinstance(node, (nd.BinOp, nd.RelOp)):
+            return self._chain(node)
+
+        if isinstance(node, nd.AssignmentOp):
+            symbol = self.variable(node.target)
+            return f"({self._name(symbol)} := {self._exp(node.value)})"
+
+        if isinstance(node, nd.CallFuncOp):
+            self.function(node)
+            args = ", ".join(self._exp(x) for x in node.args or [])
+            return f"{FUNCTION}{node.name}({args})"
+
+        raise self.error(node, f"Unsupported expression {node!r}")
+
+    def _chain(self, node) -> str:
+        """
+        Left-associative operator chain, its left spine is walked from an
+        explicit stack. Every CHAIN levels the value so far goes to a
+        temporary, `(_t0 := ..., _t0 + a)[-1]`, long chains would exceed
+        the python parentheses limit otherwise.
+        """
+        spine = []
+        while isinstance(node, (nd.BinOp, nd.RelOp)):
+            spine.append(node)
+            node = node.left
+
+        exp, temps = self._exp(node), []
+        for i, node in enumerate(reversed(spine)):
+            if i and i % CHAIN == 0:
+                temp = f"_t{self.temps}"
+                self.temps += 1
+                temps.append(f"{temp} := {exp}")
+                exp = temp
+            exp = self._binary(node, exp, self._exp(node.right))
+
+        if not temps:
+            return exp
+        return f"({', '.join(temps + [exp])})[-1]"
+
+    def _binary(self, node, l: str, r: str) -> str:
+        op = node.operator
+        if op in RELATIONAL:
+            return f"(1 if {l} {op} {r} else 0)"
+        if op == '/':
+            return self._wrap(f"_div({l}, {r})")
+        if op in ARITHMETIC:
+            return self._wrap(f"{l} {op} {r}")
+        raise self.error(node, f"Unknown operator '{op}'")
+
+    @staticmethod
+    def _wrap_value(value: int) -> int:
+        return ((value + 2147483648) & 4294967295) - 2147483648
+
+
+def compile_program(root: nd.Program, wrap32=False, name='minic') -> types.ModuleType:
+    """
+    Build a python module from root. Every Mini-C function is an attribute
+    under its own name, globals are read and written with get_global and
+    set_global, the generated code is kept in __source__.
+
+        module = compile_program(ast)
+        module.power(5)
+    """
+    source = PyCompiler(root, wrap32).source()
+    module = types.ModuleType(name)
+    namespace = module.__dict__
+    namespace['_div'] = c_div
+    namespace['__source__'] = source
+    exec(_code(source), namespace)
+
+    for key in list(namespace):
+        if key.startswith(FUNCTION):
+            setattr(module, key[len(FUNCTION):], namespace[key])
+
+    namespace['get_global'] = lambda var: namespace[GLOBAL + var]
+    namespace['set_global'] = lambda var, value: namespace.__setitem__(GLOBAL + var, value)
+    return module
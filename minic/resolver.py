@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Dict
+
+import minic.node as nd
+import minic.symboltable as symb
+from minic.exceptions import SemanticError
+
+
+class SlotSymbol(symb.VarSymbol):
+    """Variable bound to a slot of its frame, or of the globals frame"""
+    def __init__(self, name, type, slot, is_global=False):
+        super().__init__(name, type)
+        self.slot = slot
+        self.is_global = is_global
+
+
+class SlotResolver:
+    """
+    Scope bookkeeping shared by the execution backends. Walking the tree is
+    left to the subclass, which calls declare/enter_function/... as it goes
+    and gets every variable bound to a slot index:
+    globals are numbered in `global_slots`, locals (parameters first) per
+    function between enter_function and leave_function.
+    """
+    def __init__(self):
+        self.symbols = symb.SymbolTable()
+        self.scope = self.symbols.enter('<global>')
+        self.scope.init_builtin()
+        self.global_slots: Dict[str, int] = {}
+        self.local_slots: Dict[str, int] = None
+        self.loops = 0
+
+    def error(self, node, message) -> SemanticError:
+        if not isinstance(node, nd.Node):
+            node = nd.Node(0)
+        return SemanticError(node, self.scope, message)
+
+    def declare(self, node) -> SlotSymbol:
+        """Bind a VarDecl/ParamDecl to the next free slot"""
+        if self.scope.lookup(node.name, deep=False):
+            raise Exception(f"Symbol {node.name} is already declared")
+
+        is_global = self.local_slots is None
+        slots = self.global_slots if is_global else self.local_slots
+        slot = slots[node.name] = len(slots)
+
+        symbol = SlotSymbol(node.name, self.scope.lookup(node.type), slot, is_global)
+        self.scope.insert(symbol)
+        return symbol
+
+    def enter_function(self, node: nd.FuncDecl) -> symb.FunctionSymbol:
+        """Declare the function, open its scope and bind its parameters"""
+        func = symb.FunctionSymbol(node.name, self.scope.lookup(node.ret_type))
+        self.scope.insert(func)
+
+        self.scope = self.symbols.enter(node.name)
+        self.local_slots = {}
+        self.loops = 0
+
+        params = node.params or []
+        if params and params[0].type != 'void':
+            func.params = [self.declare(x) for x in params]
+        else:
+            func.params = []
+        return func
+
+    def leave_function(self) -> int:
+        """Close the function scope, return its number of local slots"""
+        nlocals = len(self.local_slots)
+        self.scope = self.symbols.leave()
+        self.local_slots = None
+        return nlocals
+
+    def variable(self, node: nd.Var) -> SlotSymbol:
+        if node.prop is not None:
+            raise self.error(node, f"Array and object variables are not supported: '{node.value}'")
+
+        symbol = self.scope.lookup(node.value)
+        if not isinstance(symbol, SlotSymbol):
+            raise self.error(node, f"Variable '{node.value}' has not been declared")
+        return symbol
+
+    def function(self, node: nd.CallFuncOp) -> symb.FunctionSymbol:
+        func = self.scope.lookup(node.name)
+        if type(func) != symb.FunctionSymbol:
+            raise self.error(node, f"'{node.name}' is not a function")
+
+        if len(func.params) != len(node.args or []):
+            raise self.error(node, f"Parameter count at '{node.name}' method did not match")
+        return func
+
+    def jump(self, node: nd.JumpStmt):
+        """Check a JumpStmt can be executed"""
+        if node.keyword == 'break' and not self.loops:
+            raise self.error(node, "'break' outside of a loop")
+
+        if node.keyword not in ['break', 'return']:
+            raise self.error(node, f"'{node.keyword}' is not supported")
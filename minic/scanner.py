@@ -1,7 +1,14 @@
 from __future__ import annotations
+import io
+import mmap
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from collections import deque
 from enum import Enum
+from typing import Iterator, List
 from dataclasses import dataclass
-from copy import deepcopy
 
 
 class TokenType(Enum):
@@ -13,8 +20,63 @@ class TokenType(Enum):
     REL_OPERATOR = 5
     SEPARATOR = 6
     ASSIGNMENT = 7
-
-@dataclass(init=True, eq=True)
+    ERROR = 8  # a lexical error, see TokenStream(errors=True)
+
+# Lookup tables, built once at import and shared by every Scanner
+KEYWORDS = frozenset(
+    sys.intern(x)
+    for x in 'else if switch case default int void struct return break goto while for'.split(" ")
+)
+ARITHMETIC_OPERATORS = frozenset('+-*/')
+REL_OPERATORS = frozenset(sys.intern(x) for x in '< <= > >= == !='.split(" "))
+REL_START = frozenset('<>=!')
+SEPARATORS = frozenset('(){};:,[].')
+
+# Character classes of the state machine
+CC_OTHER, CC_ALPHA, CC_DIGIT, CC_SPACE, CC_REL, CC_ARITH, CC_SEP = range(7)
+
+def _build_char_class() -> bytes:
+    table = bytearray(128)
+    for i in range(128):
+        c = chr(i)
+        if c.isalpha():
+            table[i] = CC_ALPHA
+        elif c.isnumeric():
+            table[i] = CC_DIGIT
+        elif c.isspace():
+            table[i] = CC_SPACE
+        elif c in REL_START:
+            table[i] = CC_REL
+        elif c in ARITHMETIC_OPERATORS:
+            table[i] = CC_ARITH
+        elif c in SEPARATORS:
+            table[i] = CC_SEP
+    return bytes(table)
+
+CHAR_CLASS = _build_char_class()
+
+def char_class(c: str) -> int:
+    """CC_* class of c, table lookup for ASCII"""
+    o = ord(c)
+    if o < 128:
+        return CHAR_CLASS[o]
+    if c.isalpha():
+        return CC_ALPHA
+    if c.isnumeric():
+        return CC_DIGIT
+    if c.isspace():
+        return CC_SPACE
+    return CC_OTHER
+
+
+class LexicalError(Exception):
+    """Invalid lexeme, raised by both engines with the line it starts on"""
+    def __init__(self, message: str, linum=-1):
+        super().__init__(message)
+        self.linum = linum
+
+
+@dataclass(init=True, eq=True, slots=True)
 class Token:
     ttype: TokenType
     value: str
@@ -22,29 +84,70 @@ class Token:
 
     def __eq__(self, other: Token):
         """Skipping linum for equality"""
-        if other == None:
-            return False
-
-        if self.ttype != other.ttype:
-            return False
+        if self is other:
+            return True
 
-        if self.value != other.value:
+        if not isinstance(other, Token):
             return False
 
-        return True
+        # enum members are singletons, values are mostly interned strings
+        return self.ttype is other.ttype and self.value == other.value
+
+
+# Shared, never mutated, tokens for the parser to match against
+SEPARATOR_TOKENS = {x: Token(TokenType.SEPARATOR, x) for x in '(){};:,[].'}
+KEYWORD_TOKENS = {x: Token(TokenType.KEYWORD, x) for x in KEYWORDS}
+ID_TOKEN = Token(TokenType.ID, '')
+CONSTANT_TOKEN = Token(TokenType.CONSTANT, '')
+ASSIGNMENT_TOKEN = Token(TokenType.ASSIGNMENT, '=')
+
+
+# Single master pattern used by the 'regex' engine, one match per token: the
+# run of characters the state machine drops in its START state, then one
+# alternative per branch of Scanner._next_token_state:
+# * id    -> alphabetic run, a digit right after it is an error
+# * num   -> numeric run, a letter right after it is an error
+# * rel   -> relational/assignment run, stops at space, alnum or separator
+# * arith -> single arithmetic operator
+# * sep   -> single separator
+# id, num and rel swallow one trailing whitespace just like the state machine.
+_TOKEN_RE = re.compile(r"""
+    [^A-Za-z0-9<>=!+\-*/(){};:,\[\].]*
+    (?:
+        (?P<id>[A-Za-z]+)(?:(?P<id_err>[0-9])|\s)?
+      | (?P<num>[0-9]+)(?:(?P<num_err>[A-Za-z])|\s)?
+      | (?P<rel>[<>=!][^\sA-Za-z0-9(){};:,\[\].]*)\s?
+      | (?P<arith>[+\-*/])
+      | (?P<sep>[(){};:,\[\].])
+    )
+""", re.VERBOSE)
+_TOKEN_RE_BYTES = re.compile(_TOKEN_RE.pattern.encode(), re.VERBOSE)
+# group starting the lexeme of a match, by the last group it matched
+_LEXEME = {'id_err': 'id', 'num_err': 'num'}
+
+
+def _text(value) -> str:
+    """Matches over a bytes source (MmapFileScanner) are decoded lazily"""
+    if value is None or isinstance(value, str):
+        return value
+    return value.decode('latin-1')
 
 
 class Scanner:
-    def __init__(self):
-        self.init_keywords()
+    engines = ['state', 'regex']
 
-    def init_keywords(self):
-        keys = 'else if switch case default int void struct return break goto while for'
-        self.keyword = [x for x in keys.split(" ")]
-        self.arithmetic_operator= '+-*/'
-        self.rel_operator= [x for x in '< <= > >= == !='.split(" ")]
-        self.rel_start= [x for x in '< > = !'.split(" ")]
-        self.separator = '(){};:,[].'
+    keyword = KEYWORDS
+    arithmetic_operator = ARITHMETIC_OPERATORS
+    rel_operator = REL_OPERATORS
+    rel_start = REL_START
+    separator = SEPARATORS
+    filename = '<string>'
+
+    def __init__(self, engine='state'):
+        if engine not in self.engines:
+            raise ValueError(f"Unknown scanner engine '{engine}', expecting one of {self.engines}")
+
+        self.engine = engine
 
     def open(self) -> Scanner:
         return self.__enter__()
@@ -52,8 +155,24 @@ class Scanner:
     def close(self):
         self.__exit__(None, None, None)
 
+    def line_count(self) -> int:
+        return 0
+
+    def line(self, linum: int) -> str:
+        """Text of the 1-based line linum, including its newline"""
+        return ''
+
     def spit(self, linum=0, surround=0) -> str:
-        pass
+        """Lines linum - surround to linum + surround, numbered, the whole source by default"""
+        x, y = 0, self.line_count()
+        if not (linum == surround == 0):
+            x = max(linum - surround - 1, 0)
+            y = min(linum + surround, y)
+
+        linum_len = len(str(y))
+        return ''.join([
+            f"{i + 1: >{linum_len}}: {self.line(i + 1)}" for i in range(x, y)
+        ])
 
     def __enter__(self) -> ScannerObject:
         pass
@@ -73,26 +192,171 @@ class Scanner:
     def get_linum(self) -> int:
         return -1
 
-    def next_token(self) -> (TokenType, str):
+    def source(self) -> str:
+        """Whole text being scanned, used by the 'regex' engine"""
+        pass
+
+    def tell(self) -> int:
+        """Absolute offset of the next character in source()"""
+        pass
+
+    def seek(self, pos: int):
+        pass
+
+    def linum_at(self, pos: int) -> int:
+        return -1
+
+    def tokens(self) -> Iterator[Token]:
+        """Lazily yield every remaining token"""
+        if self.engine == 'regex':
+            yield from self._tokens_regex()
+            return
+
+        is_next, next_token = self.is_next, self.next_token
+        while is_next():
+            token = next_token()
+            if token is None:
+                return
+            yield token
+
+    def next_token(self) -> Token:
+        if self.engine == 'regex':
+            return self._next_token_regex()
+        return self._next_token_state()
+
+    def skip_lexeme(self):
+        """Drop the rest of the alphanumeric run a LexicalError stopped in"""
+        c = self.next_char()
+        while c and char_class(c) in (CC_ALPHA, CC_DIGIT):
+            c = self.next_char()
+        if c:
+            self.back()
+
+    def token_buffer(self) -> TokenBuffer:
+        """Scan the rest of the source into a TokenBuffer, using the master regex"""
+        buf = TokenBuffer()
+        match = self._match_regex()
+        while match:
+            buf.append(*match)
+            match = self._match_regex()
+        return buf
+
+    def _tokens_regex(self) -> Iterator[Token]:
+        """
+        tokens() of the 'regex' engine, the match loop of _match_regex
+        without a method call per token. Invalid tokens go through
+        _match_regex to raise the same errors as next_token.
+        """
+        text = self.source()
+        pos = self.tell()
+        is_str = isinstance(text, str)
+        match = (_TOKEN_RE if is_str else _TOKEN_RE_BYTES).match
+
+        linum_at, seek = self.linum_at, self.seek
+        simple = {
+            'num': TokenType.CONSTANT,
+            'arith': TokenType.ARITHMETIC_OPERATOR,
+            'sep': TokenType.SEPARATOR,
+        }
+        while True:
+            m = match(text, pos)
+            if m is None:
+                break
+
+            kind = m.lastgroup
+            start = m.start(kind)
+            if kind == 'id_err' or kind == 'num_err':
+                # relex the whole lexeme, not only its bad tail, to raise its error
+                seek(m.start())
+                self._match_regex()
+
+            pos = m.end()
+            seek(pos)
+            value = m.group(kind)
+            if not is_str:
+                value = value.decode('latin-1')
+
+            ttype = simple.get(kind)
+            if ttype is None:
+                value = sys.intern(value)
+                if kind == 'id':
+                    ttype = TokenType.KEYWORD if value in KEYWORDS else TokenType.ID
+                else:
+                    ttype = TokenType.ASSIGNMENT if value == '=' else TokenType.REL_OPERATOR
+
+            yield Token(ttype, value, linum_at(start))
+
+        seek(len(text))
+
+    def _next_token_regex(self) -> Token:
+        match = self._match_regex()
+        return match[0] if match else None
+
+    def _match_regex(self):
+        """Next (token, start, end) from the master regex, None when done"""
+        text = self.source()
+        pattern = _TOKEN_RE if isinstance(text, str) else _TOKEN_RE_BYTES
+        m = pattern.match(text, self.tell())
+        if m is None: # nothing but skipped characters left
+            self.seek(len(text))
+            return None
+
+        kind = m.lastgroup
+        pos = m.start(_LEXEME.get(kind, kind))
+        linum = self.linum_at(pos)
+        self.seek(m.end())
+
+        if kind in ['id', 'id_err']:
+            value = _text(m.group('id'))
+            if m.group('id_err'):
+                msg = "ID cannot contain numbers"
+                msg += f": {value} + '{_text(m.group('id_err'))}'"
+                raise LexicalError(msg, linum)
+
+            ttype = TokenType.KEYWORD if value in KEYWORDS else TokenType.ID
+            token = Token(ttype, sys.intern(value), linum)
+            return token, pos, m.end('id')
+        elif kind in ['num', 'num_err']:
+            value = _text(m.group('num'))
+            if m.group('num_err'):
+                msg = "Constant cannot contain alphabet"
+                msg += f": {value} + '{_text(m.group('num_err'))}'"
+                raise LexicalError(msg, linum)
+
+            return Token(TokenType.CONSTANT, value, linum), pos, m.end('num')
+        elif kind == 'rel':
+            value = sys.intern(_text(m.group('rel')))
+            ttype = TokenType.ASSIGNMENT if value == '=' else TokenType.REL_OPERATOR
+            return Token(ttype, value, linum), pos, m.end('rel')
+        elif kind == 'arith':
+            value = _text(m.group(kind))
+            return Token(TokenType.ARITHMETIC_OPERATOR, value, linum), pos, m.end()
+        else:
+            value = _text(m.group(kind))
+            return Token(TokenType.SEPARATOR, value, linum), pos, m.end()
+
+    def _next_token_state(self) -> Token:
         # cur_state = TokenType.START
         c = self.next_char() # Get char
         token = Token(TokenType.START, '', self.get_linum())
 
         while c: # done when hit TokenType.EOF
+            cc = CHAR_CLASS[ord(c)] if c < '\x80' else char_class(c)
             if token.ttype == TokenType.START:
                 token.value = c
+                token.linum = self.get_linum() # after any skipped newlines
                 # word = c
-                if c.isalpha():
+                if cc == CC_ALPHA:
                     token.ttype =  TokenType.ID
-                elif c.isnumeric():
+                elif cc == CC_DIGIT:
                     token.ttype =  TokenType.CONSTANT
-                elif c in self.rel_start:
+                elif cc == CC_REL:
                     token.ttype =  TokenType.REL_OPERATOR
-                elif c in self.arithmetic_operator:
+                elif cc == CC_ARITH:
                     token.ttype =  TokenType.ARITHMETIC_OPERATOR
                     # return (token.ttype, word)
                     return token
-                elif c in self.separator:
+                elif cc == CC_SEP:
                     token.ttype =  TokenType.SEPARATOR
                     # return (token.ttype, word)
                     return token
@@ -101,34 +365,35 @@ class Scanner:
             else:
 
                 #handles anything separated by space
-                if token.ttype in [TokenType.ID, TokenType.CONSTANT]:
-                    if not c.isalnum():
-                        if token.value in self.keyword:
+                if token.ttype is TokenType.ID or token.ttype is TokenType.CONSTANT:
+                    if cc != CC_ALPHA and cc != CC_DIGIT:
+                        if token.value in KEYWORDS:
                             token.ttype =  TokenType.KEYWORD
+                            token.value = sys.intern(token.value)
 
-                        if c.isspace():
+                        if cc == CC_SPACE:
                             return token
                         else:
                             self.back();
                             return token
                     else:
-                        if token.ttype == TokenType.ID and c.isnumeric():
+                        if token.ttype == TokenType.ID and cc == CC_DIGIT:
                             msg = "ID cannot contain numbers"
                             msg += f": {token.value} + '{c}'"
-                            raise Exception(msg)
-                        elif token.ttype == TokenType.CONSTANT and c.isalpha():
+                            raise LexicalError(msg, token.linum)
+                        elif token.ttype == TokenType.CONSTANT and cc == CC_ALPHA:
                             msg = "Constant cannot contain alphabet"
                             msg += f": {token.value} + '{c}'"
-                            raise Exception(msg)
+                            raise LexicalError(msg, token.linum)
                         else:
                             token.value += c
                 else: # either assignment or relation operator
-                    if c.isspace():
+                    if cc == CC_SPACE:
                         if token.value == '=':
                             token.ttype =  TokenType.ASSIGNMENT
 
                         return token
-                    elif c.isalnum() or c in self.separator:
+                    elif cc == CC_ALPHA or cc == CC_DIGIT or cc == CC_SEP:
                         if token.value == '=':
                             token.ttype =  TokenType.ASSIGNMENT
 
@@ -140,49 +405,69 @@ class Scanner:
             c = self.next_char()
 
 class FileScanner(Scanner):
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, engine='state'):
         self.filename = filename
         self.linum = -1
         self.charpos = 0
         self.isnext = False
-        super().__init__()
+        self.lines = []
+        self._offsets = [0]
+        self._source = None
+        super().__init__(engine)
 
-    def spit(self, linum=0, surround=0):
-        x, y = 0, len(self.lines)
-        text = []
-        # breakpoint()
-        if not (linum == surround == 0):
-            x = linum - surround - 1
-            y = linum + surround
+    def line_count(self) -> int:
+        return len(self.lines)
 
-        lines = []
-        linum_len = len(str(y))
-        for i, line in enumerate(self.lines[x:y]):
-            num = i + linum - surround if linum else i + 1
-            lines += [f"{num: >{linum_len}}: {line}"]
-
-        for line in lines:
-            text.append(line)
-
-        return ''.join(text)
+    def line(self, linum: int) -> str:
+        return self.lines[linum - 1]
 
     def __enter__(self) -> Scanner:
         with open(self.filename) as f:
-            self.lines = [x for x in f]
+            self._set_lines([x for x in f])
+        return self
+
+    def _set_lines(self, lines: List[str]):
+        self.lines = lines
+
+        # start offset of every line, last item is the total length
+        self._offsets = [0]
+        for line in self.lines:
+            self._offsets.append(self._offsets[-1] + len(line))
+        self._source = None
 
         if len(self.lines) > 0:
             self.linum = 0
             self.charpos = 0
             self.isnext = True
 
-        return self
-
     def __exit__(self, exc_type, exc_value, tb):
         pass
 
     def get_linum(self)-> int:
         return self.linum + 1
 
+    def source(self) -> str:
+        if self._source is None:
+            self._source = ''.join(self.lines)
+        return self._source
+
+    def tell(self) -> int:
+        if not self.isnext:
+            return self._offsets[-1]
+        return self._offsets[self.linum] + self.charpos
+
+    def seek(self, pos: int):
+        if pos >= self._offsets[-1]:
+            self.isnext = False
+            return
+
+        self.linum = bisect_right(self._offsets, pos) - 1
+        self.charpos = pos - self._offsets[self.linum]
+        self.isnext = True
+
+    def linum_at(self, pos: int) -> int:
+        return bisect_right(self._offsets, pos, hi=len(self.lines))
+
     def is_next(self):
         return self.isnext
 
@@ -222,11 +507,143 @@ class FileScanner(Scanner):
 
         return char
 
+class SourceScanner(FileScanner):
+    """
+    FileScanner over text already in memory (an editor buffer), with the
+    line numbers a FileScanner of the same file would give. `filename` is
+    only used in error messages.
+    """
+    def __init__(self, text: str, filename='<string>', engine='state'):
+        self.text = text
+        super().__init__(filename, engine)
+
+    def __enter__(self) -> Scanner:
+        self._set_lines([x for x in io.StringIO(self.text)])
+        return self
+
+class ReplayScanner(Scanner):
+    """
+    Hands already scanned tokens to the parser. Error messages come from
+    `source`, the scanner the tokens were read with, when there is one.
+    """
+    def __init__(self, tokens: List[Token], source: Scanner = None):
+        self._tokens = tokens
+        self.source_scanner = source
+        self.filename = getattr(source, 'filename', '<tokens>')
+        super().__init__()
+
+    def tokens(self) -> Iterator[Token]:
+        return iter(self._tokens)
+
+    def line_count(self) -> int:
+        return self.source_scanner.line_count() if self.source_scanner else 0
+
+    def line(self, linum: int) -> str:
+        return self.source_scanner.line(linum)
+
+class MmapFileScanner(FileScanner):
+    """
+    FileScanner over a memory-mapped file, the buffer is scanned by offset
+    and never split into lines. The 'state' engine counts the newlines it
+    reads, the newline offset index is only built the first time the
+    'regex' engine, an excerpt or a seek needs one. Closing keeps a copy
+    of the buffer so errors can still show their excerpt.
+    Source is expected to be ASCII (bytes are read as latin-1).
+    """
+    def __init__(self, filename: str, engine='state'):
+        self._file = None
+        self._buf = b''
+        self._size = 0
+        self._line_starts = None
+        self.pos = 0
+        super().__init__(filename, engine)
+
+    def __enter__(self) -> Scanner:
+        self._file = open(self.filename, 'rb')
+        try:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # empty file cannot be mapped
+            self._buf = b''
+
+        self._size = len(self._buf)
+        self._line_starts = None
+        self.pos = 0
+        self.linum = 0
+        self.isnext = self._size > 0
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if isinstance(self._buf, mmap.mmap):
+            # errors render their excerpt lazily, possibly after the block
+            buf = self._buf[:]
+            self._buf.close()
+            self._buf = buf
+
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def line_starts(self) -> List[int]:
+        """Start offset of every line, built lazily"""
+        if self._line_starts is None:
+            starts = [0]
+            buf, size = self._buf, self._size
+            i = buf.find(b'\n')
+            while i != -1 and i + 1 < size:
+                starts.append(i + 1)
+                i = buf.find(b'\n', i + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_count(self) -> int:
+        return len(self.line_starts()) if self._size else 0
+
+    def line(self, linum: int) -> str:
+        """Text of the 1-based line linum, including its newline"""
+        starts = self.line_starts()
+        start = starts[linum - 1]
+        end = starts[linum] if linum < len(starts) else self._size
+        return _text(self._buf[start:end])
+
+    def get_linum(self) -> int:
+        return self.linum + 1
+
+    def source(self):
+        return self._buf
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, pos: int):
+        self.pos = min(pos, self._size)
+        self.isnext = self.pos < self._size
+        self.linum = self.linum_at(self.pos) - 1
+
+    def linum_at(self, pos: int) -> int:
+        return bisect_right(self.line_starts(), pos)
+
+    def back(self):
+        self.pos -= 1
+        self.isnext = True
+        if self._buf[self.pos] == 10: # '\n'
+            self.linum -= 1
+
+    def next_char(self):
+        if not self.isnext:
+            return False
+
+        char = chr(self._buf[self.pos])
+        self.pos += 1
+        self.isnext = self.pos < self._size
+        if char == '\n':
+            self.linum += 1
+        return char
+
 class TextScanner(Scanner):
-    def __init__(self, text: str):
+    def __init__(self, text: str, engine='state'):
         self.text = text + "\n"
         self.pointer = 0
-        super().__init__()
+        super().__init__(engine)
 
     def spit(self):
         print(self.text)
@@ -244,11 +661,163 @@ class TextScanner(Scanner):
     def get_linum(self) -> int:
         return 1
 
+    def source(self) -> str:
+        return self.text
+
+    def tell(self) -> int:
+        return self.pointer
+
+    def seek(self, pos: int):
+        self.pointer = pos
+
+    def linum_at(self, pos: int) -> int:
+        return 1
+
     def back(self):
         self.pointer -= 1
 
     def next_char(self):
         if self.pointer < len(self.text):
-            x = deepcopy(self.text[self.pointer])
+            x = self.text[self.pointer]
             self.pointer += 1
             return x
+
+
+class TokenStream:
+    """
+    Token iterator over Scanner.tokens() with a bounded lookahead window.
+    peek(k) looks up to `lookahead` tokens ahead without consuming them,
+    mark()/reset() rewinds to a previous position (tokens consumed after the
+    oldest mark are kept until it is released).
+
+    With `errors`, a LexicalError of the scanner becomes a TokenType.ERROR
+    token holding its message and the scan resumes after the bad lexeme.
+    """
+    def __init__(self, scanner: Scanner, lookahead=4, errors=False):
+        self.scanner = scanner
+        self.lookahead = lookahead
+        self.errors = errors
+        self._tokens = scanner.tokens()
+        self._buffer = deque()
+        self._history = []
+        self._marks = []
+
+    def _fill(self, k: int) -> bool:
+        while len(self._buffer) < k:
+            try:
+                token = next(self._tokens, None)
+            except LexicalError as ex:
+                if not self.errors:
+                    raise
+                # the generator is done for, restart it past the bad lexeme
+                self.scanner.skip_lexeme()
+                self._tokens = self.scanner.tokens()
+                token = Token(TokenType.ERROR, str(ex), ex.linum)
+            if token is None:
+                return False
+            self._buffer.append(token)
+        return True
+
+    def peek(self, k=1) -> Token:
+        """k-th upcoming token (1-based), None after the last one"""
+        if not 0 < k <= self.lookahead:
+            raise ValueError(f"Lookahead must be between 1 and {self.lookahead}, got {k}")
+
+        if not self._fill(k):
+            return None
+        return self._buffer[k - 1]
+
+    def next(self) -> Token:
+        if not self._fill(1):
+            return None
+
+        token = self._buffer.popleft()
+        if self._marks:
+            self._history.append(token)
+        return token
+
+    def is_next(self) -> bool:
+        return self._fill(1)
+
+    def mark(self):
+        self._marks.append(len(self._history))
+
+    def release(self):
+        """Drop the latest mark, keeping the current position"""
+        self._marks.pop()
+        if not self._marks:
+            self._history.clear()
+
+    def reset(self):
+        """Rewind to the latest mark and drop it"""
+        pos = self._marks.pop()
+        self._buffer.extendleft(reversed(self._history[pos:]))
+        del self._history[pos:]
+        if not self._marks:
+            self._history.clear()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Token:
+        token = self.next()
+        if token is None:
+            raise StopIteration
+        return token
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays token storage: one array column per field instead of
+    one Token object per token. Token values are interned in `strings` and
+    stored as indexes, so comparing two buffered tokens is two int compares.
+    """
+    def __init__(self):
+        self.types = array('B')
+        self.values = array('I')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.linums = array('I')
+        self.strings: List[str] = []
+        self._codes = {}
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def append(self, token: Token, start=0, end=0):
+        self.types.append(token.ttype.value)
+        self.values.append(self.intern(token.value))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.linums.append(max(token.linum, 0))
+
+    def ttype(self, i: int) -> TokenType:
+        return TokenType(self.types[i])
+
+    def value(self, i: int) -> str:
+        return self.strings[self.values[i]]
+
+    def span(self, i: int) -> (int, int):
+        return self.starts[i], self.ends[i]
+
+    def same(self, i: int, j: int) -> bool:
+        """Equality of two buffered tokens, ignoring linum like Token"""
+        return self.types[i] == self.types[j] and self.values[i] == self.values[j]
+
+    def matches(self, i: int, token: Token) -> bool:
+        code = self._codes.get(token.value)
+        return self.types[i] == token.ttype.value and self.values[i] == code
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i: int) -> Token:
+        return Token(TokenType(self.types[i]), self.value(i), self.linums[i])
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self)):
+            yield self[i]
@@ -0,0 +1,504 @@
+"""
+SSA form for minic.ir functions, and the optimizations running on it.
+
+SSA(func) splits critical edges, computes dominators (Cooper, Harvey and
+Kennedy) and dominance frontiers, inserts phis for the names live across
+blocks (semi-pruned SSA) and renames every definition to `name.N`.
+write_back() leaves SSA again: phis become copies at the end of their
+predecessors and versions that never interfere get their name back.
+
+    ssa = SSA(func)
+    if ssa.sccp() + ssa.gvn():
+        ssa.write_back()
+"""
+from __future__ import annotations
+from typing import Dict, List, Set
+
+from minic import ir
+from minic.cfg import CFG, BasicBlock, linearize, liveness
+
+# commutative instructions, their operands are sorted to number them
+COMMUTATIVE = {'add', 'mul', 'eq', 'ne'}
+
+
+def base(name: str) -> str:
+    """Name a version was renamed from"""
+    return name.split('.')[0]
+
+
+class _Bottom:
+    """Lattice value of a name that is not a constant"""
+    def __repr__(self):
+        return 'BOTTOM'
+
+BOTTOM = _Bottom()
+
+
+class SSA:
+    def __init__(self, func: ir.Function):
+        self.func = func
+        # work on copies, func is only changed by write_back
+        instrs = [ir.Instr(x.op, x.dst, x.args) for x in func.instrs]
+        self.cfg = CFG(ir.Function(func.name, func.params, instrs))
+        self._edges: Set[str] = set()  # blocks added by _prepare
+        self._prepare()
+        self.idom = dominators(self.cfg)
+        self.frontiers = dominance_frontiers(self.cfg, self.idom)
+        self.children: Dict[str, List[str]] = {x.label: [] for x in self.cfg.blocks}
+        for label, parent in self.idom.items():
+            if label != parent:
+                self.children[parent].append(label)
+
+        self._versions: Dict[str, int] = {}
+        self._phis: Dict[int, str] = {}  # id of a phi -> name it merges
+        self._insert_phis()
+        self._rename()
+
+    # construction
+    def _prepare(self):
+        """Drop unreachable blocks, give the entry no predecessor, split critical edges"""
+        cfg = self.cfg
+        labels = set(cfg.by_label)
+
+        def fresh(*instrs) -> BasicBlock:
+            label = f"E{len(labels)}"
+            while label in labels:
+                label += 'e'
+            labels.add(label)
+            self._edges.add(label)
+            return BasicBlock(label, list(instrs))
+
+        reachable = cfg.reachable()
+        blocks = [x for x in cfg.blocks if x.label in reachable]
+        preds = {x.label: len([p for p in x.preds if p in reachable]) for x in blocks}
+        res = [fresh()] if cfg.entry.preds else []
+        tail = []
+
+        for i, block in enumerate(blocks):
+            res.append(block)
+            term = block.terminator
+            if term is None or term.op != 'jump_if_false':
+                continue
+
+            if preds[block.succs[0]] > 1:
+                # an empty block falling through into the successor
+                res.append(fresh())
+            target = term.args[1]
+            if preds[target] > 1:
+                edge = fresh(ir.Instr('jump', None, (target,)))
+                term.args = (term.args[0], edge.label)
+                tail.append(edge)
+
+        func = cfg.func
+        self.cfg = CFG(ir.Function(func.name, func.params, linearize(res + tail)))
+
+    def _defs(self) -> Dict[str, Set[str]]:
+        """Blocks defining each name, the parameters are defined at the entry"""
+        res = {p: {self.cfg.entry.label} for p in self.func.params}
+        for block in self.cfg.blocks:
+            for x in block.instrs:
+                if x.dst:
+                    res.setdefault(x.dst, set()).add(block.label)
+        return res
+
+    def _insert_phis(self):
+        # names read in a block before any write there, the others never
+        # need a phi
+        names = set()
+        for block in self.cfg.blocks:
+            written = set()
+            for x in block.instrs:
+                names.update(u for u in x.uses() if u not in written)
+                if x.dst:
+                    written.add(x.dst)
+
+        by_label = self.cfg.by_label
+        for name, blocks in self._defs().items():
+            if name not in names:
+                continue
+            todo, placed = list(blocks), set()
+            while todo:
+                for label in self.frontiers[todo.pop()]:
+                    if label in placed:
+                        continue
+                    placed.add(label)
+                    block = by_label[label]
+                    phi = ir.Instr('phi', name, tuple([name] * len(block.preds)))
+                    self._phis[id(phi)] = name
+                    block.instrs.insert(0, phi)
+                    if label not in blocks:
+                        todo.append(label)
+
+    def version(self, name: str) -> str:
+        key = base(name)
+        n = self._versions[key] = self._versions.get(key, 0) + 1
+        return f"{key}.{n}"
+
+    def _rename(self):
+        stacks: Dict[str, List[str]] = {p: [p] for p in self.func.params}
+        top = lambda name: stacks[name][-1] if stacks.get(name) else 0
+        by_label = self.cfg.by_label
+
+        todo = [(self.cfg.entry.label, None)]
+        while todo:
+            label, pushed = todo.pop()
+            if pushed is not None:
+                for name in pushed:
+                    stacks[name].pop()
+                continue
+
+            block, pushed = by_label[label], []
+            for x in block.instrs:
+                if x.op != 'phi':
+                    ops = x.operands()
+                    x.args = tuple(
+                        top(a) if i in ops and ir.is_register(a) else a for i, a in enumerate(x.args)
+                    )
+                if x.dst:
+                    name = self.version(x.dst)
+                    stacks.setdefault(x.dst, []).append(name)
+                    pushed.append(x.dst)
+                    x.dst = name
+
+            for succ in block.succs:
+                target = by_label[succ]
+                for j, pred in enumerate(target.preds):
+                    if pred != label:
+                        continue
+                    for phi in target.instrs:
+                        if phi.op != 'phi':
+                            break
+                        args = list(phi.args)
+                        args[j] = top(self._phis[id(phi)])
+                        phi.args = tuple(args)
+
+            todo.append((label, pushed))
+            todo += [(x, None) for x in reversed(self.children[label])]
+
+    # leaving SSA
+    def write_back(self):
+        """Replace phis by copies and store the code in func.instrs"""
+        by_label = self.cfg.by_label
+        for block in self.cfg.blocks:
+            phis = [x for x in block.instrs if x.op == 'phi']
+            if not phis:
+                continue
+            block.instrs = block.instrs[len(phis):]
+
+            for j, pred in enumerate(block.preds):
+                copies = [(x.dst, x.args[j]) for x in phis if x.dst != x.args[j]]
+                dsts = {d for d, _ in copies}
+                if any(s in dsts for _, s in copies):
+                    # parallel copy: go through fresh names
+                    temps = [(self.version(d), s) for d, s in copies]
+                    copies = temps + [(d, t) for (d, _), (t, _) in zip(copies, temps)]
+
+                target = by_label[pred]
+                at = len(target.instrs) - (1 if target.terminator is not None else 0)
+                target.instrs[at:at] = [ir.Instr('copy', d, (s,)) for d, s in copies]
+
+        # split edges nothing was copied into are merged back
+        blocks, targets = [], {}
+        for block in self.cfg.blocks:
+            if block.label in self._edges and all(x.op == 'jump' for x in block.instrs):
+                if block.instrs:
+                    targets[block.label] = block.instrs[0].args[0]
+                continue
+            blocks.append(block)
+        for block in blocks:
+            term = block.terminator
+            if term is not None and term.op == 'jump_if_false' and term.args[1] in targets:
+                term.args = (term.args[0], targets[term.args[1]])
+
+        self.func.instrs = _coalesce(linearize(blocks))
+
+    # optimizations
+    def sccp(self) -> int:
+        """
+        Sparse conditional constant propagation (Wegman and Zadeck). Uses of
+        names proven constant are replaced by the constant, and so are the
+        definitions of pure instructions; constant branches are left to the
+        fold pass. Returns the number of changes.
+        """
+        by_label = self.cfg.by_label
+        values: Dict[str, object] = {p: BOTTOM for p in self.func.params}
+        users: Dict[str, List[tuple]] = {}
+        for block in self.cfg.blocks:
+            for x in block.instrs:
+                for u in x.uses():
+                    users.setdefault(u, []).append((x, block))
+
+        edges, blocks = set(), set()
+        flow = [(None, self.cfg.entry.label)]
+        uses: List[tuple] = []
+
+        def value(a):
+            if isinstance(a, int):
+                return a
+            return values.get(a)  # None is top, not known yet
+
+        def update(x: ir.Instr, block: BasicBlock):
+            op = x.op
+            if op == 'phi':
+                new = None
+                for j, pred in enumerate(block.preds):
+                    if (pred, block.label) in edges:
+                        new = _meet(new, value(x.args[j]))
+            elif op == 'copy':
+                new = value(x.args[0])
+            elif op in ir.EVAL:
+                a, b = value(x.args[0]), value(x.args[1])
+                if op == 'mul' and (a == 0 or b == 0) and a is not None and b is not None:
+                    new = 0
+                elif a is None or b is None:
+                    new = None
+                elif a is BOTTOM or b is BOTTOM or (op == 'div' and ir.int32(b) == 0):
+                    new = BOTTOM
+                else:
+                    new = ir.EVAL[op](a, b)
+            elif op == 'jump_if_false':
+                cond = value(x.args[0])
+                if cond is None:
+                    return
+                if cond is BOTTOM or cond == 0:
+                    flow.append((block.label, x.args[1]))
+                if cond is BOTTOM or cond != 0:
+                    flow.append((block.label, block.succs[0]))
+                return
+            elif x.dst is None:
+                return
+            else:
+                new = BOTTOM  # load, call
+
+            old = values.get(x.dst)
+            if new is None or old is BOTTOM or old == new:
+                return
+            values[x.dst] = new if old is None else BOTTOM
+            uses.extend(users.get(x.dst, []))
+
+        while flow or uses:
+            if flow:
+                pred, label = flow.pop()
+                if (pred, label) in edges:
+                    continue
+                edges.add((pred, label))
+                block = by_label[label]
+                if label in blocks:
+                    for x in block.instrs:
+                        if x.op == 'phi':
+                            update(x, block)
+                    continue
+
+                blocks.add(label)
+                for x in block.instrs:
+                    update(x, block)
+                term = block.terminator
+                if term is None or term.op == 'jump':
+                    flow += [(label, s) for s in block.succs]
+            else:
+                x, block = uses.pop()
+                if block.label in blocks:
+                    update(x, block)
+
+        constants = {k: v for k, v in values.items() if isinstance(v, int)}
+        count = 0
+        for block in self.cfg.blocks:
+            for x in block.instrs:
+                if x.op == 'phi':
+                    # only counts once the phi itself is gone
+                    x.replace_uses(constants)
+                    continue
+                count += x.replace_uses(constants)
+                if x.dst in constants and x.op != 'call' and x.args != (constants[x.dst],):
+                    x.op, x.args = 'copy', (constants[x.dst],)
+                    count += 1
+            # phis turning constant become copies, after the other phis
+            phis = [x for x in block.instrs if x.op == 'phi']
+            for x in phis:
+                if x.dst in constants:
+                    x.op, x.args = 'copy', (constants[x.dst],)
+                    count += 1
+            if any(x.op == 'copy' for x in phis):
+                rest = block.instrs[len(phis):]
+                block.instrs = [x for x in phis if x.op == 'phi'] + [x for x in phis if x.op == 'copy'] + rest
+        return count
+
+    def gvn(self) -> int:
+        """
+        Dominator based global value numbering: an instruction computing
+        the same operation on the same values as one in a dominating block
+        is dropped, its uses read the first result. Returns the number of
+        dropped instructions.
+        """
+        leader: Dict[str, ir.Operand] = {}
+
+        def find(a):
+            while ir.is_register(a) and a in leader:
+                a = leader[a]
+            return a
+
+        table: Dict[tuple, str] = {}
+        removed: Set[int] = set()
+        count = 0
+        todo = [(self.cfg.entry.label, None)]
+        while todo:
+            label, undo = todo.pop()
+            if undo is not None:
+                for key in undo:
+                    del table[key]
+                continue
+
+            added = []
+            block = self.cfg.by_label[label]
+            for x in block.instrs:
+                args = tuple(find(a) if i in x.operands() else a for i, a in enumerate(x.args))
+                if x.op == 'copy':
+                    leader[x.dst] = args[0]
+                    continue
+                if x.op == 'phi':
+                    # every incoming value is the same, or the phi itself
+                    incoming = set(args) - {x.dst}
+                    if len(incoming) == 1:
+                        leader[x.dst] = incoming.pop()
+                        removed.add(id(x))
+                        count += 1
+                    continue
+                if x.op not in ir.EVAL:
+                    continue
+
+                key = (x.op, *(sorted(args, key=str) if x.op in COMMUTATIVE else args))
+                if key in table:
+                    leader[x.dst] = table[key]
+                    removed.add(id(x))
+                    count += 1
+                else:
+                    table[key] = x.dst
+                    added.append(key)
+
+            todo.append((label, added))
+            todo += [(x, None) for x in reversed(self.children[label])]
+
+        if count:
+            values = {k: find(k) for k in leader}
+            for block in self.cfg.blocks:
+                block.instrs = [x for x in block.instrs if id(x) not in removed]
+                for x in block.instrs:
+                    x.replace_uses(values)
+        return count
+
+
+def _meet(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a == b and a is not BOTTOM else BOTTOM
+
+
+def _coalesce(instrs: List[ir.Instr]) -> List[ir.Instr]:
+    """
+    Give versions of a name their original name back, when no two of them
+    are live at the same time, then drop the `x = x` copies this leaves.
+    """
+    _, live_out = liveness(instrs)
+    clash = set()
+    for i, x in enumerate(instrs):
+        if not x.dst:
+            continue
+        name = base(x.dst)
+        src = x.args[0] if x.op == 'copy' else None
+        for other in live_out[i]:
+            if other != x.dst and other != src and base(other) == name:
+                clash.add(name)
+
+    names = {}
+    for x in instrs:
+        for n in x.uses() + ([x.dst] if x.dst else []):
+            if base(n) not in clash:
+                names[n] = base(n)
+
+    res = []
+    for x in instrs:
+        x.replace_uses(names)
+        if x.dst in names:
+            x.dst = names[x.dst]
+        if x.op == 'copy' and x.args[0] == x.dst:
+            continue
+        res.append(x)
+    return res
+
+
+def dominators(cfg: CFG) -> Dict[str, str]:
+    """Immediate dominator of every reachable block, the entry is its own"""
+    order = _postorder(cfg)
+    index = {label: i for i, label in enumerate(order)}
+    entry = cfg.entry.label
+    idom = {entry: entry}
+
+    def intersect(a, b):
+        while a != b:
+            while index[a] < index[b]:
+                a = idom[a]
+            while index[b] < index[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for label in reversed(order):
+            if label == entry:
+                continue
+            preds = [p for p in cfg.by_label[label].preds if p in idom]
+            new = preds[0]
+            for p in preds[1:]:
+                new = intersect(p, new)
+            if idom.get(label) != new:
+                idom[label] = new
+                changed = True
+    return idom
+
+
+def dominance_frontiers(cfg: CFG, idom: Dict[str, str]) -> Dict[str, Set[str]]:
+    res = {label: set() for label in idom}
+    for label in idom:
+        preds = [p for p in cfg.by_label[label].preds if p in idom]
+        if len(preds) < 2:
+            continue
+        for p in preds:
+            runner = p
+            while runner != idom[label]:
+                res[runner].add(label)
+                runner = idom[runner]
+    return res
+
+
+def _postorder(cfg: CFG) -> List[str]:
+    res, seen = [], {cfg.entry.label}
+    todo = [(cfg.entry.label, iter(cfg.entry.succs))]
+    while todo:
+        label, succs = todo[-1]
+        nxt = next((s for s in succs if s not in seen), None)
+        if nxt is None:
+            res.append(label)
+            todo.pop()
+        else:
+            seen.add(nxt)
+            todo.append((nxt, iter(cfg.by_label[nxt].succs)))
+    return res
+
+
+def sccp(func: ir.Function) -> int:
+    ssa = SSA(func)
+    count = ssa.sccp()
+    if count:
+        ssa.write_back()
+    return count
+
+
+def gvn(func: ir.Function) -> int:
+    ssa = SSA(func)
+    count = ssa.gvn()
+    if count:
+        ssa.write_back()
+    return count
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Dict, Union
+from typing import Callable, Dict, List, Tuple, Union
 from dataclasses import dataclass
 
 
@@ -118,3 +118,102 @@ class ScopedSymbolTable:
             self.level,
             "\n".join(content) if len(content) else '\tNone'
         )
+
+
+class Scope:
+    """
+    A scope of a SymbolTable. It has the ScopedSymbolTable interface, but
+    insert and lookup go through the table, so they only make sense while
+    the scope is the innermost one.
+    """
+    __slots__ = ('table', 'name', 'level', 'parent_scope', 'names')
+
+    def __init__(self, table: SymbolTable, name: str, level: int, parent_scope: Scope = None):
+        self.table = table
+        self.name = name
+        self.level = level
+        self.parent_scope = parent_scope
+        self.names: List[str] = []  # undo log, the names bound in this scope
+
+    def init_builtin(self):
+        self.insert(TypeSymbol('int'))
+        self.insert(TypeSymbol('void'))
+        self.insert(TypeSymbol('bool'))
+
+    def insert(self, sym: Symbol):
+        self.table.insert(sym)
+
+    def lookup(self, name: str, deep=True) -> Symbol:
+        return self.table.lookup(name, deep)
+
+    def __str__(self):
+        table = ScopedSymbolTable(self.name, self.level, verbose=False)
+        table._table = {x: self.table.lookup(x, deep=False, log=False) for x in self.names}
+        return str(table)
+
+
+class SymbolTable:
+    """
+    LeBlanc-Cook symbol table. Every name maps to the stack of its
+    bindings, innermost last, and every scope keeps an undo log of the
+    names it bound: a lookup is one dict probe however deep the scopes are
+    nested, leaving a scope pops the bindings of its log.
+
+        table = SymbolTable()
+        table.enter('<global>').init_builtin()
+        table.insert(VarSymbol('x', table.lookup('int')))
+        table.leave()
+
+    hook(event, name, scope) is called on every 'enter', 'leave', 'insert'
+    and 'lookup' when given, nothing is logged otherwise.
+    """
+    def __init__(self, hook: Callable[[str, str, Scope], None] = None):
+        self.hook = hook
+        self.scope: Scope = None
+        self._bindings: Dict[str, List[Tuple[Scope, Symbol]]] = {}
+
+    def enter(self, name: str) -> Scope:
+        parent = self.scope
+        self.scope = Scope(self, name, parent.level + 1 if parent else 1, parent)
+        if self.hook:
+            self.hook('enter', name, self.scope)
+        return self.scope
+
+    def leave(self) -> Scope:
+        """Drop the innermost scope, return the one around it"""
+        scope, bindings = self.scope, self._bindings
+        if self.hook:
+            self.hook('leave', scope.name, scope)
+
+        for name in scope.names:
+            stack = bindings[name]
+            stack.pop()
+            if not stack:
+                del bindings[name]
+        self.scope = scope.parent_scope
+        return self.scope
+
+    def insert(self, sym: Symbol):
+        scope = self.scope
+        stack = self._bindings.setdefault(sym.name, [])
+        if stack and stack[-1][0] is scope:
+            stack[-1] = (scope, sym)
+        else:
+            stack.append((scope, sym))
+            scope.names.append(sym.name)
+
+        if self.hook:
+            self.hook('insert', sym.name, scope)
+
+    def lookup(self, name: str, deep=True, log=True) -> Symbol:
+        """Innermost binding of name, only in the innermost scope unless deep"""
+        if log and self.hook:
+            self.hook('lookup', name, self.scope)
+
+        stack = self._bindings.get(name)
+        if not stack:
+            return None
+
+        scope, sym = stack[-1]
+        return sym if deep or scope is self.scope else None
+
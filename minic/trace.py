@@ -0,0 +1,108 @@
+"""
+Instrumentation of the semantic pass. NodeVisitor reports to a Tracer:
+
+    enter, leave    a scope is opened/closed         name, level
+    insert, lookup  a symbol is bound/resolved       name, scope, level
+    node            a node and its children visited  kind, linum, time
+
+Tracer itself drops everything and is the default. Its `enabled` flag
+being False, the visitor does not even build the events, it walks the tree
+and resolves names exactly as it would without instrumentation. The
+sinks below record them:
+
+    tracer = MemoryTracer()
+    NodeVisitor(ast, tracer).start()
+    tracer.count('lookup')
+
+    with open('trace.jsonl', 'w') as f:
+        NodeVisitor(ast, JsonLinesTracer(f)).start()
+"""
+from __future__ import annotations
+import json
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, TextIO
+
+
+class Tracer:
+    """No-op sink, subclasses set `enabled` and record what emit gets"""
+    enabled = False
+
+    def emit(self, event: str, fields: Dict):
+        pass
+
+    def symbol(self, event: str, name: str, scope):
+        """SymbolTable hook"""
+        if event == 'enter' or event == 'leave':
+            self.emit(event, {'name': name, 'level': scope.level})
+        else:
+            self.emit(event, {'name': name, 'scope': scope.name, 'level': scope.level})
+
+    def node(self, node, elapsed: float):
+        # ForHeader is no Node and has no line
+        linum = getattr(node, 'linum', None)
+        self.emit('node', {'kind': node.__class__.__name__, 'linum': linum, 'time': elapsed})
+
+
+NULL = Tracer()
+
+
+class MemoryTracer(Tracer):
+    """Keeps the events as dicts, the event name under 'event'"""
+    enabled = True
+
+    def __init__(self):
+        self.events: List[Dict] = []
+
+    def emit(self, event: str, fields: Dict):
+        self.events.append({'event': event, **fields})
+
+    def of(self, event: str) -> List[Dict]:
+        return [x for x in self.events if x['event'] == event]
+
+    def count(self, event: str) -> int:
+        return sum(x['event'] == event for x in self.events)
+
+    def node_times(self) -> Dict[str, float]:
+        """Time spent per node kind, children included"""
+        res = Counter()
+        for x in self.events:
+            if x['event'] == 'node':
+                res[x['kind']] += x['time']
+        return dict(res)
+
+
+class JsonLinesTracer(Tracer):
+    """Writes one JSON object per event, `ts` is in seconds since its creation"""
+    enabled = True
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.start = time.perf_counter()
+
+    def emit(self, event: str, fields: Dict):
+        record = {'event': event, 'ts': time.perf_counter() - self.start, **fields}
+        self.stream.write(json.dumps(record) + '\n')
+
+
+class PrintTracer(Tracer):
+    """Human readable scopes and symbols, dumping each scope when it is left"""
+    enabled = True
+
+    def __init__(self, stream: TextIO = None):
+        self.stream = stream or sys.stdout
+
+    def symbol(self, event: str, name: str, scope):
+        if event == 'enter':
+            text = f"ENTER scope: {name}"
+        elif event == 'leave':
+            text = f"{scope}\nLEAVING scope: {name}"
+        elif event == 'insert':
+            text = f"Insert: {name}"
+        else:
+            text = f"Lookup: {name} @{scope.name}"
+        print(text, file=self.stream)
+
+    def node(self, node, elapsed: float):
+        pass
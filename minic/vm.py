@@ -0,0 +1,128 @@
+from __future__ import annotations
+from typing import List
+
+from minic.bytecode import Module, Op
+from minic.interpreter import c_div
+
+# plain ints, comparing against the enum members in the loop is slower
+CONST, LOAD, STORE, LOAD_GLOBAL, STORE_GLOBAL = Op.CONST.value, Op.LOAD.value, Op.STORE.value, Op.LOAD_GLOBAL.value, Op.STORE_GLOBAL.value
+ADD, SUB, MUL, DIV = Op.ADD.value, Op.SUB.value, Op.MUL.value, Op.DIV.value
+LT, GT, LE, GE, EQ, NE = Op.LT.value, Op.GT.value, Op.LE.value, Op.GE.value, Op.EQ.value, Op.NE.value
+JUMP, JUMP_IF_FALSE, CALL = Op.JUMP.value, Op.JUMP_IF_FALSE.value, Op.CALL.value
+RETURN, RETURN_NONE, POP = Op.RETURN.value, Op.RETURN_NONE.value, Op.POP.value
+
+
+class VM:
+    """
+    Runs a compiled Module. Calls push a frame (code, consts, pc, locals)
+    on an explicit list instead of recursing in python, so the call depth
+    of a Mini-C program is not bounded by the python recursion limit.
+
+        vm = VM(compile_program(ast))
+        vm.run('main')
+        vm.get_global('result')
+    """
+    def __init__(self, module: Module):
+        self.module = module
+        self.globals: List[int] = [0] * len(module.global_names)
+        self._global_slots = {name: i for i, name in enumerate(module.global_names)}
+        # indexing a list is faster than an array('i'), which boxes every read
+        self._code = [list(x.code) for x in module.functions]
+
+    def get_global(self, name: str) -> int:
+        return self.globals[self._global_slots[name]]
+
+    def set_global(self, name: str, value: int):
+        self.globals[self._global_slots[name]] = value
+
+    def run(self, name='main', *args):
+        index = self.module.index.get(name)
+        if index is None:
+            raise NameError(f"Function '{name}' is not defined")
+
+        func = self.module.functions[index]
+        if len(args) != func.arity:
+            raise TypeError(f"'{name}' expects {func.arity} arguments, got {len(args)}")
+
+        local = list(args) + [0] * (func.nlocals - func.arity)
+        return self._execute(index, local)
+
+    def _execute(self, index: int, local: List[int]):
+        functions, all_code, g = self.module.functions, self._code, self.globals
+        code, consts = all_code[index], functions[index].consts
+        stack = []
+        push, pop = stack.append, stack.pop
+        frames = []
+        pc = 0
+
+        while True:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+
+            if op == LOAD:
+                push(local[arg])
+            elif op == CONST:
+                push(consts[arg])
+            elif op == STORE:
+                local[arg] = stack[-1]
+            elif op == POP:
+                pop()
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == ADD:
+                r = pop()
+                stack[-1] = stack[-1] + r
+            elif op == SUB:
+                r = pop()
+                stack[-1] = stack[-1] - r
+            elif op == MUL:
+                r = pop()
+                stack[-1] = stack[-1] * r
+            elif op == LT:
+                r = pop()
+                stack[-1] = 1 if stack[-1] < r else 0
+            elif op == EQ:
+                r = pop()
+                stack[-1] = 1 if stack[-1] == r else 0
+            elif op == CALL:
+                callee = functions[arg]
+                n = callee.arity
+                if n:
+                    args = stack[-n:]
+                    del stack[-n:]
+                else:
+                    args = []
+                frames.append((code, consts, pc, local))
+                local = args + [0] * (callee.nlocals - n)
+                code, consts, pc = all_code[arg], callee.consts, 0
+            elif op == RETURN or op == RETURN_NONE:
+                value = pop() if op == RETURN else None
+                if not frames:
+                    return value
+                code, consts, pc, local = frames.pop()
+                push(value)
+            elif op == LOAD_GLOBAL:
+                push(g[arg])
+            elif op == STORE_GLOBAL:
+                g[arg] = stack[-1]
+            elif op == DIV:
+                r = pop()
+                stack[-1] = c_div(stack[-1], r)
+            elif op == GT:
+                r = pop()
+                stack[-1] = 1 if stack[-1] > r else 0
+            elif op == LE:
+                r = pop()
+                stack[-1] = 1 if stack[-1] <= r else 0
+            elif op == GE:
+                r = pop()
+                stack[-1] = 1 if stack[-1] >= r else 0
+            elif op == NE:
+                r = pop()
+                stack[-1] = 1 if stack[-1] != r else 0
+            else:
+                raise RuntimeError(f"Unknown opcode {op} at {pc - 2}")
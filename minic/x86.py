@@ -0,0 +1,306 @@
+"""
+x86-64 backend, GNU assembler syntax and the System V calling convention.
+
+Mini-C int is a C int: every value is 32 bits, arithmetic wraps. Functions
+and globals are exported with their own name (plus an optional prefix), so
+the output links against C code:
+
+    asm = compile_program(ast, prefix='mc_')
+    # gcc prog.s harness.c && ./a.out
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import minic.node as nd
+from minic import ir
+from minic.cfg import liveness
+from minic.ir import int32
+from minic.optimize import PASSES, Optimizer
+
+# Only callee saved registers are allocated, so nothing has to be saved
+# around a call. rax, rcx and rdx are scratch, the argument registers are
+# only written right before a call.
+CALLEE_SAVED = ['rbx', 'r12', 'r13', 'r14', 'r15']
+ARG_REGISTERS = ['rdi', 'rsi', 'rdx', 'rcx', 'r8', 'r9']
+
+REG32 = {
+    'rax': 'eax', 'rbx': 'ebx', 'rcx': 'ecx', 'rdx': 'edx', 'rsi': 'esi', 'rdi': 'edi',
+    **{f"r{i}": f"r{i}d" for i in range(8, 16)},
+}
+
+ARITHMETIC = {'add': 'addl', 'sub': 'subl', 'mul': 'imull'}
+SETCC = {'lt': 'l', 'gt': 'g', 'le': 'le', 'ge': 'ge', 'eq': 'e', 'ne': 'ne'}
+# jump taken when the comparison is false
+JUMP_FALSE = {'lt': 'jge', 'gt': 'jle', 'le': 'jg', 'ge': 'jl', 'eq': 'jne', 'ne': 'je'}
+
+
+@dataclass
+class Interval:
+    """Instructions [start, end] where vreg holds a value"""
+    vreg: str
+    start: int
+    end: int
+    register: Optional[str] = None
+    slot: Optional[int] = None
+
+
+def intervals(func: ir.Function, live_in, live_out) -> List[Interval]:
+    res: Dict[str, Interval] = {}
+
+    def extend(vreg, i):
+        iv = res.get(vreg)
+        if iv is None:
+            res[vreg] = Interval(vreg, i, i)
+        else:
+            iv.start, iv.end = min(iv.start, i), max(iv.end, i)
+
+    # parameters are written before the first instruction
+    for p in func.params:
+        extend(p, -1)
+    for i, x in enumerate(func.instrs):
+        for vreg in live_in[i] | live_out[i]:
+            extend(vreg, i)
+        if x.dst:
+            extend(x.dst, i)
+    return sorted(res.values(), key=lambda x: (x.start, x.end))
+
+
+class LinearScan:
+    """
+    Poletto and Sarkar linear scan: intervals are visited by start, a
+    register is freed once its interval ended, and when none is free the
+    interval ending last is spilled to a stack slot.
+    """
+    def __init__(self, registers: List[str] = CALLEE_SAVED):
+        self.registers = registers
+        self.slots = 0
+
+    def allocate(self, ivs: List[Interval]) -> List[Interval]:
+        free = list(reversed(self.registers))
+        active: List[Interval] = []
+
+        for iv in ivs:
+            for old in [x for x in active if x.end < iv.start]:
+                active.remove(old)
+                free.append(old.register)
+
+            if free:
+                iv.register = free.pop()
+                active.append(iv)
+            else:
+                last = max(active, key=lambda x: x.end)
+                if last.end > iv.end:
+                    iv.register, last.register = last.register, None
+                    last.slot = self._slot()
+                    active.remove(last)
+                    active.append(iv)
+                else:
+                    iv.slot = self._slot()
+        return ivs
+
+    def _slot(self) -> int:
+        self.slots += 1
+        return self.slots - 1
+
+
+class X86Generator:
+    def __init__(self, program: ir.Program, prefix=''):
+        self.program = program
+        self.prefix = prefix
+        # name -> (registers used, spilled intervals)
+        self.stats: Dict[str, Tuple[int, int]] = {}
+
+    def symbol(self, name: str) -> str:
+        return self.prefix + name
+
+    def assembly(self) -> str:
+        lines = ["    .text"]
+        for func in self.program.functions:
+            lines += self._function(func)
+
+        if self.program.globals:
+            lines.append("    .bss")
+        for name in self.program.globals:
+            sym = self.symbol(name)
+            lines += [
+                f"    .globl {sym}", "    .align 4", f"    .type {sym}, @object",
+                f"    .size {sym}, 4", f"{sym}:", "    .zero 4",
+            ]
+        lines.append('    .section .note.GNU-stack,"",@progbits')
+        return "\n".join(lines) + "\n"
+
+    # function
+    def _function(self, func: ir.Function) -> List[str]:
+        instrs = func.instrs
+        live_in, live_out = liveness(instrs)
+        allocator = LinearScan()
+        ivs = allocator.allocate(intervals(func, live_in, live_out))
+
+        saved = [r for r in CALLEE_SAVED if any(x.register == r for x in ivs)]
+        self.stats[func.name] = (len(saved), sum(1 for x in ivs if x.slot is not None))
+
+        self._locs = {}
+        for iv in ivs:
+            if iv.register is not None:
+                self._locs[iv.vreg] = '%' + REG32[iv.register]
+            else:
+                self._locs[iv.vreg] = f"{-8 * (len(saved) + iv.slot + 1)}(%rbp)"
+        self._ret = f".L{self.symbol(func.name)}_ret"
+        self._func = func
+
+        frame = 8 * allocator.slots
+        if (8 * len(saved) + frame) % 16:
+            frame += 8
+
+        sym = self.symbol(func.name)
+        out = [f"    .globl {sym}", f"    .type {sym}, @function", f"{sym}:",
+               "    pushq %rbp", "    movq %rsp, %rbp"]
+        out += [f"    pushq %{r}" for r in saved]
+        if frame:
+            out.append(f"    subq ${frame}, %rsp")
+
+        for i, p in enumerate(func.params):
+            if p not in self._locs:
+                continue
+            src = '%' + REG32[ARG_REGISTERS[i]] if i < 6 else f"{16 + 8 * (i - 6)}(%rbp)"
+            out += self._move(src, self._locs[p])
+
+        self._out = out
+        i = 0
+        while i < len(instrs):
+            i = self._instr(i, live_out)
+
+        out.append(f"{self._ret}:")
+        if saved:
+            out.append(f"    leaq {-8 * len(saved)}(%rbp), %rsp")
+            out += [f"    popq %{r}" for r in reversed(saved)]
+        else:
+            out.append("    movq %rbp, %rsp")
+        out += ["    popq %rbp", "    ret", f"    .size {sym}, .-{sym}"]
+        return out
+
+    # operands
+    def _label(self, label: str) -> str:
+        return f".L{self.symbol(self._func.name)}_{label}"
+
+    def _opnd(self, x: ir.Operand) -> str:
+        if isinstance(x, int):
+            return f"${int32(x)}"
+        return self._locs[x]
+
+    @staticmethod
+    def _is_mem(x: str) -> bool:
+        return x.endswith(')')
+
+    @staticmethod
+    def _is_reg(x: str) -> bool:
+        return x.startswith('%')
+
+    def _move(self, src: str, dst: str) -> List[str]:
+        if src == dst:
+            return []
+        if self._is_mem(src) and self._is_mem(dst):
+            return [f"    movl {src}, %eax", f"    movl %eax, {dst}"]
+        return [f"    movl {src}, {dst}"]
+
+    def _push(self, x: ir.Operand) -> str:
+        src = self._opnd(x)
+        if self._is_reg(src):
+            # the 64 bit register, the callee only reads the low half
+            src = '%' + next(r for r, r32 in REG32.items() if '%' + r32 == src)
+        return f"    pushq {src}"
+
+    # instructions
+    def _instr(self, i: int, live_out) -> int:
+        """Emit instrs[i], return the index of the next one to emit"""
+        instrs, out = self._func.instrs, self._out
+        x = instrs[i]
+        op, args = x.op, x.args
+        nxt = instrs[i + 1] if i + 1 < len(instrs) else None
+
+        if op == 'label':
+            out.append(f"{self._label(args[0])}:")
+        elif op == 'jump':
+            if not (nxt and nxt.op == 'label' and nxt.args[0] == args[0]):
+                out.append(f"    jmp {self._label(args[0])}")
+        elif op == 'jump_if_false':
+            cond = args[0]
+            if isinstance(cond, int):
+                if int32(cond) == 0:
+                    out.append(f"    jmp {self._label(args[1])}")
+            else:
+                out += [f"    cmpl $0, {self._opnd(cond)}", f"    je {self._label(args[1])}"]
+        elif op == 'copy':
+            out += self._move(self._opnd(args[0]), self._locs[x.dst])
+        elif op in ARITHMETIC:
+            self._arithmetic(x)
+        elif op == 'div':
+            a, b, dst = self._opnd(args[0]), self._opnd(args[1]), self._locs[x.dst]
+            out += [f"    movl {a}, %eax", "    cltd"]
+            if b.startswith('$'):
+                out += [f"    movl {b}, %ecx", "    idivl %ecx"]
+            else:
+                out.append(f"    idivl {b}")
+            out += self._move('%eax', dst)
+        elif op in SETCC:
+            a, b = self._opnd(args[0]), self._opnd(args[1])
+            if self._is_reg(a):
+                out.append(f"    cmpl {b}, {a}")
+            else:
+                out += [f"    movl {a}, %eax", f"    cmpl {b}, %eax"]
+
+            # compare and branch when the flag is only used by the branch
+            if (nxt and nxt.op == 'jump_if_false' and nxt.args[0] == x.dst
+                    and x.dst not in live_out[i + 1]):
+                out.append(f"    {JUMP_FALSE[op]} {self._label(nxt.args[1])}")
+                return i + 2
+            out += [f"    set{SETCC[op]} %al", "    movzbl %al, %eax"]
+            out += self._move('%eax', self._locs[x.dst])
+        elif op == 'load':
+            out += self._move(f"{self.symbol(args[0])}(%rip)", self._locs[x.dst])
+        elif op == 'store':
+            out += self._move(self._opnd(args[1]), f"{self.symbol(args[0])}(%rip)")
+        elif op == 'call':
+            self._call(x)
+        elif op == 'return':
+            if args:
+                out += self._move(self._opnd(args[0]), '%eax')
+            else:
+                out.append("    xorl %eax, %eax")
+            if nxt is not None:
+                out.append(f"    jmp {self._ret}")
+        else:
+            raise ValueError(f"Unknown instruction {x}")
+        return i + 1
+
+    def _arithmetic(self, x: ir.Instr):
+        a, b, dst = self._opnd(x.args[0]), self._opnd(x.args[1]), self._locs[x.dst]
+        ins = ARITHMETIC[x.op]
+        if self._is_reg(dst) and dst != b:
+            self._out += self._move(a, dst) + [f"    {ins} {b}, {dst}"]
+        else:
+            self._out += [f"    movl {a}, %eax", f"    {ins} {b}, %eax"] + self._move('%eax', dst)
+
+    def _call(self, x: ir.Instr):
+        out = self._out
+        name, args = x.args[0], x.args[1:]
+        stacked = args[6:]
+        pad = 8 if len(stacked) % 2 else 0
+        if pad:
+            out.append("    subq $8, %rsp")
+        out += [self._push(a) for a in reversed(stacked)]
+        for reg, a in zip(ARG_REGISTERS, args):
+            out.append(f"    movl {self._opnd(a)}, %{REG32[reg]}")
+
+        out.append(f"    call {self.symbol(name)}")
+        if stacked or pad:
+            out.append(f"    addq ${8 * len(stacked) + pad}, %rsp")
+        if x.dst:
+            out += self._move('%eax', self._locs[x.dst])
+
+
+def compile_program(root: nd.Program, prefix='', passes: Iterable[str] = PASSES) -> str:
+    """Assembly text of root, the IR is optimized with `passes` first"""
+    program = Optimizer(passes).optimize(ir.build(root))
+    return X86Generator(program, prefix).assembly()
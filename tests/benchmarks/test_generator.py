@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.generator import generate, letters
+from benchmarks.pipeline import main
+from minic.nodevisitor import NodeVisitor
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+
+@pytest.mark.parametrize("i, name", [(0, 'a'), (25, 'z'), (26, 'ba'), (27, 'bb')])
+def test_letters(i, name):
+    assert letters(i) == name
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("depth", [0, 1, 3])
+def test_generated_program_is_valid(seed, depth):
+    text = generate(seed, functions=4, depth=depth)
+    NodeVisitor(Parser(TextScanner(text)).start()).start()
+
+def test_generate_seeded():
+    assert generate(1) == generate(1)
+    assert generate(1) != generate(2)
+
+def test_pipeline_report(tmp_path):
+    output = tmp_path / "bench.json"
+    report = main(['--sizes', '2', '3', '--repeat', '1', '--output', str(output)])
+
+    assert output.exists()
+    assert [x['functions'] for x in report['results']] == [2, 3]
+    for res in report['results']:
+        assert set(res['time']) == {'lex', 'parse', 'check', 'total'}
+        assert res['tokens'] > 0 and res['tokens_per_sec'] > 0
@@ -0,0 +1,79 @@
+import pytest
+
+from minic.arena import AstArena, Kind
+from minic.exceptions import SemanticError
+from minic.nodevisitor import ArenaNodeVisitor
+from minic.parser import Parser
+from minic.scanner import FileScanner, SourceScanner, TextScanner
+
+
+def _parse(text):
+    return Parser(TextScanner(text)).start()
+
+@pytest.mark.parametrize("filename", [
+    "examples/example10-1.c",
+    "examples/example10-5.c",
+])
+def test_roundtrip_file(filename):
+    with FileScanner(filename) as scan:
+        ast = Parser(scan).start()
+
+    arena = AstArena.from_tree(ast)
+    assert arena.kind(arena.root) == Kind.Program
+    assert arena.to_tree() == ast
+
+@pytest.mark.parametrize("text", [
+    "int x; int f(void){ x = a[2] + b.c * (3 / 4); return; }",
+    "int f(int a, int b){ for(i = 0; i < 3; i = i + 1) { g(); g(1, a); } goto end; break; }",
+    "int f(void){ while(x != 1) if(x > 1) x = 1; else { x = 2; } }",
+])
+def test_roundtrip(text):
+    ast = _parse(text)
+    assert AstArena.from_tree(ast).to_tree() == ast
+
+def test_roundtrip_error_nodes():
+    with SourceScanner("int f(void) { x = ; }\nint int;\n") as scan:
+        ast = Parser(scan, recover=True).start()
+    assert AstArena.from_tree(ast).to_tree() == ast
+
+def test_roundtrip_big_values():
+    ast = _parse("int f(void){ x = 99999999999999999999; y = a[18446744073709551616] - 1; }")
+    arena = AstArena.from_tree(ast)
+    assert len(arena.bigs) == 2
+    assert arena.to_tree() == ast
+
+def test_long_chain():
+    depth = 5000
+    ast = _parse("int f(void){ x = " + " - ".join(["x"] * depth) + "; }")
+    res = AstArena.from_tree(ast).to_tree().declarations[0].body[0].value
+
+    for _ in range(depth - 1):
+        assert res.operator == '-' and res.right.value == 'x'
+        res = res.left
+    assert res.value == 'x'
+
+def test_many_children():
+    # more children than an unsigned short holds
+    ast = _parse("int x; " * 70000)
+    arena = AstArena.from_tree(ast)
+    assert arena.counts[arena.child(arena.root, 0)] == 70000
+    assert arena.to_tree() == ast
+
+def test_strings_interned():
+    arena = AstArena.from_tree(_parse("int x; int y; int f(void){ x = x + x; }"))
+    assert arena.strings.count('x') == 1
+    assert arena.strings.count('int') == 1
+
+def test_arena_visitor():
+    with FileScanner("examples/example10-1.c") as scan:
+        arena = AstArena.from_tree(Parser(scan).start())
+    ArenaNodeVisitor(arena).start()
+
+@pytest.mark.parametrize("text", [
+    "int f(void){ return y; }",
+    "int x; int f(void){ return x(); }",
+    "int g(int a){ return a; } int f(void){ return g(); }",
+])
+def test_arena_visitor_error(text):
+    with pytest.raises(SemanticError):
+        ArenaNodeVisitor(AstArena.from_tree(_parse(text))).start()
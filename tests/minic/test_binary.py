@@ -0,0 +1,106 @@
+import pytest
+
+import minic.node as nd
+from benchmarks.generator import generate
+from minic import binary
+from minic.parser import Parser
+from minic.scanner import FileScanner, SourceScanner, TextScanner
+
+
+def _parse(text):
+    return Parser(TextScanner(text)).start()
+
+@pytest.mark.parametrize("n, exp", [(0, b'\x00'), (127, b'\x7f'), (128, b'\x80\x01'), (300, b'\xac\x02')])
+def test_varint(n, exp):
+    out = bytearray()
+    binary.varint(n, out)
+    assert bytes(out) == exp
+
+@pytest.mark.parametrize("n", [0, 1, -1, 63, -64, 2 ** 40, -2 ** 40])
+def test_zigzag(n):
+    assert binary.unzigzag(binary.zigzag(n)) == n
+
+@pytest.mark.parametrize("filename", ["examples/example10-1.c", "examples/example10-5.c"])
+def test_roundtrip_file(filename):
+    with FileScanner(filename) as scan:
+        ast = Parser(scan).start()
+    assert binary.loads(binary.dumps(ast)) == ast
+
+@pytest.mark.parametrize("text", [
+    "int x; int f(void){ x = a[2] + b.c * (3 / 4); return; }",
+    "int f(int a, int b){ for(i = 0; i < 3; i = i + 1) { g(); g(1, a); } goto end; break; }",
+    "int f(void){ while(x != 1) if(x > 1) x = 1; else { x = 2; } }",
+])
+def test_roundtrip(text):
+    ast = _parse(text)
+    assert binary.loads(binary.dumps(ast)) == ast
+
+def test_roundtrip_params_on_own_lines():
+    with SourceScanner("int f(int a,\n int b)\n{\n a = b;\n}\n") as scan:
+        ast = Parser(scan).start()
+    assert binary.loads(binary.dumps(ast)) == ast
+
+def test_roundtrip_error_nodes():
+    with SourceScanner("int f(void) { x = ; }\nint int;\n") as scan:
+        ast = Parser(scan, recover=True).start()
+    assert binary.loads(binary.dumps(ast)) == ast
+
+def test_roundtrip_long_chain():
+    depth = 3000
+    data = binary.dumps(_parse("int f(void){ x = " + " + ".join(["a"] * depth) + "; }"))
+    for func in [binary.loads(data).declarations[0], binary.Reader(data).function('f')]:
+        res = func.body[0].value
+        for _ in range(depth - 1):
+            assert res.operator == '+' and res.right.value == 'a'
+            res = res.left
+        assert res.value == 'a'
+
+@pytest.mark.parametrize("seed", range(3))
+def test_roundtrip_generated(seed):
+    ast = _parse(generate(seed, functions=10, depth=2))
+    assert binary.loads(binary.dumps(ast)) == ast
+
+def test_strings_once():
+    data = binary.dumps(_parse("int x; int y; int f(void){ x = x + x; y = x; }"))
+    assert data.count(b'int') == 1
+    assert data.count(b'x') == 1
+
+def test_stream(tmp_path):
+    ast = _parse("int x; int f(void){ x = 1; } int g(void){ f(); }")
+    path = tmp_path / "prog.mca"
+    with open(path, 'wb') as f:
+        binary.dump(ast, f)
+
+    with open(path, 'rb') as f:
+        decls = binary.iterload(f)
+        assert next(decls) == ast.declarations[0]
+        assert [x.name for x in decls] == ['f', 'g']
+
+@pytest.mark.parametrize("data, message", [
+    (b'PK\x03\x04', "Not a binary"),
+    (binary.MAGIC + bytes([binary.VERSION + 1]), "Unsupported"),
+])
+def test_bad_header(data, message):
+    with pytest.raises(ValueError, match=message):
+        binary.loads(data)
+    with pytest.raises(ValueError, match=message):
+        binary.Reader(data)
+
+def test_reader():
+    ast = _parse(generate(1, functions=6, depth=2))
+    reader = binary.Reader(binary.dumps(ast))
+    funcs = [x for x in ast.declarations if isinstance(x, nd.FuncDecl)]
+
+    assert len(reader) == len(ast.declarations)
+    assert reader.names() == [x.name for x in funcs]
+    assert reader.function(funcs[2].name) == funcs[2]
+    assert reader.program() == ast
+
+def test_reader_skips_bodies():
+    ast = _parse("int f(int a){\n return a;\n}\nint g(void){\n\n f(1);\n}\nint x;")
+    reader = binary.Reader(binary.dumps(ast))
+    head = reader.declaration(1, body=False)
+    assert (head.name, head.body) == ('g', None)
+    # line numbers do not depend on the bodies skipped before
+    assert reader.declaration(2) == ast.declarations[2]
+    assert reader.function('g') == ast.declarations[1]
@@ -0,0 +1,133 @@
+import marshal
+import os
+import zlib
+
+import pytest
+
+from minic import cache as mc
+from minic.arena import AstArena
+from minic.cache import ParseCache
+from minic.parser import Parser
+from minic.scanner import FileScanner
+
+
+def _parse(filename):
+    with FileScanner(filename) as scan:
+        return Parser(scan).start()
+
+def _write(path, text):
+    path.write_text(text + "\n")
+    return str(path)
+
+@pytest.mark.parametrize("filename", ["examples/example10-1.c", "examples/example10-5.c"])
+def test_dumps_loads(filename):
+    ast = _parse(filename)
+    arena = mc.loads(mc.dumps(AstArena.from_tree(ast)))
+    assert arena.to_tree() == ast
+
+def test_loads_other_format():
+    with pytest.raises(ValueError):
+        mc.loads(zlib.compress(marshal.dumps((mc.FORMAT + 1, -1, [], {}, []))))
+
+def test_hit_and_miss(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    ast = cache.parse("examples/example10-1.c")
+    assert cache.stats()['misses'] == 1
+
+    assert cache.parse("examples/example10-1.c") == ast == _parse("examples/example10-1.c")
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'hit_rate': 0.5}
+
+def test_keyed_by_content(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    a = _write(tmp_path / "a.c", "int x;")
+    b = _write(tmp_path / "b.c", "int x;")
+    cache.parse(a)
+    cache.parse(b)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    _write(tmp_path / "a.c", "int y;")
+    assert cache.parse(a).declarations[0].name == 'y'
+    assert cache.misses == 2
+
+def test_parser_stamp(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    key = cache.key(b"int x;")
+    monkeypatch.setattr(mc, 'parser_stamp', lambda: b"another parser")
+    assert cache.key(b"int x;") != key
+
+def test_big_constant(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    path = _write(tmp_path / "big.c", "int f(void){ x = 99999999999999999999; }")
+    ast = cache.parse(path)
+    assert cache.parse(path) == ast == _parse(path)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_unstorable_ast(tmp_path, monkeypatch):
+    def dumps(arena):
+        raise OverflowError("int too big to convert")
+    monkeypatch.setattr(mc, 'dumps', dumps)
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    path = _write(tmp_path / "a.c", "int x;")
+    assert cache.parse(path) == _parse(path)
+    assert os.listdir(cache.directory) == []
+
+def test_corrupt_entry(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    path = _write(tmp_path / "a.c", "int x;")
+    cache.parse(path)
+    with open(path, 'rb') as f:
+        key = cache.key(f.read())
+    with open(cache.path(key), 'wb') as f:
+        f.write(b"garbage")
+
+    assert cache.parse(path).declarations[0].name == 'x'
+    assert (cache.hits, cache.misses) == (0, 2)
+
+def test_lru_eviction(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    names = ['a', 'b', 'c']
+    paths = [_write(tmp_path / f"{x}.c", f"int {x};") for x in names]
+    for i, path in enumerate(paths):
+        cache.parse(path)
+        # mtime granularity can be coarse, order the entries explicitly
+        with open(path, 'rb') as f:
+            os.utime(cache.path(cache.key(f.read())), ns=(i, i))
+    keys = [cache.key(f"int {x};\n".encode()) for x in names]
+    entry = os.path.getsize(cache.path(keys[0]))
+
+    # a hit makes a.c the most recent one
+    cache.parse(paths[0])
+    cache.max_bytes = 2 * entry
+    assert cache.evict() == 1
+    assert not os.path.exists(cache.path(keys[1]))
+    assert os.path.exists(cache.path(keys[0]))
+    assert cache.stats()['evictions'] == 1
+
+def test_no_temporary_files(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.parse(_write(tmp_path / "a.c", "int x;"))
+    assert all(x.endswith(mc.SUFFIX) for x in os.listdir(cache.directory))
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+def test_failed_write_removes_temporary(tmp_path, monkeypatch):
+    def replace(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(mc.os, 'replace', replace)
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    with pytest.raises(OSError):
+        cache.parse(_write(tmp_path / "a.c", "int x;"))
+    assert os.listdir(cache.directory) == []
+
+def test_evict_stale_temporary_files(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    stale, fresh = [os.path.join(cache.directory, x + mc.TMP_SUFFIX) for x in ["stale", "fresh"]]
+    for path in [stale, fresh]:
+        with open(path, 'wb') as f:
+            f.write(b"partial entry")
+    os.utime(stale, (0, 0))
+
+    assert cache.evict() == 0
+    assert os.listdir(cache.directory) == ["fresh" + mc.TMP_SUFFIX]
@@ -0,0 +1,53 @@
+from minic import ir
+from minic.cfg import CFG, liveness
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+
+def _func(text, name='f'):
+    return ir.build(Parser(TextScanner(text)).start()).function(name)
+
+LOOP = """
+int f(int n){
+  int s;
+  while(n > 0){
+    if(n == 5) break;
+    s = s + n;
+    n = n - 1;
+  }
+  return s;
+}
+"""
+
+def test_blocks():
+    cfg = CFG(_func(LOOP))
+    # the implicit return closing every function is a block of its own
+    assert [x.label for x in cfg.blocks] == ['B1', 'L1', 'B3', 'B4', 'L3', 'L2', 'B7']
+    assert cfg.entry.succs == ['L1']
+    assert cfg.by_label['L1'].succs == ['B3', 'L2']
+    assert cfg.by_label['B4'].succs == ['L2']
+    assert sorted(cfg.by_label['L2'].preds) == ['B4', 'L1']
+    assert cfg.by_label['L3'].succs == ['L1']
+    # the loop header is reached from the entry and the back edge
+    assert cfg.by_label['L1'].preds == ['B1', 'L3']
+
+def test_roundtrip():
+    func = _func(LOOP)
+    assert [str(x) for x in CFG(func).instrs()] == [str(x) for x in func.instrs]
+
+def test_unreachable():
+    cfg = CFG(_func("int f(int n){ return n; n = 1; return 2; }"))
+    assert [x.label for x in cfg.blocks] == ['B1', 'B2', 'B3']
+    assert cfg.reachable() == {'B1'}
+
+def test_empty():
+    func = ir.Function('f', [], [])
+    assert [x.label for x in CFG(func).blocks] == ['B1']
+
+def test_liveness():
+    func = _func(LOOP)
+    live_in, live_out = liveness(func.instrs)
+    # n is read by the loop condition, live all around the loop
+    header = next(i for i, x in enumerate(func.instrs) if x.op == 'label')
+    assert {'n', 's'} <= live_in[header]
+    assert live_out[-1] == set()
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from minic import driver
+from minic.parser import Parser
+from minic.scanner import FileScanner
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+@pytest.fixture
+def files(tmp_path):
+    return [
+        _write(tmp_path / "b" / "ok.c", "int x;\nint f(void){\n  x = 1;\n}\n"),
+        _write(tmp_path / "a" / "syntax.c", "int f(void){\n  x = 1\n}\n"),
+        _write(tmp_path / "a" / "semantic.c", "int f(void){\n  y = 1;\n}\n"),
+        _write(tmp_path / "a" / "notes.txt", "not Mini-C"),
+    ]
+
+def test_find_files(tmp_path, files):
+    found = driver.find_files([str(tmp_path), "examples/example10-5.c"])
+    assert found == [files[2], files[1], files[0], "examples/example10-5.c"]
+
+@pytest.mark.parametrize("i, exp", [
+    (0, []),
+    (1, [(2, 'syntax', "Expecting semicolon ';' after a statement")]),
+    (2, [(2, 'semantic', "Variable 'y' has not been declared")]),
+])
+def test_compile_file(files, i, exp):
+    res = driver.compile_file(files[i])
+    assert [(d.linum, d.kind, d.message) for d in res.diagnostics] == exp
+    assert res.ok == (not exp)
+    assert res.tokens > 0 and 'parse' in res.timings
+    assert res.ast is None
+
+def test_diagnostic_code(files):
+    assert [d.code for d in driver.compile_file(files[1]).diagnostics] == ['missing-semicolon']
+    assert [d.code for d in driver.compile_file(files[2]).diagnostics] == ['semantic']
+
+def test_missing_file(tmp_path):
+    res = driver.compile_file(str(tmp_path / "missing.c"))
+    assert [d.kind for d in res.diagnostics] == ['error']
+    assert set(res.timings) == {'scan'}
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_compile_files(files, jobs):
+    paths = files[:3] * 3
+    results = driver.compile_files(paths, jobs=jobs, chunksize=2, keep_ast=True)
+    assert [x.path for x in results] == paths
+    assert [x.ok for x in results] == [True, False, False] * 3
+    assert results[0].program().declarations[1].name == 'f'
+
+def test_main(tmp_path, files, capsys):
+    assert driver.main([str(tmp_path / "b"), "-j", "1"]) == 0
+    assert driver.main([str(tmp_path), "-j", "1", "--json"]) == 1
+
+    out = capsys.readouterr().out
+    report = json.loads(out[out.index("{"):])
+    assert (report['files'], report['failed']) == (3, 2)
+    assert [x['diagnostics'][0]['kind'] for x in report['results'][:2]] == ['semantic', 'syntax']
+
+def test_max_errors(tmp_path):
+    path = _write(tmp_path / "errors.c", "int f(void){\n  x = ;\n  y = 1;\n  z = ;\n}\n")
+    assert len(driver.compile_file(path).diagnostics) == 1
+
+    res = driver.compile_file(path, max_errors=10)
+    assert [(d.linum, d.kind) for d in res.diagnostics] == [(2, 'syntax'), (4, 'syntax')]
+    assert 'check' not in res.timings
+    assert len(driver.compile_files([path], jobs=1, max_errors=1)[0].diagnostics) == 1
+
+@pytest.mark.parametrize("text, exp", [
+    ("int f(void){ x = ; }\nint abc1;\n", (1, 'unexpected-token')),  # syntax error first
+    ("int f(void){ x = 1; }\nint abc1;\n", (2, 'lexical')),
+    ("int f(void){ x = 1; }\nabc1 = 2;\n", (2, 'lexical')),  # between two declarations
+    ("int f(void){ return a1; }\n", (1, 'lexical')),
+])
+def test_first_error(tmp_path, text, exp):
+    # the first error a parse scanning as it goes finds
+    path = _write(tmp_path / "first.c", text)
+    with pytest.raises(Exception) as ex:
+        with FileScanner(path) as scan:
+            Parser(scan).start()
+    assert [(d.linum, d.code) for d in driver.compile_file(path).diagnostics] == [exp]
+    assert driver.diagnostic(path, ex.value).linum == exp[0]
+
+def test_max_errors_lexical(tmp_path):
+    path = _write(tmp_path / "lexical.c", "int f(void){\n  x1 = 1;\n  y = ;\n}\nint g(void){ return 2a; }\n")
+    res = driver.compile_file(path)
+    assert [(d.linum, d.kind, d.code) for d in res.diagnostics] == [(2, 'syntax', 'lexical')]
+
+    res = driver.compile_file(path, max_errors=10)
+    assert [(d.linum, d.code) for d in res.diagnostics] == [(2, 'lexical'), (3, 'unexpected-token'), (5, 'lexical')]
+    assert res.diagnostics[2].message == "Constant cannot contain alphabet: 2 + 'a'"
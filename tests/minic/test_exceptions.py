@@ -0,0 +1,93 @@
+import pytest
+
+import minic.node as nd
+from minic.exceptions import SemanticError, SyntaxError, render
+from minic.parser import Parser
+from minic.scanner import MmapFileScanner, SourceScanner
+from minic.symboltable import ScopedSymbolTable
+
+TEXT = "int x;\nint f(void) {\n  x = 1\n  y = ;\n}\nint int;\n"
+
+
+class CountingScanner(SourceScanner):
+    def __init__(self, text):
+        super().__init__(text, 'prog.c')
+        self.reads = 0
+
+    def line(self, linum):
+        self.reads += 1
+        return super().line(linum)
+
+def _errors(text=TEXT):
+    scan = CountingScanner(text).open()
+    parser = Parser(scan, recover=True)
+    parser.start()
+    return scan, parser.errors
+
+def test_rendered_when_displayed():
+    scan, errors = _errors()
+    assert len(errors) == 3 and scan.reads == 0
+
+    assert str(errors[0]) == (
+        "Expecting semicolon ';' after a statement, [3:prog.c]\n"
+        "2: int f(void) {\n"
+        "3:   x = 1\n"
+        "4:   y = ;\n"
+    )
+    assert scan.reads == 3
+    assert errors[0].message == str(errors[0])
+
+def test_codes():
+    _, errors = _errors()
+    assert [(x.code, x.span) for x in errors] == [
+        ('missing-semicolon', (3, 3)),
+        ('expected-identifier', (6, 6)),
+        ('expected-identifier', (6, 6)),
+    ]
+
+def test_template():
+    scan = SourceScanner("int f(void {}\n").open()
+    with pytest.raises(SyntaxError) as ex:
+        Parser(scan).start()
+    assert ex.value.template == "Expecting '{expected}', instead of '{found}'"
+    assert ex.value.fields == {'expected': ')', 'found': '{'}
+    assert ex.value.summary == "Expecting ')', instead of '{'"
+    assert repr(ex.value) == "SyntaxError(\"Expecting ')', instead of '{'\")"
+    assert str(ex.value.args[0]) == ex.value.summary
+
+    ex.value.message = "Missing ')'"
+    assert str(ex.value).startswith("Missing ')', [1:<string>]\n1: int f(void {}")
+
+def test_first_line_excerpt():
+    with pytest.raises(SyntaxError) as ex:
+        Parser(SourceScanner("int x\nint y;\n").open()).start()
+    assert str(ex.value).endswith("1: int x\n2: int y;\n")
+
+@pytest.mark.parametrize('engine', ['state', 'regex'])
+def test_excerpt_after_mmap_closed(tmp_path, engine):
+    path = tmp_path / "e.c"
+    path.write_text(TEXT)
+    with pytest.raises(SyntaxError) as ex:
+        with MmapFileScanner(str(path), engine) as scan:
+            Parser(scan).start()
+    assert str(ex.value) == (
+        f"Expecting semicolon ';' after a statement, [3:{path}]\n"
+        "2: int f(void) {\n"
+        "3:   x = 1\n"
+        "4:   y = ;\n"
+    )
+
+def test_render_reads_lines_once():
+    text = "int f(void) {\n" + "  x = ;\n" * 20 + "}\n"
+    scan, errors = _errors(text)
+    assert len(errors) == 20
+
+    rendered = render(errors)
+    assert scan.reads == 22
+    assert rendered == [str(x) for x in errors]
+
+def test_semantic_error():
+    scope = ScopedSymbolTable('f', 2, verbose=False)
+    error = SemanticError(nd.Var(4, 'y'), scope, "Variable '{name}' has not been declared", name='y')
+    assert error.message == "Variable 'y' has not been declared"
+    assert render(["text", error]) == ["text", "Variable 'y' has not been declared, [4:f]"]
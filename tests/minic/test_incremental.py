@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from benchmarks.generator import generate
+from minic import incremental
+from minic.incremental import IncrementalParser
+from minic.parser import Parser
+from minic.scanner import FileScanner, SourceScanner
+
+TEXT = """int x;
+int f(int a){
+  if(a > 1) return a;
+  return f(a - 1);
+}
+
+int g(void){
+  while(x < 3) x = x + f(2);
+}
+"""
+
+
+def _full(text):
+    with SourceScanner(text, engine='regex') as scan:
+        return Parser(scan).start()
+
+def _edit(inc, old, new):
+    """Replace the first `old` by `new`, return the new Program"""
+    inc.edit(inc.text.index(old), len(old), new)
+    return inc.program
+
+@pytest.mark.parametrize("filename", ["examples/example10-1.c", "examples/example10-5.c"])
+def test_source_scanner(filename):
+    with open(filename) as f:
+        text = f.read()
+    with FileScanner(filename, engine='regex') as scan:
+        exp = Parser(scan).start()
+    assert _full(text) == exp
+    assert IncrementalParser(text).program == exp
+
+def test_reuses_declarations():
+    inc = IncrementalParser(TEXT)
+    before = inc.program.declarations
+    program = _edit(inc, "a - 1", "a - 2")
+
+    assert program == _full(inc.text)
+    assert inc.reparsed == 1
+    assert program.declarations[0] is before[0]
+    assert program.declarations[1] is not before[1]
+    assert program.declarations[2] is before[2]
+
+@pytest.mark.parametrize("old, new", [
+    ("return a;", "return a;\n\n"),   # lines added, g moves down
+    ("\n\nint g", "int g"),           # lines removed
+    ("int x;\n", ""),                 # first declaration deleted
+    ("\nint g", "\nint y;\nint z;\nint g"),  # new declarations between two others
+    ("x + f(2);\n}", "x + f(2);\n} int h(void){ g(); }"),
+])
+def test_edits(old, new):
+    inc = IncrementalParser(TEXT)
+    assert _edit(inc, old, new) == _full(inc.text)
+
+def test_moved_lines():
+    inc = IncrementalParser(TEXT)
+    before = inc.program
+    program = _edit(inc, "return a;", "return a;\n\n")
+
+    # g moved down in a copy, the Program returned before is left as is
+    assert program == _full(inc.text)
+    assert before == _full(TEXT)
+    assert program.declarations[2].linum == before.declarations[2].linum + 2
+    assert inc.program.declarations[2] is program.declarations[2]
+
+    # back on its original lines, g is the node first parsed again
+    assert _edit(inc, "return a;\n\n", "return a;").declarations[2] is before.declarations[2]
+
+def test_moved_lazily(monkeypatch):
+    inc = IncrementalParser(TEXT)
+    copies = []
+    monkeypatch.setattr(incremental, 'shifted', lambda node, lines: copies.append(node) or node)
+
+    # adding lines to f parses f again, g is only copied when read
+    assert inc.edit(TEXT.index("return a;"), 0, "\n") == range(1, 2)
+    assert copies == []
+    inc.declaration(2)
+    inc.declaration(2)
+    assert copies == [inc.decls[2]]
+
+def test_merged_declarations():
+    inc = IncrementalParser(TEXT)
+    # without its '}', f swallows g up to the end of the file
+    with pytest.raises(Exception):
+        _edit(inc, "a - 1);\n}", "a - 1);\n")
+    assert _edit(inc, "a - 1);\n", "a - 1);\n}") == _full(TEXT)
+
+def test_bad_edit():
+    with pytest.raises(ValueError):
+        IncrementalParser(TEXT).edit(len(TEXT), 1, "")
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits(seed):
+    rnd = random.Random(seed)
+    inc = IncrementalParser(generate(seed, functions=2, depth=1))
+    snippets = ["\n", " ", "x", ";", "}", "1 + ", "int y;\n", "int g(void){ return 1; }\n"]
+    for _ in range(10):
+        offset = rnd.randrange(len(inc.text) + 1)
+        removed = min(rnd.choice([0, 1, 3]), len(inc.text) - offset)
+        inserted = rnd.choice(snippets)
+        text = inc.text[offset:offset + removed]
+
+        try:
+            exp = _full(inc.text[:offset] + inserted + inc.text[offset + removed:])
+        except Exception:
+            with pytest.raises(Exception):
+                inc.edit(offset, removed, inserted)
+        else:
+            inc.edit(offset, removed, inserted)
+            assert inc.program == exp
+
+        # undoing it gives the program back
+        inc.edit(offset, len(inserted), text)
+        assert inc.program == _full(inc.text)
@@ -0,0 +1,101 @@
+import pytest
+
+from minic.exceptions import SemanticError
+from minic.interpreter import Interpreter, c_div
+from minic.parser import Parser
+from minic.scanner import FileScanner, TextScanner
+
+
+def _interp(text):
+    return Interpreter(Parser(TextScanner(text)).start())
+
+POWER = """
+int power(int n){
+  if(n==0){
+    return 1;
+  }else{
+    return n * power(n-1);
+  }
+}
+"""
+
+def test_example():
+    with FileScanner("examples/example10-1.c") as scan:
+        interp = Interpreter(Parser(scan).start())
+
+    assert interp.run('main', 0) is None
+    assert interp.get_global('result') == 120
+
+@pytest.mark.parametrize("n, exp", [(0, 1), (1, 1), (5, 120), (10, 3628800)])
+def test_recursion(n, exp):
+    assert _interp(POWER).run('power', n) == exp
+
+def test_fib():
+    interp = _interp("""
+    int fib(int n){
+      if(n < 2) return n;
+      return fib(n - 1) + fib(n - 2);
+    }
+    """)
+    assert [interp.run('fib', n) for n in range(10)] == [0, 1, 1, 2, 3, 5, 8, 13, 21, 34]
+
+def test_loops():
+    interp = _interp("""
+    int total;
+    int sum(int n){
+      int i;
+      int s;
+      s = 0;
+      for(i = 0; i < n; i = i + 1){
+        s = s + i;
+      }
+      while(1){
+        if(s > 100) break;
+        s = s * 2;
+      }
+      total = s;
+      return s;
+    }
+    """)
+    assert interp.run('sum', 5) == 160
+    assert interp.get_global('total') == 160
+    assert interp.run('sum', 20) == 190
+
+def test_return_inside_loop():
+    interp = _interp("""
+    int find(int n){
+      int i;
+      for(i = 0; ; i = i + 1){
+        if(i * i >= n) return i;
+      }
+      return 0 - 1;
+    }
+    """)
+    assert interp.run('find', 50) == 8
+
+@pytest.mark.parametrize("op, exp", [
+    ("7 / 2", 3), ("0 - 7 / 2", -3), ("(0 - 7) / 2", -3), ("1 < 2", 1), ("2 <= 1", 0),
+    ("3 == 3", 1), ("3 != 3", 0), ("x = 4", 4),
+])
+def test_expressions(op, exp):
+    interp = _interp(f"int x; int f(void){{ return {op}; }}")
+    assert interp.run('f') == exp
+
+def test_long_chain():
+    chain = " + ".join(["a"] * 1000) + " / 2 * 3 - a == 2997"
+    assert _interp(f"int f(int a){{ return {chain}; }}").run('f', 3) == 1
+
+@pytest.mark.parametrize("a, b", [(7, 2), (-7, 2), (7, -2), (-7, -2)])
+def test_c_div(a, b):
+    assert c_div(a, b) == int(a / b)
+
+@pytest.mark.parametrize("text", [
+    "int f(void){ return y; }",
+    "int f(void){ break; }",
+    "int f(void){ return g(); }",
+    "int g(int a){ return a; } int f(void){ return g(); }",
+    "int f(void){ goto end; }",
+])
+def test_resolution_errors(text):
+    with pytest.raises(SemanticError):
+        _interp(text)
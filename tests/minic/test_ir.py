@@ -0,0 +1,137 @@
+import pytest
+
+from minic import ir
+from minic.exceptions import SemanticError
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+
+def _build(text):
+    return ir.build(Parser(TextScanner(text)).start())
+
+def test_lowering():
+    program = _build("""
+    int g;
+    int f(int n){
+      int x;
+      x = n * 2 + g;
+      if(x < 10) return x;
+      return f(x - 1);
+    }
+    """)
+    assert program.globals == ['g']
+    assert str(program.function('f')).splitlines() == [
+        "function f(n)",
+        "    x = 0",
+        "    t1 = mul n, 2",
+        "    t2 = load g",
+        "    x = add t1, t2",
+        "    t4 = lt x, 10",
+        "    jump_if_false t4, L1",
+        "    return x",
+        "L1:",
+        "    t5 = sub x, 1",
+        "    t6 = call f(t5)",
+        "    return t6",
+        "    return",
+    ]
+
+def test_loop_break():
+    func = _build("""
+    int g;
+    void f(void){
+      while(1){
+        g = g + 1;
+        if(g > 3) break;
+      }
+    }
+    """).function('f')
+    assert [str(x).strip() for x in func.instrs] == [
+        "L1:",
+        "jump_if_false 1, L2",
+        "t1 = load g",
+        "t2 = add t1, 1",
+        "store g, t2",
+        "t3 = load g",
+        "t4 = gt t3, 3",
+        "jump_if_false t4, L3",
+        "jump L2",
+        "L3:",
+        "jump L1",
+        "L2:",
+        "return",
+    ]
+
+@pytest.mark.parametrize("instr, uses", [
+    (ir.Instr('add', 't1', ('a', 2)), ['a']),
+    (ir.Instr('store', None, ('g', 't1')), ['t1']),
+    (ir.Instr('load', 't1', ('g',)), []),
+    (ir.Instr('call', 't1', ('f', 'a', 1, 'b')), ['a', 'b']),
+    (ir.Instr('jump_if_false', None, ('c', 'L1')), ['c']),
+])
+def test_uses(instr, uses):
+    assert instr.uses() == uses
+
+@pytest.mark.parametrize("op, a, b, result", [
+    ('add', 2147483647, 1, -2147483648),
+    ('mul', 65536, 65536, 0),
+    ('div', 2147483648, 2, -1073741824),
+    ('sub', -2147483648, 1, 2147483647),
+    ('lt', 2147483648, 0, 1),
+])
+def test_eval_wraps(op, a, b, result):
+    assert ir.EVAL[op](a, b) == result
+
+def test_errors():
+    with pytest.raises(SemanticError):
+        _build("int f(void){ return y; }")
+
+def test_for_if_else():
+    func = _build("""
+    int f(int n){
+      int i;
+      int s;
+      for(i = 0; i < n; i = i + 1)
+        if(i > 2) s = s + i; else s = s - 1;
+      return s;
+    }
+    """).function('f')
+    assert [str(x).strip() for x in func.instrs] == [
+        "i = 0",
+        "s = 0",
+        "i = 0",
+        "L1:",
+        "t1 = lt i, n",
+        "jump_if_false t1, L2",
+        "t2 = gt i, 2",
+        "jump_if_false t2, L3",
+        "s = add s, i",
+        "jump L4",
+        "L3:",
+        "s = sub s, 1",
+        "L4:",
+        "i = add i, 1",
+        "jump L1",
+        "L2:",
+        "return s",
+        "return",
+    ]
+
+def test_program_str():
+    program = _build("int g; void h(int a, int b){ g = a; } void f(void){ h(1, g); }")
+    assert str(program).splitlines() == [
+        "global g",
+        "",
+        "function h(a, b)",
+        "    store g, a",
+        "    return",
+        "",
+        "function f()",
+        "    t1 = load g",
+        "    t2 = call h(1, t1)",
+        "    return",
+    ]
+
+@pytest.mark.parametrize("x, register, temp", [(1, False, False), ('a', True, False), ('t12', True, True)])
+def test_operand_kinds(x, register, temp):
+    assert (ir.is_register(x), ir.is_temp(x)) == (register, temp)
@@ -0,0 +1,28 @@
+import pytest
+
+import minic.node as nd
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+
+def test_slotted_nodes():
+    node = nd.BinOp(1, '+', nd.Num(1, 1), nd.Var(1, 'x'))
+    assert not hasattr(node, '__dict__')
+    assert node == nd.BinOp(1, '+', nd.Num(1, 1), nd.Var(1, 'x'))
+    assert node != nd.BinOp(2, '+', nd.Num(1, 1), nd.Var(1, 'x'))
+
+def test_debug_parse_validates():
+    pytest.importorskip("pydantic")
+    text = "int x; int main(void){ x = a[2] + 1; return x; }"
+    ast = Parser(TextScanner(text), debug=True).start()
+    assert nd.validate(ast)
+
+@pytest.mark.parametrize("node", [
+    nd.Num(1, '1'),
+    nd.Num(True, 1),
+    nd.Program(1, [nd.FuncDecl(1, 'int', 'f', [], [nd.JumpStmt(1, 'return', nd.Num(1, 1.5))])]),
+])
+def test_validate_invalid(node):
+    pydantic = pytest.importorskip("pydantic")
+    with pytest.raises(pydantic.ValidationError):
+        nd.validate(node)
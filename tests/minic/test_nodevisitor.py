@@ -0,0 +1,45 @@
+import sys
+
+import pytest
+
+import minic.node as nd
+from minic.exceptions import SemanticError
+from minic.nodevisitor import NodeVisitor
+from minic.parser import Parser
+from minic.scanner import FileScanner, TextScanner
+
+
+def _visit(text):
+    ast = Parser(TextScanner(text)).start()
+    NodeVisitor(ast).start()
+
+@pytest.mark.parametrize("filename", [
+    "examples/example10-1.c",
+    "examples/example10-5.c",
+])
+def test_examples(filename):
+    with FileScanner(filename) as scan:
+        NodeVisitor(Parser(scan).start()).start()
+
+@pytest.mark.parametrize("text", [
+    "int f(void){ return y; }",
+    "int x; int f(void){ return x(); }",
+    "int g(int a){ return a; } int f(void){ return g(); }",
+])
+def test_semantic_error(text):
+    with pytest.raises(SemanticError):
+        _visit(text)
+
+def test_deep_expression():
+    depth = sys.getrecursionlimit() * 2
+    chain = " + ".join(["a"] * depth)
+    _visit(f"int a; int f(void){{ a = {chain}; return; }}")
+
+def test_dispatch_cached_per_class():
+    class Counting(NodeVisitor):
+        pass
+
+    _visit("int x; int f(void){ x = 1; }")
+    Counting(nd.Program(1, [nd.VarDecl(1, 'int', 'x')])).start()
+    assert nd.VarDecl in NodeVisitor._dispatch
+    assert list(Counting._dispatch) == [nd.Program, nd.VarDecl]
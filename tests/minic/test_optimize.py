@@ -0,0 +1,125 @@
+import pytest
+
+from benchmarks.generator import generate
+from minic import ir
+from minic.interpreter import Interpreter
+from minic.optimize import (PASSES, Optimizer, fold_constants, propagate_copies, remove_dead_code,
+                            remove_dead_stores, remove_unreachable_blocks, simplify)
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+
+def _ast(text):
+    return Parser(TextScanner(text)).start()
+
+def _func(*instrs, params=()):
+    """ir.Function from 'op dst args...' strings, '-' for no dst"""
+    res = []
+    for text in instrs:
+        op, dst, *args = text.split()
+        args = tuple(int(x) if x.lstrip('-').isdigit() else x for x in args)
+        res.append(ir.Instr(op, None if dst == '-' else dst, args))
+    return ir.Function('f', list(params), res)
+
+def _lines(func):
+    return [str(x).strip() for x in func.instrs]
+
+def test_fold():
+    func = _func("add t1 2 3", "div t2 7 -2", "div t3 1 0", "lt t4 1 2",
+                 "jump_if_false - 1 L1", "jump_if_false - 0 L1", "label - L1")
+    assert fold_constants(func) == 5
+    assert _lines(func) == ["t1 = 5", "t2 = -3", "t3 = div 1, 0", "t4 = 1", "jump L1", "L1:"]
+
+@pytest.mark.parametrize("instr, exp", [
+    ("add t1 x 0", "t1 = x"), ("add t1 0 x", "t1 = x"), ("sub t1 x 0", "t1 = x"),
+    ("mul t1 x 1", "t1 = x"), ("mul t1 1 x", "t1 = x"), ("div t1 x 1", "t1 = x"),
+    ("mul t1 x 0", "t1 = 0"), ("sub t1 x x", "t1 = 0"), ("eq t1 x x", "t1 = 1"),
+    ("lt t1 x x", "t1 = 0"), ("mul t1 2 x", "t1 = add x, x"),
+])
+def test_simplify(instr, exp):
+    func = _func(instr, params=['x'])
+    assert simplify(func) == 1
+    assert _lines(func) == [exp]
+
+def test_simplify_nothing():
+    func = _func("add t1 x 1", "div t2 0 x", params=['x'])
+    assert simplify(func) == 0
+
+def test_copy_propagation():
+    func = _func("copy a x", "add t1 a 1", "copy x 5", "add t2 a x", "label - L1", "add t3 a 1",
+                 params=['x'])
+    assert propagate_copies(func) == 2
+    # a = x is forgotten once x changes, nothing crosses the label
+    assert _lines(func) == ["a = x", "t1 = add x, 1", "x = 5", "t2 = add a, 5", "L1:", "t3 = add a, 1"]
+
+def test_dead_code():
+    func = _func("return - x", "copy x 1", "jump - L1", "label - L1", "return -", params=['x'])
+    assert remove_dead_code(func) == 2
+    assert _lines(func) == ["return x", "L1:", "return"]
+
+def test_jump_to_next():
+    func = _func("copy x 1", "jump - L1", "label - L1", "return - x", params=['x'])
+    assert remove_dead_code(func) == 1
+    assert _lines(func) == ["x = 1", "L1:", "return x"]
+
+def test_unreachable_blocks():
+    func = _func("jump - L2", "label - L1", "copy x 1", "jump - L1", "label - L2", "return - x",
+                 params=['x'])
+    assert remove_unreachable_blocks(func) == 3
+    assert _lines(func) == ["jump L2", "L2:", "return x"]
+
+def test_dead_stores():
+    func = _func("copy a 1", "call t1 g", "add t2 x 1", "return - x", params=['x'])
+    assert remove_dead_stores(func) == 3
+    assert _lines(func) == ["call g()", "return x"]
+
+def test_pipeline():
+    program = ir.build(_ast("""
+    int f(int n){
+      int x;
+      int y;
+      x = 2 * 3;
+      y = x + 0;
+      if(y > 5) return n * 1;
+      return n + y;
+    }
+    """))
+    optimizer = Optimizer()
+    optimizer.optimize(program)
+    assert _lines(program.function('f')) == ["return n"]
+
+    report = optimizer.report()
+    assert report['instructions'] == {'before': 11, 'after': 1}
+    assert set(report['passes']) == set(PASSES)
+    assert report['passes']['fold'] >= 2
+
+def test_selected_passes():
+    optimizer = Optimizer(['dead_code', 'fold'])
+    assert optimizer.passes == ['fold', 'dead_code']
+    with pytest.raises(ValueError):
+        Optimizer(['inline'])
+
+@pytest.mark.parametrize("passes", [[x] for x in PASSES] + [list(PASSES)])
+@pytest.mark.parametrize("seed", range(4))
+def test_same_results(seed, passes):
+    # the unoptimized IR is the reference: the AST interpreter does not wrap ints
+    ast = _ast(generate(seed, functions=3, depth=1))
+    reference = ir.IRInterpreter(ir.build(ast))
+    reference.run('main')
+
+    program = Optimizer(passes).optimize(ir.build(ast))
+    machine = ir.IRInterpreter(program)
+    machine.run('main')
+    assert machine.globals == reference.globals
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_ir_matches_interpreter(seed):
+    # seeds whose values stay within 32 bits
+    ast = _ast(generate(seed, functions=3, depth=1))
+    interp = Interpreter(ast)
+    interp.run('main')
+
+    machine = ir.IRInterpreter(ir.build(ast))
+    machine.run('main')
+    assert machine.globals == {x: interp.get_global(x) for x in interp.global_slots}
@@ -4,8 +4,9 @@ from typing import List
 import pytest
 
 import minic.node as nd
+from minic.exceptions import SyntaxError
 from minic.parser import Parser
-from minic.scanner import TextScanner
+from minic.scanner import SourceScanner, TextScanner
 import copy
 
 
@@ -452,6 +453,17 @@ def test_exp_stmt(inp, exp):
 def test_labeled_exp(inp, exp):
     pass
 
+@pytest.mark.parametrize("inp, exp", [
+    ("end: x = 1;", ['label', nd.Var(1, 'end'), nd.AssignmentOp(1, nd.Var(1, 'x'), nd.Num(1, 1))]),
+    ("end: return;", ['label', nd.Var(1, 'end'), nd.JumpStmt(1, 'return')]),
+    ("x = 1;", nd.AssignmentOp(1, nd.Var(1, 'x'), nd.Num(1, 1))),
+    ("x;", nd.Var(1, 'x')),
+    ("f(x);", nd.CallFuncOp(1, 'f', [nd.Var(1, 'x')])),
+])
+def test_statement_label(inp, exp):
+    # ID ':' is told from an expression by peeking, nothing parsed twice
+    assert _exec(inp, "statement") == exp
+
 @pytest.mark.parametrize("inp, exp", [
 ])
 def test_optional_exp(inp, exp):
@@ -583,3 +595,109 @@ def test_pri_exp__num(number):
 def test_pri_exp__num_in_parens(number):
     res = _exec(f"({number})", "pri_exp")
     assert res == nd.Num(1, number)
+
+@pytest.mark.parametrize("inp, exp", [
+    ("1 < 2 + 3 * 4", nd.RelOp(1, '<', nd.Num(1, 1),
+                               nd.BinOp(1, '+', nd.Num(1, 2),
+                                        nd.BinOp(1, '*', nd.Num(1, 3), nd.Num(1, 4))))),
+    ("1 * 2 - 3 < 4", nd.RelOp(1, '<',
+                               nd.BinOp(1, '-', nd.BinOp(1, '*', nd.Num(1, 1), nd.Num(1, 2)), nd.Num(1, 3)),
+                               nd.Num(1, 4))),
+    ("1 == 2 != 3", nd.RelOp(1, '!=', nd.RelOp(1, '==', nd.Num(1, 1), nd.Num(1, 2)), nd.Num(1, 3))),
+])
+def test_binary_exp(inp, exp):
+    assert exp == _exec(inp, "binary_exp")
+
+def test_binary_exp__long_chain():
+    depth = 5000
+    res = _exec(" - ".join(["x"] * depth), "conditional_exp")
+
+    # left associative: ((x - x) - x) - ...
+    for _ in range(depth - 1):
+        assert res.operator == '-' and res.right == nd.Var(1, 'x')
+        res = res.left
+    assert res == nd.Var(1, 'x')
+
+def _recover(text, max_errors=100):
+    with SourceScanner(text) as scan:
+        parser = Parser(scan, recover=True, max_errors=max_errors)
+        return parser.start(), parser.errors
+
+BROKEN = """int x;
+int f(void) {
+  x = ;
+  y = 2;
+}
+int g(void) { return 1 }
+int h(int a b) { int q; q = 1; }
+}
+int z;
+"""
+
+def test_recover():
+    ast, errors = _recover(BROKEN)
+    f, g = ast.declarations[1], ast.declarations[2]
+    assert [type(x) for x in ast.declarations] == [nd.VarDecl, nd.FuncDecl, nd.FuncDecl, nd.Error, nd.Error, nd.VarDecl]
+    assert [type(x) for x in f.body] == [nd.Error, nd.AssignmentOp]
+    assert g.body == [nd.Error(6, "Expecting ';', instead of '}'")]
+    assert ast.declarations[-1].name == 'z'
+
+    assert all(isinstance(x, SyntaxError) for x in errors)
+    assert [x.token.linum for x in errors] == [3, 6, 7, 8]
+
+@pytest.mark.parametrize("max_errors", [1, 2, 3])
+def test_recover_max_errors(max_errors):
+    ast, errors = _recover(BROKEN, max_errors)
+    assert len(errors) == max_errors
+    assert ast.declarations[0] == nd.VarDecl(1, 'int', 'x')
+    assert isinstance(ast.declarations[-1], nd.Error)
+
+def test_recover_end_of_file():
+    ast, errors = _recover("int x;\nint f(void) {\n  x = 1;\n")
+    assert [x.summary for x in errors] == ["Unexpected end of file"]
+    assert type(ast.declarations[1]) == nd.Error
+
+def test_recover_other_errors(monkeypatch):
+    # only errors of the source are recovered from, bugs propagate
+    monkeypatch.setattr(Parser, 'statement', lambda self: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        _recover("int f(void) { x = 1; }")
+
+def test_recover_codes():
+    _, errors = _recover("}\nint f(void) { x = ; }\n")
+    assert [(x.token.linum, x.code) for x in errors] == [(1, 'expected-type'), (2, 'unexpected-token')]
+
+@pytest.mark.parametrize("text", [
+    "int x; int f(void){ x = a[2] + b.c * (3 / 4); return; }",
+    "int f(int a, int b){ for(i = 0; i < 3; i = i + 1) { g(); g(1, a); } goto end; break; }",
+    "int f(void){ while(x != 1) if(x > 1) x = 1; else { x = 2; } }",
+])
+def test_recover_valid(text):
+    assert _recover(text) == (_exec(text, None), [])
+
+def test_recover_first_error_same():
+    text = "int f(void) {\n  x = 1\n  y = 2;\n}\n"
+    with pytest.raises(SyntaxError) as ex:
+        with SourceScanner(text) as scan:
+            Parser(scan).start()
+    _, errors = _recover(text)
+    assert (errors[0].token.linum, errors[0].summary) == (ex.value.token.linum, ex.value.summary)
+
+@pytest.mark.parametrize("engine", ['state', 'regex'])
+def test_recover_lexical_error(engine):
+    text = "int f(void) {\n  a1 = 2;\n  return 1;\n}\nint g(void) { return 12b; }\nint y;\n"
+    with SourceScanner(text, engine=engine) as scan:
+        parser = Parser(scan, recover=True)
+        ast = parser.start()
+
+    assert [(x.token.linum, x.code) for x in parser.errors] == [(2, 'lexical'), (5, 'lexical')]
+    f, g, y = ast.declarations
+    assert [type(x) for x in f.body] == [nd.Error, nd.JumpStmt]
+    assert g.body == [nd.Error(5, "Constant cannot contain alphabet: 12 + 'b'")]
+    assert y == nd.VarDecl(1, 'int', 'y')
+
+@pytest.mark.parametrize("text", ["int;\n", "int int;\n", "void (void) {}\n"])
+def test_declaration_without_name(text):
+    with pytest.raises(SyntaxError, match="Expecting an identifier"):
+        with SourceScanner(text) as scan:
+            Parser(scan).start()
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from minic import driver
+from minic.parser import Parser
+from minic.profiling import Profile, count_nodes
+from minic.scanner import TextScanner
+
+EXAMPLES = ["examples/example10-1.c", "examples/example10-5.c"]
+
+
+def _parse(text):
+    return Parser(TextScanner(text)).start()
+
+@pytest.mark.parametrize("text, count", [
+    ("int x;", 2),
+    ("int f(void) { x = 1 + 2; }", 8),
+    ("int f(void) { for (i = 0; i < 2; i = i + 1) { } }", 15),
+])
+def test_count_nodes(text, count):
+    assert count_nodes(_parse(text)) == count
+
+@pytest.mark.parametrize("memory", [True, False])
+def test_profile_files(memory):
+    results, profile = driver.profile_files(EXAMPLES, memory)
+    assert all(x.ok for x in results)
+    assert profile.files == 2
+    assert profile.tokens == sum(x.tokens for x in results)
+    assert profile.nodes == sum(count_nodes(x) for x in map(_parse_file, EXAMPLES))
+    for name, stats in profile.phases.items():
+        assert stats.wall > 0 and stats.cpu >= 0
+        assert stats.wall == pytest.approx(sum(x.timings[name] for x in results))
+        assert (stats.peak > 0) == memory
+
+def _parse_file(path):
+    with open(path) as f:
+        return _parse(f.read())
+
+def test_same_result_as_compile_file():
+    profile = Profile(memory=False)
+    for path in EXAMPLES + ["tests/minic/test_profiling.py"]:
+        res = driver.compile_file(path, keep_ast=True, profile=profile)
+        exp = driver.compile_file(path, keep_ast=True)
+        assert res.diagnostics == exp.diagnostics
+        assert res.ast == exp.ast
+
+def test_productions():
+    profile = Profile(memory=False)
+    driver.compile_file(EXAMPLES[0], profile=profile)
+    calls = {name: count for name, count, _ in profile.productions()}
+    assert calls['start'] == 1
+    assert calls['match'] == profile.tokens
+    assert calls['statement'] > 0 and calls['pri_exp'] > 0
+
+    counts = [count for _, count, _ in profile.productions()]
+    assert counts == sorted(counts, reverse=True)
+
+def test_collapsed(tmp_path):
+    _, profile = driver.profile_files(EXAMPLES, memory=False)
+    profile.write_collapsed(str(tmp_path / "out.folded"))
+    lines = (tmp_path / "out.folded").read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, weight = line.rsplit(' ', 1)
+        assert int(weight) > 0
+        assert stack.split(';')[0] in ('scan', 'parse', 'check')
+    assert any(x.startswith("parse;start;declaration_list;") for x in lines)
+
+def test_main(tmp_path, capsys):
+    folded = tmp_path / "out.folded"
+    assert driver.main(EXAMPLES + ["--json", "--collapsed", str(folded)]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert set(report['profile']['phases']) == {'scan', 'parse', 'check'}
+    assert report['profile']['productions'][0]['name'] == 'match'
+    assert folded.exists()
+
+    assert driver.main(EXAMPLES + ["--profile", "--no-memory"]) == 0
+    out = capsys.readouterr().out
+    assert "production" in out and "statement" in out
@@ -0,0 +1,118 @@
+import pytest
+
+from minic.exceptions import SemanticError
+from minic.parser import Parser
+from minic.pycompile import compile_program
+from minic.scanner import FileScanner, TextScanner
+
+
+def _module(text, wrap32=False):
+    return compile_program(Parser(TextScanner(text)).start(), wrap32)
+
+POWER = """
+int power(int n){
+  if(n==0){
+    return 1;
+  }else{
+    return n * power(n-1);
+  }
+}
+"""
+
+def test_example():
+    with FileScanner("examples/example10-1.c") as scan:
+        module = compile_program(Parser(scan).start())
+
+    assert module.main(0) is None
+    assert module.get_global('result') == 120
+
+@pytest.mark.parametrize("n, exp", [(0, 1), (1, 1), (5, 120), (10, 3628800)])
+def test_recursion(n, exp):
+    assert _module(POWER).power(n) == exp
+
+def test_fib():
+    module = _module("""
+    int fib(int n){
+      if(n < 2) return n;
+      return fib(n - 1) + fib(n - 2);
+    }
+    """)
+    assert [module.fib(n) for n in range(10)] == [0, 1, 1, 2, 3, 5, 8, 13, 21, 34]
+
+def test_loops():
+    module = _module("""
+    int total;
+    int sum(int n){
+      int i;
+      int s;
+      s = 0;
+      for(i = 0; i < n; i = i + 1){
+        s = s + i;
+      }
+      while(1){
+        if(s > 100) break;
+        s = s * 2;
+      }
+      total = s;
+      return s;
+    }
+    """)
+    assert module.sum(5) == 160
+    assert module.get_global('total') == 160
+    assert module.sum(20) == 190
+
+    module.set_global('total', 7)
+    assert module.get_global('total') == 7
+
+def test_return_inside_loop():
+    module = _module("""
+    int find(int n){
+      int i;
+      for(i = 0; ; i = i + 1){
+        if(i * i >= n) return i;
+      }
+      return 0 - 1;
+    }
+    """)
+    assert module.find(50) == 8
+
+@pytest.mark.parametrize("op, exp", [
+    ("7 / 2", 3), ("0 - 7 / 2", -3), ("(0 - 7) / 2", -3), ("1 < 2", 1), ("2 <= 1", 0),
+    ("3 == 3", 1), ("3 != 3", 0), ("x = 4", 4), ("x = 2 * 3", 6),
+])
+def test_expressions(op, exp):
+    assert _module(f"int x; int f(void){{ return {op}; }}").f() == exp
+
+@pytest.mark.parametrize("op, exp", [
+    ("2147483647 + 1", -2147483648), ("0 - 2147483647 - 2", 2147483647),
+    ("65536 * 65536", 0), ("(0 - 2147483647 - 1) / (0 - 1)", -2147483648),
+    ("7 / 2", 3),
+])
+def test_wrap32(op, exp):
+    assert _module(f"int f(void){{ return {op}; }}", wrap32=True).f() == exp
+
+@pytest.mark.parametrize("wrap32, exp", [(False, 3000000000), (True, 3000000000 - 2 ** 32)])
+def test_long_chain(wrap32, exp):
+    chain = " + ".join(["a"] * 1000)
+    module = _module(f"int f(int a){{ if ({chain} != 0) return {chain}; return 0; }}", wrap32)
+    assert module.f(3000000) == exp
+
+def test_keyword_names():
+    # valid Mini-C names, but python keywords
+    module = _module("int pass(int lambda){ int def; def = lambda; return def; }")
+    assert getattr(module, 'pass')(3) == 3
+
+def test_source():
+    module = _module(POWER)
+    assert module.__source__.startswith("def f_power(v_n):")
+
+@pytest.mark.parametrize("text", [
+    "int f(void){ return y; }",
+    "int f(void){ break; }",
+    "int f(void){ return g(); }",
+    "int g(int a){ return a; } int f(void){ return g(); }",
+    "int f(void){ goto end; }",
+])
+def test_compile_errors(text):
+    with pytest.raises(SemanticError):
+        _module(text)
@@ -0,0 +1,184 @@
+import pytest
+
+import minic.scanner as sc
+from minic.scanner import FileScanner, LexicalError, MmapFileScanner, TextScanner, Token, TokenStream, TokenType
+
+
+def _tokens(scan):
+    res = []
+    while scan.is_next():
+        res.append(scan.next_token())
+    return res
+
+def _triples(scan):
+    return [(t.ttype, t.value, t.linum) for t in _tokens(scan) if t]
+
+@pytest.mark.parametrize("text", [
+    "int x;",
+    "int x; int function(void){ return a[2] + b.c * (3/4); }",
+    "x=-1; a<=b",
+    "a  !=  b\n\n x == 1",
+    "var_x # 12 ; y",
+    "while(n){ n = n + 3; }",
+])
+def test_regex_engine_same_tokens(text):
+    state = _triples(TextScanner(text).open())
+    regex = _triples(TextScanner(text, engine='regex').open())
+    assert state == regex
+
+@pytest.mark.parametrize("filename", [
+    "examples/example10-1.c",
+    "examples/example10-5.c",
+])
+def test_regex_engine_same_tokens_file(filename):
+    with FileScanner(filename) as state, FileScanner(filename, engine='regex') as regex:
+        assert _triples(state) == _triples(regex)
+
+def test_regex_engine_same_linum(tmp_path):
+    # tokens take the line they start on, not the one whitespace started on
+    path = tmp_path / "blank.c"
+    path.write_text("\nint x;\n\n\nint f(void){\n\n  return\n\n  x;\n}\n")
+    with FileScanner(str(path)) as state, FileScanner(str(path), engine='regex') as regex:
+        expected = _triples(regex)
+        assert _triples(state) == expected
+    assert [(v, n) for _, v, n in expected if v in ('int', 'return')] == [('int', 2), ('int', 5), ('return', 7)]
+
+def test_regex_engine_linum():
+    with FileScanner("examples/example10-1.c", engine='regex') as scan:
+        tokens = _tokens(scan)
+
+    assert tokens[0] == Token(TokenType.KEYWORD, 'int')
+    assert tokens[0].linum == 1
+    assert tokens[6] == Token(TokenType.KEYWORD, 'int')
+    assert tokens[6].linum == 4
+
+@pytest.mark.parametrize("text, message", [
+    ("abc1", "ID cannot contain numbers"),
+    ("12ab", "Constant cannot contain alphabet"),
+    ("int abc1 x;", "ID cannot contain numbers"),
+    ("int 12a;", "Constant cannot contain alphabet"),
+])
+def test_regex_engine_invalid(text, message):
+    with pytest.raises(Exception, match=message):
+        _tokens(TextScanner(text, engine='regex').open())
+    with pytest.raises(Exception, match=message):
+        list(TextScanner(text, engine='regex').open().tokens())
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        TextScanner("x", engine='dfa')
+
+@pytest.mark.parametrize("engine", ['state', 'regex'])
+@pytest.mark.parametrize("filename", [
+    "examples/example10-1.c",
+    "examples/example10-5.c",
+])
+def test_mmap_scanner_same_tokens(filename, engine):
+    with FileScanner(filename, engine) as lines, MmapFileScanner(filename, engine) as mapped:
+        assert _triples(lines) == _triples(mapped)
+
+def test_mmap_scanner_line_index():
+    filename = "examples/example10-5.c"
+    with FileScanner(filename) as lines, MmapFileScanner(filename) as mapped:
+        expected = [t.linum for t in lines.tokens()]
+        assert [t.linum for t in mapped.tokens()] == expected
+        # the state engine counts lines as it goes, no index needed
+        assert mapped._line_starts is None
+
+@pytest.mark.parametrize("linum, surround", [(0, 0), (5, 1), (4, 0), (13, 2)])
+def test_mmap_scanner_spit(linum, surround):
+    filename = "examples/example10-1.c"
+    with FileScanner(filename) as lines, MmapFileScanner(filename) as mapped:
+        assert lines.spit(linum, surround) == mapped.spit(linum, surround)
+
+def test_mmap_scanner_empty_file(tmp_path):
+    path = tmp_path / "empty.c"
+    path.write_text("")
+    with MmapFileScanner(str(path)) as scan:
+        assert not scan.is_next()
+        assert scan.next_token() is None
+        assert scan.spit() == ''
+
+def test_tokens_generator():
+    scan = TextScanner("int x; x = 1;").open()
+    assert list(scan.tokens()) == _tokens(TextScanner("int x; x = 1;").open())[:-1]
+
+def test_token_stream_peek():
+    stream = TokenStream(TextScanner("label: x = 1;").open(), lookahead=2)
+    assert stream.peek() == Token(TokenType.ID, 'label')
+    assert stream.peek(2) == Token(TokenType.SEPARATOR, ':')
+    with pytest.raises(ValueError):
+        stream.peek(3)
+
+    assert stream.next() == Token(TokenType.ID, 'label')
+    assert stream.peek(2) == Token(TokenType.ID, 'x')
+
+def test_token_stream_mark_reset():
+    stream = TokenStream(TextScanner("a b c d").open())
+    stream.next()
+    stream.mark()
+    assert [stream.next().value for _ in range(2)] == ['b', 'c']
+    stream.reset()
+    assert [t.value for t in stream] == ['b', 'c', 'd']
+    assert stream.next() is None
+
+def test_token_stream_nested_mark():
+    stream = TokenStream(TextScanner("a b c d").open())
+    stream.mark()
+    stream.next()
+    stream.mark()
+    stream.next()
+    stream.reset()
+    assert stream.peek().value == 'b'
+
+    stream.mark()
+    stream.next()
+    stream.release()
+    assert stream.next().value == 'c'
+    stream.reset()
+    assert stream.next().value == 'a'
+
+@pytest.mark.parametrize("engine", ['state', 'regex'])
+def test_token_stream_errors(engine):
+    text = "x = abc12de + 12ab;"
+    stream = TokenStream(TextScanner(text, engine).open(), errors=True)
+    assert [(t.ttype, t.value) for t in stream] == [
+        (TokenType.ID, 'x'),
+        (TokenType.ASSIGNMENT, '='),
+        (TokenType.ERROR, "ID cannot contain numbers: abc + '1'"),
+        (TokenType.ARITHMETIC_OPERATOR, '+'),
+        (TokenType.ERROR, "Constant cannot contain alphabet: 12 + 'a'"),
+        (TokenType.SEPARATOR, ';'),
+    ]
+
+    with pytest.raises(LexicalError, match="ID cannot contain numbers"):
+        list(TokenStream(TextScanner(text, engine).open()))
+
+def test_token_slots():
+    token = Token(TokenType.ID, 'x', 1)
+    assert not hasattr(token, '__dict__')
+    assert token == Token(TokenType.ID, 'x', 20)
+    assert token != Token(TokenType.KEYWORD, 'x', 1)
+    assert token != None
+
+def test_token_buffer():
+    text = "int x; x = x + 1;"
+    buf = TextScanner(text).open().token_buffer()
+
+    assert list(buf) == _tokens(TextScanner(text).open())[:-1]
+    assert buf.same(1, 3) and buf.same(3, 5)
+    assert not buf.same(0, 1)
+    assert buf.matches(2, Token(TokenType.SEPARATOR, ';'))
+    assert buf.value(0) == 'int'
+    assert text[slice(*buf.span(4))] == '='
+
+@pytest.mark.parametrize("c, cc", [
+    ('a', sc.CC_ALPHA), ('Z', sc.CC_ALPHA), ('7', sc.CC_DIGIT), (' ', sc.CC_SPACE),
+    ('\n', sc.CC_SPACE), ('!', sc.CC_REL), ('/', sc.CC_ARITH), ('[', sc.CC_SEP),
+    ('_', sc.CC_OTHER), ('é', sc.CC_ALPHA),
+])
+def test_char_class(c, cc):
+    assert sc.char_class(c) == cc
+
+def test_tables_shared():
+    assert TextScanner("x").keyword is TextScanner("y").keyword is sc.KEYWORDS
@@ -0,0 +1,135 @@
+import pytest
+
+from benchmarks.generator import generate
+from minic import ir
+from minic.optimize import PASSES, Optimizer
+from minic.parser import Parser
+from minic.scanner import TextScanner
+from minic.ssa import SSA, base, gvn, sccp
+
+LOOP = """
+int f(int n){
+  int s;
+  while(n > 0){
+    if(n == 5) break;
+    s = s + n;
+    n = n - 1;
+  }
+  return s;
+}
+"""
+
+
+def _ast(text):
+    return Parser(TextScanner(text)).start()
+
+def _func(text, name='f'):
+    return ir.build(_ast(text)).function(name)
+
+def _lines(func):
+    return [str(x).strip() for x in func.instrs]
+
+def test_dominators():
+    ssa = SSA(_func(LOOP))
+    # the edge leaving the loop header for L2 is critical, it gets a block
+    split = next(x for x in ssa.cfg.by_label if x.startswith('E'))
+    assert ssa.cfg.by_label['L1'].succs == ['B3', split]
+    assert ssa.idom == {'B1': 'B1', 'L1': 'B1', 'B3': 'L1', 'B4': 'B3', 'L3': 'B3', 'L2': 'L1',
+                        split: 'L1'}
+    assert ssa.frontiers['L3'] == {'L1'}
+    assert ssa.frontiers['B3'] == {'L1', 'L2'}
+    assert ssa.frontiers['L1'] == {'L1'}
+
+def test_single_definition():
+    ssa = SSA(_func(LOOP))
+    dsts = [x.dst for b in ssa.cfg.blocks for x in b.instrs if x.dst]
+    assert len(dsts) == len(set(dsts))
+    assert all(base(x) in ['s', 'n', 't1', 't2'] for x in dsts)
+
+def test_phis():
+    ssa = SSA(_func(LOOP))
+    phis = {base(x.dst): x for x in ssa.cfg.by_label['L1'].instrs if x.op == 'phi'}
+    assert set(phis) == {'s', 'n'}
+    # the loop header merges the entry value and the one of the back edge
+    assert phis['n'].args[0] == 'n'
+    assert base(phis['n'].args[1]) == 'n' and phis['n'].args[1] != phis['n'].dst
+    # nothing but the loop header merges values
+    assert [b.label for b in ssa.cfg.blocks if any(x.op == 'phi' for x in b.instrs)] == ['L1']
+
+def test_untouched():
+    # nothing to do, the function is left as it is
+    func = _func(LOOP)
+    before = _lines(func)
+    assert gvn(func) == 0
+    assert _lines(func) == before
+
+def test_sccp_branch():
+    func = _func("""
+    int f(int n){
+      int x;
+      int y;
+      x = 1;
+      if(x) y = 2; else y = n;
+      return y;
+    }
+    """)
+    assert sccp(func) > 0
+    # the else branch never runs, y is 2 after the branch
+    assert _lines(func)[-2:] == ["y = 2", "return 2"]
+
+    program = ir.Program([], [func])
+    Optimizer().optimize(program)
+    assert _lines(func) == ["L2:", "return 2"]
+
+def test_sccp_loop():
+    func = _func("""
+    int f(int n){
+      int x;
+      x = 3;
+      while(n > 0){ n = n - x; x = 3; }
+      return x;
+    }
+    """)
+    sccp(func)
+    assert _lines(func)[-1] == "return 3"
+    # n changes around the loop, it stays a register
+    assert "n = sub n, 3" in _lines(func)
+
+def test_gvn():
+    func = _func("""
+    int f(int n, int m){
+      int a;
+      int b;
+      a = n * m;
+      if(n > 0) b = m * n; else b = 0;
+      return a + b;
+    }
+    """)
+    assert gvn(func) == 1
+    lines = _lines(func)
+    assert sum(x.startswith("mul") or "= mul" in x for x in lines) == 1
+    assert "b = a" in lines
+
+def test_gvn_scoped():
+    # neither branch dominates the other, both products stay
+    func = _func("""
+    int f(int n, int m){
+      int b;
+      if(n > 0) b = n * m; else b = n * m + 1;
+      return b;
+    }
+    """)
+    assert gvn(func) == 0
+
+@pytest.mark.parametrize("passes", [['sccp'], ['gvn'], list(PASSES)])
+@pytest.mark.parametrize("seed", range(4))
+def test_same_results(seed, passes):
+    # the unoptimized IR is the reference: the AST interpreter does not wrap ints
+    ast = _ast(generate(seed, functions=3, depth=1))
+    reference = ir.IRInterpreter(ir.build(ast))
+    reference.run('main')
+
+    program = Optimizer(passes).optimize(ir.build(ast))
+    machine = ir.IRInterpreter(program)
+    machine.run('main')
+    assert machine.globals == reference.globals
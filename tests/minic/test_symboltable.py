@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from minic import symboltable as symb
+
+
+def _table(hook=None):
+    table = symb.SymbolTable(hook)
+    table.enter('<global>').init_builtin()
+    return table
+
+def _var(table, name):
+    return symb.VarSymbol(name, table.lookup('int'))
+
+def test_shadowing():
+    table = _table()
+    outer = _var(table, 'x')
+    table.insert(outer)
+    inner_scope = table.enter('f')
+    assert inner_scope.level == 2 and inner_scope.parent_scope.name == '<global>'
+    assert table.lookup('x') is outer
+    assert table.lookup('x', deep=False) is None
+
+    inner = _var(table, 'x')
+    table.insert(inner)
+    assert table.lookup('x') is inner
+    assert table.lookup('x', deep=False) is inner
+
+    assert table.leave().name == '<global>'
+    assert table.lookup('x') is outer
+
+def test_leave_drops_bindings():
+    table = _table()
+    table.enter('f')
+    table.insert(_var(table, 'y'))
+    table.leave()
+    assert table.lookup('y') is None
+    assert 'y' not in table._bindings
+
+def test_insert_twice_in_scope():
+    table = _table()
+    table.insert(_var(table, 'x'))
+    second = _var(table, 'x')
+    table.insert(second)
+    assert table.scope.names.count('x') == 1
+    assert table.lookup('x') is second
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_as_scoped_symbol_table(seed):
+    rand = random.Random(seed)
+    table = _table()
+    scoped = symb.ScopedSymbolTable('<global>', 1, verbose=False)
+    scoped.init_builtin()
+    for _ in range(300):
+        action = rand.random()
+        name = rand.choice('abcdef')
+        if action < 0.15:
+            table.enter(name)
+            scoped = symb.ScopedSymbolTable(name, scoped.level + 1, scoped, verbose=False)
+        elif action < 0.3 and scoped.parent_scope:
+            table.leave()
+            scoped = scoped.parent_scope
+        elif action < 0.6:
+            sym = _var(table, name)
+            table.insert(sym)
+            scoped.insert(sym)
+        else:
+            deep = rand.random() < 0.7
+            assert table.lookup(name, deep) is scoped.lookup(name, deep)
+        assert table.scope.level == scoped.level
+
+def test_hook():
+    events = []
+    table = _table(lambda event, name, scope: events.append((event, name, scope.name)))
+    table.enter('f')
+    table.insert(_var(table, 'x'))
+    table.leave()
+    assert events[:2] == [('enter', '<global>', '<global>'), ('insert', 'int', '<global>')]
+    assert events[4:] == [
+        ('enter', 'f', 'f'),
+        ('lookup', 'int', 'f'),
+        ('insert', 'x', 'f'),
+        ('leave', 'f', 'f'),
+    ]
+
+def test_scope_str():
+    table = _table()
+    table.insert(_var(table, 'x'))
+    scoped = symb.ScopedSymbolTable('<global>', 1, verbose=False)
+    scoped.init_builtin()
+    scoped.insert(_var(table, 'x'))
+    assert str(table.scope) == str(scoped)
@@ -0,0 +1,77 @@
+import io
+import json
+
+import pytest
+
+from minic import trace
+from minic.nodevisitor import NodeVisitor
+from minic.parser import Parser
+from minic.scanner import TextScanner
+
+TEXT = "int x; int f(int a) { x = a + 1; return x; } int main(void) { int i; f(2); for (i = 0; i < 3; i = i + 1) { x = i; } }"
+
+
+def _ast(text=TEXT):
+    return Parser(TextScanner(text)).start()
+
+def test_silent_by_default(capsys):
+    visitor = NodeVisitor(_ast())
+    visitor.start()
+    assert capsys.readouterr().out == ""
+    assert visitor.tracer is trace.NULL
+    assert visitor.symbols.hook is None
+    assert 'visit' not in vars(visitor)
+
+def test_memory_tracer():
+    tracer = trace.MemoryTracer()
+    NodeVisitor(_ast(), tracer).start()
+
+    scopes = [(x['event'], x['name'], x['level']) for x in tracer.events if x['event'] in ('enter', 'leave')]
+    assert scopes == [
+        ('enter', '<global>', 1),
+        ('enter', 'f', 2), ('leave', 'f', 2),
+        ('enter', 'main', 2), ('leave', 'main', 2),
+        ('leave', '<global>', 1),
+    ]
+    assert {'event': 'insert', 'name': 'a', 'scope': 'f', 'level': 2} in tracer.events
+    assert {'event': 'lookup', 'name': 'x', 'scope': 'f', 'level': 2} in tracer.events
+
+def test_node_events():
+    tracer = trace.MemoryTracer()
+    ast = _ast()
+    NodeVisitor(ast, tracer).start()
+
+    nodes = tracer.of('node')
+    # every node once, children before their parent
+    assert nodes[-1]['kind'] == 'Program'
+    assert [x['kind'] for x in nodes].count('FuncDecl') == 2
+    assert [x['kind'] for x in nodes].count('Num') == 5
+    assert {'ForHeader': None, 'Program': 1} == {x['kind']: x['linum'] for x in nodes if x['kind'] in ('ForHeader', 'Program')}
+    assert all(x['time'] >= 0 for x in nodes)
+    assert nodes[-1]['time'] >= max(x['time'] for x in nodes[:-1])
+    assert set(tracer.node_times()) == {x['kind'] for x in nodes}
+
+def test_errors_still_raised():
+    with pytest.raises(Exception):
+        NodeVisitor(_ast("int x; int x;"), trace.MemoryTracer()).start()
+
+def test_json_lines():
+    out = io.StringIO()
+    NodeVisitor(_ast(), trace.JsonLinesTracer(out)).start()
+    records = [json.loads(x) for x in out.getvalue().splitlines()]
+    assert records[0] == {'event': 'enter', 'ts': records[0]['ts'], 'name': '<global>', 'level': 1}
+    assert [x['ts'] for x in records] == sorted(x['ts'] for x in records)
+
+    memory = trace.MemoryTracer()
+    NodeVisitor(_ast(), memory).start()
+    assert [x['event'] for x in records] == [x['event'] for x in memory.events]
+
+def test_print_tracer():
+    out = io.StringIO()
+    NodeVisitor(_ast(), trace.PrintTracer(out)).start()
+    text = out.getvalue()
+    assert text.startswith("ENTER scope: <global>\n")
+    assert "Insert: a\n" in text
+    assert "Lookup: x @f\n" in text
+    assert "Scope name: f" in text
+    assert text.endswith("LEAVING scope: <global>\n")
@@ -0,0 +1,120 @@
+import pytest
+
+from minic.bytecode import Op, compile_program, disassemble
+from minic.exceptions import SemanticError
+from minic.parser import Parser
+from minic.scanner import FileScanner, TextScanner
+from minic.vm import VM
+
+
+def _vm(text):
+    return VM(compile_program(Parser(TextScanner(text)).start()))
+
+POWER = """
+int power(int n){
+  if(n==0){
+    return 1;
+  }else{
+    return n * power(n-1);
+  }
+}
+"""
+
+def test_example():
+    with FileScanner("examples/example10-1.c") as scan:
+        vm = VM(compile_program(Parser(scan).start()))
+
+    assert vm.run('main', 0) is None
+    assert vm.get_global('result') == 120
+
+@pytest.mark.parametrize("n, exp", [(0, 1), (1, 1), (5, 120), (10, 3628800)])
+def test_recursion(n, exp):
+    assert _vm(POWER).run('power', n) == exp
+
+def test_deep_recursion():
+    # frames live on a list, not on the python stack
+    assert _vm(POWER).run('power', 3000) > 0
+
+def test_fib():
+    vm = _vm("""
+    int fib(int n){
+      if(n < 2) return n;
+      return fib(n - 1) + fib(n - 2);
+    }
+    """)
+    assert [vm.run('fib', n) for n in range(10)] == [0, 1, 1, 2, 3, 5, 8, 13, 21, 34]
+
+def test_loops():
+    vm = _vm("""
+    int total;
+    int sum(int n){
+      int i;
+      int s;
+      s = 0;
+      for(i = 0; i < n; i = i + 1){
+        s = s + i;
+      }
+      while(1){
+        if(s > 100) break;
+        s = s * 2;
+      }
+      total = s;
+      return s;
+    }
+    """)
+    assert vm.run('sum', 5) == 160
+    assert vm.get_global('total') == 160
+    assert vm.run('sum', 20) == 190
+
+def test_return_inside_loop():
+    vm = _vm("""
+    int find(int n){
+      int i;
+      for(i = 0; ; i = i + 1){
+        if(i * i >= n) return i;
+      }
+      return 0 - 1;
+    }
+    """)
+    assert vm.run('find', 50) == 8
+
+@pytest.mark.parametrize("op, exp", [
+    ("7 / 2", 3), ("0 - 7 / 2", -3), ("(0 - 7) / 2", -3), ("1 < 2", 1), ("2 <= 1", 0),
+    ("3 > 2", 1), ("2 >= 3", 0), ("3 == 3", 1), ("3 != 3", 0), ("x = 4", 4),
+])
+def test_expressions(op, exp):
+    vm = _vm(f"int x; int f(void){{ return {op}; }}")
+    assert vm.run('f') == exp
+
+def test_long_chain():
+    chain = " + ".join(["a"] * 1000) + " / 2 * 3 - a == 2997"
+    assert _vm(f"int f(int a){{ return {chain}; }}").run('f', 3) == 1
+
+@pytest.mark.parametrize("text", [
+    "int f(void){ return y; }",
+    "int f(void){ break; }",
+    "int f(void){ return g(); }",
+    "int g(int a){ return a; } int f(void){ return g(); }",
+    "int f(void){ goto end; }",
+])
+def test_compile_errors(text):
+    with pytest.raises(SemanticError):
+        _vm(text)
+
+def test_code():
+    module = compile_program(Parser(TextScanner(POWER)).start())
+    code = module.function('power')
+    assert (code.arity, code.nlocals, code.varnames) == (1, 1, ['n'])
+    assert code.code.typecode == 'i'
+    assert code.consts == [0, 1]
+    assert Op(code.code[-2]) == Op.RETURN_NONE
+
+def test_disassemble():
+    module = compile_program(Parser(TextScanner("int g; void f(int a){ g = a + 1; }")).start())
+    lines = disassemble(module.function('f'), module).splitlines()
+    assert lines[0] == "f/1 nlocals=1"
+    assert [x.split()[1] for x in lines[1:]] == [
+        'LOAD', 'CONST', 'ADD', 'STORE_GLOBAL', 'POP', 'RETURN_NONE'
+    ]
+    assert lines[1].endswith("(a)")
+    assert lines[4].endswith("(g)")
@@ -0,0 +1,186 @@
+import shutil
+import subprocess
+
+import pytest
+
+from minic import ir
+from minic.optimize import PASSES
+from minic.parser import Parser
+from minic.scanner import TextScanner
+from minic.x86 import Interval, LinearScan, X86Generator, compile_program, int32, intervals, liveness
+
+needs_gcc = pytest.mark.skipif(shutil.which('gcc') is None, reason="needs gcc")
+
+
+def _ast(text):
+    return Parser(TextScanner(text)).start()
+
+def _run(tmp_path, text, harness, passes=PASSES):
+    """Assemble text with a C harness, return the harness output"""
+    (tmp_path / "prog.s").write_text(compile_program(_ast(text), prefix='mc_', passes=passes))
+    (tmp_path / "harness.c").write_text("#include <stdio.h>\n" + harness)
+    exe = tmp_path / "prog"
+    subprocess.run(["gcc", "-o", str(exe), str(tmp_path / "prog.s"), str(tmp_path / "harness.c")], check=True)
+    return subprocess.run([str(exe)], check=True, capture_output=True, text=True).stdout.split()
+
+POWER = """
+int power(int n){
+  if(n==0){
+    return 1;
+  }else{
+    return n * power(n-1);
+  }
+}
+int fib(int n){
+  if(n < 2) return n;
+  return fib(n - 1) + fib(n - 2);
+}
+"""
+
+@needs_gcc
+def test_example(tmp_path):
+    with open("examples/example10-1.c") as f:
+        text = f.read()
+    out = _run(tmp_path, text, """
+    void mc_main(int); extern int mc_result;
+    int main(void){ mc_main(0); printf("%d", mc_result); return 0; }
+    """)
+    assert out == ['120']
+
+@pytest.mark.parametrize("passes", [PASSES, []])
+@needs_gcc
+def test_recursion(tmp_path, passes):
+    out = _run(tmp_path, POWER, """
+    int mc_power(int); int mc_fib(int);
+    int main(void){ printf("%d %d %d %d", mc_power(5), mc_power(10), mc_power(13), mc_fib(20)); return 0; }
+    """, passes)
+    assert out == ['120', '3628800', str(int32(6227020800)), '6765']
+
+@needs_gcc
+def test_loops_and_globals(tmp_path):
+    out = _run(tmp_path, """
+    int total;
+    int sum(int n){
+      int i;
+      int s;
+      s = 0;
+      for(i = 0; i < n; i = i + 1){
+        s = s + i;
+      }
+      while(1){
+        if(s > 100) break;
+        s = s * 2;
+      }
+      total = s;
+      return s;
+    }
+    """, """
+    int mc_sum(int); extern int mc_total;
+    int main(void){
+      printf("%d ", mc_sum(5));
+      printf("%d ", mc_total);
+      printf("%d", mc_sum(20));
+      return 0;
+    }
+    """)
+    assert out == ['160', '160', '190']
+
+@needs_gcc
+def test_stack_arguments(tmp_path):
+    out = _run(tmp_path, """
+    int many(int a, int b, int c, int d, int e, int f, int g, int h, int i){
+      return a - b + c * d - e + f * g - h / i;
+    }
+    int call(void){ return many(1, 2, 3, 4, 5, 6, 7, 0 - 80, 3); }
+    """, """
+    int mc_call(void); int mc_many(int,int,int,int,int,int,int,int,int);
+    int main(void){ printf("%d %d", mc_call(), mc_many(9,8,7,6,5,4,3,2,1)); return 0; }
+    """)
+    assert out == ['74', str(9 - 8 + 7 * 6 - 5 + 4 * 3 - 2)]
+
+@needs_gcc
+def test_register_pressure(tmp_path):
+    # more live values than allocatable registers
+    out = _run(tmp_path, """
+    int spill(int n){
+      int a; int b; int c; int d; int e; int f; int g; int i;
+      a = n; b = n + 1; c = n + 2; d = n + 3; e = n + 4; f = n + 5; g = n + 6;
+      for(i = 0; i < 3; i = i + 1){
+        a = a + b + c + d + e + f + g;
+      }
+      return a - b - c - d - e - f - g;
+    }
+    """, """
+    int mc_spill(int);
+    int main(void){ printf("%d", mc_spill(1)); return 0; }
+    """)
+    a, rest = 1, [2, 3, 4, 5, 6, 7]
+    for _ in range(3):
+        a += sum(rest)
+    assert out == [str(a - sum(rest))]
+
+@pytest.mark.parametrize("op, exp", [
+    ("7 / 2", 3), ("0 - 7 / 2", -3), ("(0 - 7) / 2", -3), ("1 < 2", 1), ("2 <= 1", 0),
+    ("3 > 2", 1), ("2 >= 3", 0), ("3 == 3", 1), ("3 != 3", 0), ("2147483647 + 1", -2147483648),
+])
+@needs_gcc
+def test_expressions(tmp_path, op, exp):
+    # passes off, constants would be folded away
+    out = _run(tmp_path, f"int x; int f(void){{ return {op}; }}", """
+    int mc_f(void);
+    int main(void){ printf("%d", mc_f()); return 0; }
+    """, [])
+    assert out == [str(exp)]
+
+@pytest.mark.parametrize("passes", [PASSES, []])
+@needs_gcc
+def test_folding_wraps(tmp_path, passes):
+    # folded constants must wrap like the emitted 32-bit code
+    out = _run(tmp_path, "int r; void f(void){ r = (2147483647 + 1) / 2; }", """
+    void mc_f(void); extern int mc_r;
+    int main(void){ mc_f(); printf("%d", mc_r); return 0; }
+    """, passes)
+    assert out == ['-1073741824']
+
+@pytest.mark.parametrize("passes", [PASSES, []])
+@needs_gcc
+def test_long_chain(tmp_path, passes):
+    chain = " + ".join(["a"] * 1000) + " / 2 * 3 - a == 2997"
+    out = _run(tmp_path, f"int f(int a){{ return {chain}; }}", """
+    int mc_f(int);
+    int main(void){ printf("%d", mc_f(3)); return 0; }
+    """, passes)
+    assert out == ['1']
+
+def test_linear_scan():
+    ivs = [Interval('a', 0, 10), Interval('b', 1, 3), Interval('c', 2, 8), Interval('d', 4, 5)]
+    LinearScan(['r1', 'r2']).allocate(ivs)
+    a, b, c, d = ivs
+    # both registers are taken when c starts, a ends last and is spilled
+    assert (a.register, a.slot) == (None, 0)
+    assert (b.register, c.register, d.register) == ('r2', 'r1', 'r2')
+    for x in ivs:
+        for y in ivs:
+            if x is not y and x.register and x.register == y.register:
+                assert x.end < y.start or y.end < x.start
+
+def test_loop_keeps_registers():
+    func = ir.build(_ast("""
+    int sum(int n){
+      int i;
+      int s;
+      for(i = 0; i < n; i = i + 1){
+        s = s + i;
+      }
+      return s;
+    }
+    """)).function('sum')
+    live_in, live_out = liveness(func.instrs)
+    ivs = {x.vreg: x for x in intervals(func, live_in, live_out)}
+    # live around the back edge, so up to the jump at the end of the loop
+    jump = max(i for i, x in enumerate(func.instrs) if x.op == 'jump')
+    assert ivs['n'].end >= jump and ivs['s'].end > jump
+
+    gen = X86Generator(ir.Program(functions=[func]))
+    gen.assembly()
+    assert gen.stats['sum'][1] == 0